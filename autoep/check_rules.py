@@ -10,6 +10,11 @@ import argparse
 import datetime
 import collections
 import distutils.core
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from common.macros import loadMacroMatrix, getMacroColumns
+from common.violations import ViolationStore
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__)) # Dir of this script
 TABLES_DIR = SCRIPT_DIR + '/tables'
@@ -58,6 +63,11 @@ def parseArgs(argv):
     parser.add_argument('--R4', help='Check all rule R4', action='store_true', required=False)
     parser.add_argument('--R6', help='Check all rule R6', action='store_true', required=False)
     parser.add_argument('--R7', help='Check all rule R7', action='store_true', required=False)
+    parser.add_argument('--summary', help='Print the number of violations per rule/tool ' + \
+                        'and per configuration', action='store_true', required=False)
+    parser.add_argument('--json', help='Export the violations to a JSON file', \
+                        required=False)
+    parser.add_argument('--csv', help='Export the violations to a CSV file', required=False)
 
     if (len(argv) == 0):
         parser.print_help()
@@ -65,178 +75,114 @@ def parseArgs(argv):
     opts = parser.parse_args(argv)
     return opts
 
-# def extractMacroValue(macro, numbers_tex_file):
-#     fr = open(numbers_tex_file, 'r')
-#     lines = fr.readlines()
-#     fr.close()
-#     for i in range(len(lines)):
-#         if lines[i].startswith('\\DefMacro{' + macro):
-#             value = lines[i].split('{')[2].split('}')[0]
-#     return value
-
-# def extractMacroValueFromLineList(macro, lines):
-#     for i in range(len(lines)):
-#         if lines[i].startswith('\\DefMacro{' + macro):
-#             value = lines[i].split('{')[2].split('}')[0]
-#             return value
+# AutoEP macros are <config><example_id><version><tool><metric>
+RESULTS_MACRO_RE = '^(.+)(V[01])(' + '|'.join(['notool'] + TOOLS) + ')(NumOf[A-Za-z]+)$'
 
-def extractMacroValueFromLineList(macro, macro_dict):
-    return macro_dict[macro]
+# All the numbers of all the examples, matrix has one row per example (in the order of
+# configs and example_ids) and one column per (version, tool, metric)
+Results = collections.namedtuple('Results', ['configs', 'example_ids', 'matrix'])
 
-def checkRuleR1(macro_lines, violation_list, tools=TOOLS, \
-                numbers_tex_file=ALL_EXAMPLES_NUMBERS_TXT_FILE, \
+def loadResults(numbers_tex_file=ALL_EXAMPLES_NUMBERS_TXT_FILE, \
                 list_tex_file=ALL_EXAMPLES_LIST_TXT_FILE):
     fr = open(list_tex_file, 'r')
     lines = fr.readlines()
     fr.close()
+    configs = []
+    example_ids = []
     for i in range(len(lines)):
-        config = lines[i].split()[0]
-        example_id = lines[i].strip().split()[1]
-        # assertion fail
-        retestall_macro = config + example_id + 'V1' + 'notoolNumOfAssertionFailTests'
-        retestall_num_of_failed_tests = \
-                            extractMacroValueFromLineList(retestall_macro, macro_lines)
-        for tool in tools:
-            tool_macro = config + example_id + 'V1' + tool + 'NumOfAssertionFailTests'
-            tool_num_of_failed_tests = \
-                            extractMacroValueFromLineList(tool_macro, macro_lines)
-            if int(tool_num_of_failed_tests) < int(retestall_num_of_failed_tests):
-                reportViolation('R1', tool, config, example_id, violation_list, 'Assertion')
-        # state changes
-        retestall_macro = config + example_id + 'V1' + 'notoolNumOfStateChangeTests'
-        retestall_num_of_failed_tests = \
-                            extractMacroValueFromLineList(retestall_macro, macro_lines)
-        for tool in tools:
-            tool_macro = config + example_id + 'V1' + tool + 'NumOfStateChangeTests'
-            tool_num_of_failed_tests = \
-                            extractMacroValueFromLineList(tool_macro, macro_lines)
-            if int(tool_num_of_failed_tests) < int(retestall_num_of_failed_tests):
-                reportViolation('R1', tool, config, example_id, violation_list, 'State')
+        configs.append(lines[i].split()[0])
+        example_ids.append(lines[i].strip().split()[1])
+    matrix = loadMacroMatrix(numbers_tex_file, RESULTS_MACRO_RE, \
+                             [configs[i] + example_ids[i] for i in range(len(configs))])
+    return Results(configs, example_ids, matrix)
 
-def checkRuleR2(macro_lines, violation_list, tools=TOOLS, \
-                numbers_tex_file=ALL_EXAMPLES_NUMBERS_TXT_FILE, \
-                list_tex_file=ALL_EXAMPLES_LIST_TXT_FILE):
-    fr = open(list_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        config = lines[i].split()[0]
-        example_id = lines[i].strip().split()[1]
-        for version in ['V0', 'V1']:
-            retestall_macro = config + example_id + version + 'notoolNumOfRunTests'
-            num_of_all_tests = int(extractMacroValueFromLineList(retestall_macro, macro_lines))
-            num_of_run_tests_map = {}
-            for tool in tools:
-                tool_macro = config + example_id + version + tool + 'NumOfRunTests'
-                tool_num_of_run_tests = int(extractMacroValueFromLineList(tool_macro, \
-                                                                          macro_lines))
-                num_of_run_tests_map[tool] = tool_num_of_run_tests
-            if list(num_of_run_tests_map.values()).count(0) == 1 and \
-               list(num_of_run_tests_map.values()).count(num_of_all_tests) == len(tools) - 1:
-                for tool in num_of_run_tests_map:
-                    if num_of_run_tests_map[tool] == 0:
-                        reportViolation('R2', tool, config, example_id, violation_list, 'Run')
+def extractMetric(results, version, tools, metric):
+    # (num of examples x num of tools) array
+    return getMacroColumns(results.matrix, [(version, tool, metric) for tool in tools])
 
-def checkRuleR3(macro_lines, violation_list, tools=TOOLS, \
-                numbers_tex_file=ALL_EXAMPLES_NUMBERS_TXT_FILE, \
-                list_tex_file=ALL_EXAMPLES_LIST_TXT_FILE):
-    fr = open(list_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        config = lines[i].split()[0]
-        example_id = lines[i].strip().split()[1]
-        retestall_v0_macro = config + example_id + 'V0' + 'notoolNumOfRunTests'
-        v0_num_of_all_tests = int(extractMacroValueFromLineList(retestall_v0_macro, macro_lines))
-        retestall_v1_macro = config + example_id + 'V1' + 'notoolNumOfRunTests'
-        v1_num_of_all_tests = int(extractMacroValueFromLineList(retestall_v1_macro, macro_lines))
-        for tool in tools:
-            tool_v0_macro = config + example_id + 'V0' + tool + 'NumOfRunTests'
-            tool_v1_macro = config + example_id + 'V1' + tool + 'NumOfRunTests'
-            tool_num_of_run_tests_on_v0_version = \
-                                int(extractMacroValueFromLineList(tool_v0_macro, macro_lines))
-            tool_num_of_run_tests_on_v1_version = \
-                                int(extractMacroValueFromLineList(tool_v1_macro, macro_lines))
-            if tool_num_of_run_tests_on_v0_version == v0_num_of_all_tests and \
-               tool_num_of_run_tests_on_v1_version == v1_num_of_all_tests and \
-               v1_num_of_all_tests != 0:
-                reportViolation('R3', tool, config, example_id, violation_list, 'Run')
+def reportViolations(rule, violations, fail_types, results, violation_list, tools):
+    ''' violations is a boolean (example x fail type x tool) array, report them in the
+    order the examples, fail types and tools are listed.
+    '''
+    for i, j, k in zip(*np.nonzero(violations)):
+        reportViolation(rule, tools[k], results.configs[i], results.example_ids[i], \
+                        violation_list, fail_types[j])
 
-def checkRuleR4(macro_lines, violation_list, tools=TOOLS, \
-                numbers_tex_file=ALL_EXAMPLES_NUMBERS_TXT_FILE, \
-                list_tex_file=ALL_EXAMPLES_LIST_TXT_FILE):
-    fr = open(list_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        config = lines[i].split()[0]
-        example_id = lines[i].strip().split()[1]
-        for version in ['V0', 'V1']:
-            retestall_macro = config + example_id + version + 'notoolNumOfRunTests'
-            num_of_all_tests = int(extractMacroValueFromLineList(retestall_macro, macro_lines))
-            num_of_run_tests_map = {}
-            for tool in tools:
-                tool_macro = config + example_id + version + tool + 'NumOfRunTests'
-                tool_num_of_run_tests = int(extractMacroValueFromLineList(tool_macro, \
-                                                                          macro_lines))
-                num_of_run_tests_map[tool] = tool_num_of_run_tests
-            if list(num_of_run_tests_map.values()).count(0) == len(tools) - 1 and \
-               list(num_of_run_tests_map.values()).count(num_of_all_tests) == 1:
-                for tool in num_of_run_tests_map:
-                    if num_of_run_tests_map[tool] == num_of_all_tests:
-                        reportViolation('R4', tool, config, example_id, violation_list, 'Run')
+def checkRuleR1(results, violation_list, tools=TOOLS):
+    # assertion fail
+    assertion_violations = \
+        extractMetric(results, 'V1', tools, 'NumOfAssertionFailTests') < \
+        extractMetric(results, 'V1', ['notool'], 'NumOfAssertionFailTests')
+    # state changes
+    state_violations = \
+        extractMetric(results, 'V1', tools, 'NumOfStateChangeTests') < \
+        extractMetric(results, 'V1', ['notool'], 'NumOfStateChangeTests')
+    reportViolations('R1', np.stack([assertion_violations, state_violations], axis=1), \
+                     ['Assertion', 'State'], results, violation_list, tools)
 
-def checkRuleR6(macro_lines, violation_list, tools=TOOLS, \
-                numbers_tex_file=ALL_EXAMPLES_NUMBERS_TXT_FILE, \
-                list_tex_file=ALL_EXAMPLES_LIST_TXT_FILE):
-    fr = open(list_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        config = lines[i].split()[0]
-        example_id = lines[i].strip().split()[1]
-        retestall_macro = config + example_id + 'V0' + 'notoolNumOfRunTests'
-        retestall_num_of_run_tests = extractMacroValueFromLineList(retestall_macro, macro_lines)
-        for tool in tools:
-            tool_macro = config + example_id + 'V0' + tool + 'NumOfRunTests'
-            tool_num_of_run_tests = extractMacroValueFromLineList(tool_macro, macro_lines)
-            if int(tool_num_of_run_tests) != int(retestall_num_of_run_tests):
-                reportViolation('R6', tool, config, example_id, violation_list, 'Run')
+def checkRuleR2(results, violation_list, tools=TOOLS):
+    violations = []
+    for version in ['V0', 'V1']:
+        num_of_all_tests = extractMetric(results, version, ['notool'], 'NumOfRunTests')
+        num_of_run_tests = extractMetric(results, version, tools, 'NumOfRunTests')
+        # exactly one tool runs no test, all the others run all tests
+        only_one_runs_none = ((num_of_run_tests == 0).sum(axis=1) == 1) & \
+                             ((num_of_run_tests == num_of_all_tests).sum(axis=1) == \
+                              len(tools) - 1)
+        violations.append(only_one_runs_none[:, None] & (num_of_run_tests == 0))
+    reportViolations('R2', np.stack(violations, axis=1), ['Run', 'Run'], results, \
+                     violation_list, tools)
 
-def checkRuleR7(macro_lines, violation_list, tools=TOOLS, \
-                numbers_tex_file=ALL_EXAMPLES_NUMBERS_TXT_FILE, \
-                list_tex_file=ALL_EXAMPLES_LIST_TXT_FILE):
-    fr = open(list_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        config = lines[i].split()[0]
-        example_id = lines[i].strip().split()[1]
-        # assertion fail
-        retestall_macro = config + example_id + 'V1' + 'notoolNumOfAssertionFailTests'
-        retestall_num_of_failed_tests = extractMacroValueFromLineList(retestall_macro, \
-                                                                      macro_lines)
-        for tool in tools:
-            tool_macro = config + example_id + 'V1' + tool + 'NumOfAssertionFailTests'
-            tool_num_of_failed_tests = extractMacroValueFromLineList(tool_macro, macro_lines)
-            if int(tool_num_of_failed_tests) > int(retestall_num_of_failed_tests):
-                reportViolation('R7', tool, config, example_id, violation_list, 'Assertion')
-        # state changes
-        # retestall_macro = config + example_id + 'V1' + 'notoolNumOfStateChangeTests'
-        # retestall_num_of_failed_tests = extractMacroValueFromLineList(retestall_macro, \
-        #    macro_lines)
-        # for tool in tools:
-        #     tool_macro = config + example_id + 'V1' + tool + 'NumOfStateChangeTests'
-        #     tool_num_of_failed_tests = extractMacroValueFromLineList(tool_macro, \
-        #    macro_lines)
-        #     if int(tool_num_of_failed_tests) > int(retestall_num_of_failed_tests):
-        #         reportViolation('R7', tool, config, example_id, violation_list, 'State')
-        # state diff than notool at version 0
-        for tool in tools:
-            tool_macro = config + example_id + 'V0' + tool + 'NumOfStateDiffTests'
-            tool_num_of_state_diff_tests = extractMacroValueFromLineList(tool_macro, macro_lines)
-            if int (tool_num_of_state_diff_tests) > 0:
-                reportViolation('R7', tool, config, example_id, violation_list, 'State')
+def checkRuleR3(results, violation_list, tools=TOOLS):
+    v0_num_of_all_tests = extractMetric(results, 'V0', ['notool'], 'NumOfRunTests')
+    v1_num_of_all_tests = extractMetric(results, 'V1', ['notool'], 'NumOfRunTests')
+    violations = \
+        (extractMetric(results, 'V0', tools, 'NumOfRunTests') == v0_num_of_all_tests) & \
+        (extractMetric(results, 'V1', tools, 'NumOfRunTests') == v1_num_of_all_tests) & \
+        (v1_num_of_all_tests != 0)
+    reportViolations('R3', violations[:, None], ['Run'], results, violation_list, tools)
+
+def checkRuleR4(results, violation_list, tools=TOOLS):
+    violations = []
+    for version in ['V0', 'V1']:
+        num_of_all_tests = extractMetric(results, version, ['notool'], 'NumOfRunTests')
+        num_of_run_tests = extractMetric(results, version, tools, 'NumOfRunTests')
+        # exactly one tool runs all tests, all the others run no test
+        only_one_runs_all = ((num_of_run_tests == 0).sum(axis=1) == len(tools) - 1) & \
+                            ((num_of_run_tests == num_of_all_tests).sum(axis=1) == 1)
+        violations.append(only_one_runs_all[:, None] & (num_of_run_tests == num_of_all_tests))
+    reportViolations('R4', np.stack(violations, axis=1), ['Run', 'Run'], results, \
+                     violation_list, tools)
+
+def checkRuleR6(results, violation_list, tools=TOOLS):
+    violations = extractMetric(results, 'V0', tools, 'NumOfRunTests') != \
+                 extractMetric(results, 'V0', ['notool'], 'NumOfRunTests')
+    reportViolations('R6', violations[:, None], ['Run'], results, violation_list, tools)
+
+def checkRuleR7(results, violation_list, tools=TOOLS):
+    # assertion fail
+    assertion_violations = \
+        extractMetric(results, 'V1', tools, 'NumOfAssertionFailTests') > \
+        extractMetric(results, 'V1', ['notool'], 'NumOfAssertionFailTests')
+    # state diff than notool at version 0
+    state_violations = extractMetric(results, 'V0', tools, 'NumOfStateDiffTests') > 0
+    reportViolations('R7', np.stack([assertion_violations, state_violations], axis=1), \
+                     ['Assertion', 'State'], results, violation_list, tools)
+
+# A violation is (rule, gen_id, evo_id, tool, example_id, fail_type), the same violation
+# found by both the Assertion and the State diff is reported only once
+VIOLATION_FIELDS = ['rule', 'gen', 'evo', 'tool', 'example', 'fail_type']
+VIOLATION_KEY_FIELDS = ['rule', 'gen', 'evo', 'tool', 'example']
+
+def printViolation(v):
+    msg = 'On configration ' + v[1] + '+' + v[2] + ', example ' + v[4] + ', ' + v[3] + \
+          ' violates rule ' + v[0]
+    if v[0] == 'R1' or v[0] == 'R7':
+        msg += ', detected by ' + v[5] + ' diff.'
+    print (msg)
+
+def newViolationStore():
+    return ViolationStore(VIOLATION_FIELDS, VIOLATION_KEY_FIELDS, on_add=printViolation)
 
 def reportViolation(rule, tool, config, example_id, violation_list, fail_type, \
                     generation_map=GENERATION_MAP, evolution_map=EVOLUTION_MAP):
@@ -245,58 +191,63 @@ def reportViolation(rule, tool, config, example_id, violation_list, fail_type, \
     evo = '-'.join(config.split('-')[1:])
     gen_id = generation_map[gen]
     evo_id = evolution_map[evo]
-    v = (rule, gen_id, evo_id, tool, example_id, fail_type)
-    for reported_v in violation_list:
-        if reported_v[0] == v[0] and reported_v[1] == v[1] and reported_v[2] == v[2] and \
-           reported_v[3] == v[3] and reported_v[4] == v[4]:
-            return
-    violation_list.append(v)
-    msg = 'On configration ' + v[1] + '+' + v[2] + ', example ' + v[4] + ', ' + v[3] + \
-          ' violates rule ' + v[0]
-    if v[0] == 'R1' or v[0] == 'R7':
-        msg += ', detected by ' + v[5] + ' diff.'
-    print (msg)
+    violation_list.add((rule, gen_id, evo_id, tool, example_id, fail_type))
+
+def summarizeViolations(violation_list):
+    print ('\nViolations per rule and tool:')
+    for (rule, tool), count in violation_list.countBy('rule', 'tool').items():
+        print (rule + ' ' + tool + ': ' + str(count))
+    print ('\nViolations per configuration:')
+    for (gen_id, evo_id), count in violation_list.countBy('gen', 'evo').items():
+        print (gen_id + '+' + evo_id + ': ' + str(count))
+
+def exportViolations(violation_list, opts):
+    if opts.summary:
+        summarizeViolations(violation_list)
+    if opts.json:
+        violation_list.exportJson(opts.json)
+    if opts.csv:
+        violation_list.exportCsv(opts.csv)
 
 if __name__ == '__main__':
     opts = parseArgs(sys.argv[1:])
-    violation_list = []
-    fr = open(ALL_EXAMPLES_NUMBERS_TXT_FILE, 'r')
-    macro_lines = fr.readlines()
-    fr.close()
-    macro_dict ={}
-    for i in range(len(macro_lines)):
-        key = macro_lines[i].split('{')[1].split('}')[0]
-        value = macro_lines[i].split('{')[2].split('}')[0]
-        macro_dict[key] = value
-    macro_lines = macro_dict
+    violation_list = newViolationStore()
+    results = loadResults()
     if opts.all:
-        checkRuleR1(macro_lines, violation_list)
-        checkRuleR2(macro_lines, violation_list)
-        checkRuleR3(macro_lines, violation_list)
-        checkRuleR4(macro_lines, violation_list)
-        checkRuleR6(macro_lines, violation_list)
-        checkRuleR7(macro_lines, violation_list)
+        checkRuleR1(results, violation_list)
+        checkRuleR2(results, violation_list)
+        checkRuleR3(results, violation_list)
+        checkRuleR4(results, violation_list)
+        checkRuleR6(results, violation_list)
+        checkRuleR7(results, violation_list)
     if opts.R1:
-        checkRuleR1(macro_lines, violation_list)
+        checkRuleR1(results, violation_list)
+        exportViolations(violation_list, opts)
         exit(0)
     if opts.R2:
-        checkRuleR2(macro_lines, violation_list)
+        checkRuleR2(results, violation_list)
+        exportViolations(violation_list, opts)
         exit(0)
     if opts.R3:
-        checkRuleR3(macro_lines, violation_list)
+        checkRuleR3(results, violation_list)
+        exportViolations(violation_list, opts)
         exit(0)
     if opts.R4:
-        checkRuleR4(macro_lines, violation_list)
+        checkRuleR4(results, violation_list)
+        exportViolations(violation_list, opts)
         exit(0)
     if opts.R6:
-        checkRuleR6(macro_lines, violation_list)
+        checkRuleR6(results, violation_list)
+        exportViolations(violation_list, opts)
         exit(0)
     if opts.R7:
-        checkRuleR7(macro_lines, violation_list)
+        checkRuleR7(results, violation_list)
+        exportViolations(violation_list, opts)
         exit(0)
 
     if len(violation_list) == 0:
         print ('No violations detected')
+    exportViolations(violation_list, opts)
 
     # for v in violation_list:
     #     msg = 'On configration ' + v[1] + '+' + v[2] + ', example ' + v[4] + ', ' + v[3] + \
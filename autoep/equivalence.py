@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+
+import re
+import hashlib
+
+MAIN_SOURCES_PREFIX = 'src/main/java/'
+
+# String and char literals first, so that "//" or "/*" inside them is not a comment;
+# operators are matched longest first as javac does, so "i++ + j" and "i + ++j" differ
+TOKEN_RE = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*.*?\*/|\w+|' + \
+                      r'>>>=|<<=|>>=|>>>|<<|>>|\+\+|--|&&|\|\||->|::|[-+*/%&|^!=<>]=|\S', \
+                      re.DOTALL)
+
+def normalizeJavaSource(source):
+    ''' The tokens of a Java source, comments removed, separated by one space: the same for
+    any two sources that differ only in whitespace, comments or formatting.
+    '''
+    tokens = [token for token in TOKEN_RE.findall(source) \
+              if not token.startswith('//') and not token.startswith('/*')]
+    return ' '.join(tokens)
+
+def hashNormalizedSources(tree):
+    ''' Hash of the normalized src/main/java files of a {relative path: content} tree.
+    '''
+    h = hashlib.sha1()
+    for rel_path in sorted(tree.keys()):
+        if not rel_path.startswith(MAIN_SOURCES_PREFIX) or not rel_path.endswith('.java'):
+            continue
+        h.update(rel_path.encode('utf-8') + b'\0')
+        h.update(normalizeJavaSource(tree[rel_path]).encode('utf-8') + b'\0')
+    return h.hexdigest()
+
+def areEquivalent(v0_tree, v1_tree):
+    ''' V1 is the same program as V0: the tests are those of V0 in both runs, so only the
+    main sources matter.
+    '''
+    return hashNormalizedSources(v0_tree) == hashNormalizedSources(v1_tree)
+
+def loadEquivalenceIndex(index_file):
+    ''' Read the (<gen>-<evo>, example) pairs whose V0 and V1 are equivalent.
+    '''
+    index = set([])
+    try:
+        with open(index_file, 'r') as fr:
+            for line in fr:
+                if line.strip():
+                    config, example = line.split()
+                    index.add((config, example))
+    except IOError:
+        pass
+    return index
+
+def appendToEquivalenceIndex(index_file, config, examples):
+    with open(index_file, 'a') as fw:
+        for example in examples:
+            fw.write(config + ' ' + example + '\n')
@@ -15,6 +15,11 @@ import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 
+from log_parser import LogRecord, parseLog
+from equivalence import loadEquivalenceIndex
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from common.parse_cache import ParseCache
+
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__)) # Dir of this script
 _RESULTS_DIR = SCRIPT_DIR + '/_results'
 TABLES_DIR = SCRIPT_DIR + '/tables'
@@ -23,6 +28,13 @@ ALL_EXAMPLES_NUMBERS_TXT_FILE = TABLES_DIR + '/all-examples-numbers.txt'
 ALL_EXAMPLES_LIST_TXT_FILE = TABLES_DIR + '/all-examples-list.txt'
 GEN_EVO_TABLE_TEX_FILE = TABLES_DIR + '/gen-evo-table.tex'
 ALL_EXAMPLES_TABLE_TEX_FILE = TABLES_DIR + '/all-examples-table.tex'
+PARSE_CACHE_FILE = TABLES_DIR + '/parsed-logs.db'
+# Written by run_autoep.py in the results dir: examples not run because V1 is the same
+# program as V0
+EQUIVALENCE_INDEX_NAME = 'v0-v1-same.txt'
+# Written by run_autoep.py in the results dir: examples whose RetestAll baseline ran no test
+# on V1, on which the other tools were not run
+INVALID_EXAMPLES_NAME = 'invalid-examples.txt'
 
 GENERATION_CONSTRAINTS = ['default', 'pullupmethod', 'pushdownmethod', 'pullupfield', \
                           'movemethod', 'renameclass', 'renamemethod', 'renamefield', \
@@ -61,96 +73,34 @@ def parseArgs(argv):
     parser = argparse.ArgumentParser()
     parser.add_argument('--all', help='Generate all tables', \
                         action='store_true', required=False)
+    parser.add_argument('--no-cache', help='Re-parse all logs instead of using ' + \
+                        PARSE_CACHE_FILE, action='store_true', required=False)
     if (len(argv) == 0):
         parser.print_help()
         exit(1)
     opts = parser.parse_args(argv)
     return opts
 
-# Extract the number of tests run from a log file
-def extractNumOfTestRuns(log):
-    f = open(log, 'r')
-    lines = f.readlines()
-    f.close()
-    num_of_test_runs = '0'
-    for i in range(len(lines)):
-        if lines[i].startswith('Tests run:') and \
-           'Time elapsed:' not in lines[i]:
-            num_of_test_runs = lines[i].split(',')[0].split(' ')[-1]
-    return num_of_test_runs
-
-# get the list of failed tests in terms of assertion failures, from a log file
-def extractListOfAssertionFailingTestsFromLog(log):
-    f = open(log, 'r')
-    lines = f.readlines()
-    f.close()
-    failing_tests_list = []
-    for i in range(len(lines)):
-        if lines[i].startswith('Running Package_0.TestGroup'):
-            test_name = lines[i].strip().split('.')[1]
-            for j in range(i+1, len(lines)):
-                if lines[j].startswith('Assert: null'):
-                    actual_value = lines[j].strip().split(' ')[-1]
-                    if actual_value == 'null':
-                        pass
-                    else:
-                        failing_tests_list.append(test_name)
-                        break
-                elif lines[j].startswith('Assert: not null'):
-                    actual_value = lines[j].strip().split(' ')[-1]
-                    if not actual_value == 'null':
-                        pass
-                    else:
-                        failing_tests_list.append(test_name)
-                        break
-                elif lines[j].startswith('Assert: ') and '==' in lines[j]:
-                    actual_value = lines[j].strip().split(' ')[-2]
-                    expected_value = lines[j].strip().split(' ')[-1]
-                    if expected_value == actual_value:
-                        pass
-                    else:
-                        failing_tests_list.append(test_name)
-                        break
-                else:
-                    break
-    return failing_tests_list
-
-# Extract the dict {test_name: state_obj_list} from a log file
-def extractDictOfObjectStates(log, exclude_clover_sniffer=True):
-    f = open(log, 'r')
-    lines = f.readlines()
-    f.close()
-    objects_dict = collections.OrderedDict({})
-    for i in range(len(lines)):
-        if lines[i].startswith('===== Package_0.TestGroup'):
-            test_name = lines[i].strip().split('.')[1]
-            objects_dict[test_name] = []
-            j = i-1
-            while j >= 0:
-                if lines[j].startswith('OBJECT:'):
-                    obj = lines[j].strip()
-                    if exclude_clover_sniffer:
-                        # prevent clover sniffer from disturbing comparing states
-                        if '__CLR4_2_0_TEST_NAME_SNIFFER=UNK:com_atlassian_clover.TestNameSniffer' in lines[j]:
-                            num_of_objects = int(lines[j].strip().split('#')[1].split(' ')[0])
-                            old_num_of_objects = str(num_of_objects)
-                            new_num_of_objects = str(num_of_objects - 1)
-                            obj = obj.replace('#' + old_num_of_objects, '#' + new_num_of_objects)
-                            obj = obj.replace('__CLR4_2_0_TEST_NAME_SNIFFER=UNK:com_atlassian_clover.TestNameSniffer, ', '').replace('__CLR4_2_0_TEST_NAME_SNIFFER=UNK:com_atlassian_clover.TestNameSniffer', '')
-                    objects_dict[test_name].append(obj)
-                    j -= 1
-                else:
-                    break
-    return objects_dict
+def parseExampleLogs(gen, evo, example, tools=TOOLS, results_dir=_RESULTS_DIR, cache=None):
+    ''' Parse every <version>/<tool>.log of one example once, return {(version, tool): record}
+    Logs which did not change since the last run are served from the cache (if given).
+    '''
+    records = {}
+    for version in ['0', '1']:
+        for tool in tools:
+            log_file = results_dir + '/' + gen + '-' + evo + '/' + example + '/' + version + \
+                       '/' + tool + '.log'
+            if cache is None:
+                records[(version, tool)] = parseLog(log_file)
+            else:
+                records[(version, tool)] = LogRecord(*cache.get(log_file, parseLog))
+    return records
 
-# get the list of tests whose states change between two versions from two versions' log files
-def extractStateChangingTestsFromTwoVersion(tool, gen, evo, example, results_dir=_RESULTS_DIR):
+# get the list of tests whose states change between two versions
+def extractStateChangingTestsFromTwoVersion(v0_record, v1_record):
     states_changing_tests_list = []
-    # Read version 0 and version 1 logs.
-    v0_log = results_dir + '/' + gen + '-' + evo + '/' + example + '/0/' + tool + '.log'
-    v1_log = results_dir + '/' + gen + '-' + evo + '/' + example + '/1/' + tool + '.log'
-    v0_states_dict = extractDictOfObjectStates(v0_log)
-    v1_states_dict = extractDictOfObjectStates(v1_log)
+    v0_states_dict = v0_record.object_states
+    v1_states_dict = v1_record.object_states
     for test_name in v0_states_dict.keys():
         if not test_name in v1_states_dict: # the tool does not select this test in version 1
             continue
@@ -158,56 +108,48 @@ def extractStateChangingTestsFromTwoVersion(tool, gen, evo, example, results_dir
             states_changing_tests_list.append(test_name)
     return states_changing_tests_list
 
-def extractStateDiffFromNotoolTests_V0(tool, gen, evo, example, results_dir=_RESULTS_DIR):
+def extractStateDiffFromNotoolTests_V0(tool_record, notool_record):
     state_diff_tests_list = []
-    tool_log = results_dir + '/' + gen + '-' + evo + '/' + example + '/0/' + \
-               tool + '.log'
-    notool_log = results_dir + '/' + gen + '-' + evo + '/' + example + '/0/' + \
-                 'notool.log'
-    tool_obj_dict = extractDictOfObjectStates(tool_log)
-    notool_obj_dict = extractDictOfObjectStates(notool_log)
+    tool_obj_dict = tool_record.object_states
+    notool_obj_dict = notool_record.object_states
     for test_name in notool_obj_dict:
         if tool_obj_dict[test_name] != notool_obj_dict[test_name]:
             state_diff_tests_list.append(test_name)
     return state_diff_tests_list
 
-def extractStateDiffFromNotoolTests_V1(tool, gen, evo, example, results_dir=_RESULTS_DIR):
+def extractStateDiffFromNotoolTests_V1(tool_record, notool_record, \
+                                       notool_state_changing_tests_list):
     state_diff_tests_list = []
-    notool_state_changing_tests_list = extractStateChangingTestsFromTwoVersion('notool', gen, \
-                                                                               evo, example)
-    tool_log = results_dir + '/' + gen + '-' + evo + '/' + example + '/1/' + \
-               tool + '.log'
-    notool_log = results_dir + '/' + gen + '-' + evo + '/' + example + '/1/' + \
-                 'notool.log'
-    tool_obj_dict = extractDictOfObjectStates(tool_log)
-    notool_obj_dict = extractDictOfObjectStates(notool_log)
+    tool_obj_dict = tool_record.object_states
+    notool_obj_dict = notool_record.object_states
     for test_name in notool_state_changing_tests_list:
-        if test_name not in tool_obj_dict:
-            tool_obj_dict[test_name] = 'Not Run'
-        if tool_obj_dict[test_name] != notool_obj_dict[test_name]:
+        if tool_obj_dict.get(test_name, 'Not Run') != notool_obj_dict[test_name]:
             state_diff_tests_list.append(test_name)
     return state_diff_tests_list
 
-def isLineInV0V1SameFile(line):
-    fr = open(SCRIPT_DIR + '/v0_v1_same_list.txt', 'r')
-    prog_lines = fr.readlines()
-    for i in range(len(prog_lines)):
-        if line in prog_lines[i]:
-            return True
-    return False
-
 def genAllExamplesNumbers(gens=GENERATION_CONSTRAINTS, evos=EVOLUTIONS, tools=TOOLS, \
                           results_dir=_RESULTS_DIR, \
                           gen_evo_numbers_tex_file=GEN_EVO_NUMBERS_TEX_FILE, \
                           all_examples_list_txt_file=ALL_EXAMPLES_LIST_TXT_FILE, \
                           all_examples_numbers_txt_file=ALL_EXAMPLES_NUMBERS_TXT_FILE, \
-                          generation_map=GENERATION_MAP, evolution_map=EVOLUTION_MAP):
+                          generation_map=GENERATION_MAP, evolution_map=EVOLUTION_MAP, \
+                          cache=None):
+    v0_v1_same_index = loadEquivalenceIndex(results_dir + '/' + EQUIVALENCE_INDEX_NAME)
+    # same "<gen>-<evo> <example>" lines as the equivalence index
+    aborted_index = loadEquivalenceIndex(results_dir + '/' + INVALID_EXAMPLES_NAME)
     lines = ''
     numbers_txt_lines = ''
     list_txt_lines = ''
     for gen in gens:
         for evo in evos:
-            if not os.path.isdir(results_dir + '/' + gen + '-' + evo): # no valid base programs
+            # the results dir is missing when all the examples were skipped as equivalent
+            examples = []
+            if os.path.isdir(results_dir + '/' + gen + '-' + evo):
+                examples = sorted(os.listdir(results_dir + '/' + gen + '-' + evo))
+            # evolved, but not run since V1 is the same as V0
+            equivalent_examples = [example for config, example in v0_v1_same_index \
+                                   if config == gen + '-' + evo]
+            if len(examples) + len(equivalent_examples) == 0: # no valid base programs
                 lines += '\\DefMacro{' + gen + evo + 'NumOfEvolvedPrograms}{0}\n'
                 lines += '\\DefMacro{' + gen + evo + 'NumOfValidEvolvedPrograms}{0}\n'
                 lines += '\\DefMacro{' + generation_map[gen] + evolution_map[evo] + \
@@ -217,52 +159,61 @@ def genAllExamplesNumbers(gens=GENERATION_CONSTRAINTS, evos=EVOLUTIONS, tools=TO
                 if evo == 'next-program-in-order':
                     lines += '\\DefMacro{' + generation_map[gen] + 'NumOfBasePrograms}{0}\n'
                 continue
-            examples = sorted(os.listdir(results_dir + '/' + gen + '-' + evo))
             if evo == 'next-program-in-order':
                 base_programs = set()
-                for example in examples:
+                for example in examples + equivalent_examples:
                     base_programs.add(example.split('-')[0])
                 lines += '\\DefMacro{' + gen + 'NumOfBasePrograms}{' + \
                          str(len(base_programs)) + '}\n'
                 lines += '\\DefMacro{' + generation_map[gen] + 'NumOfBasePrograms}{' + \
                          str(len(base_programs)) + '}\n'
             lines += '\\DefMacro{' + gen + evo + 'NumOfEvolvedPrograms}{' + \
-                         str(len(examples)) + '}\n'
+                         str(len(examples) + len(equivalent_examples)) + '}\n'
             lines += '\\DefMacro{' + generation_map[gen] + evolution_map[evo] + \
-                         'NumOfEvolvedPrograms}{' + str(len(examples)) + '}\n'
+                         'NumOfEvolvedPrograms}{' + \
+                         str(len(examples) + len(equivalent_examples)) + '}\n'
+            # Evolved = Valid + Invalid + Equivalent: the equivalent examples are not run, so
+            # they are neither valid nor invalid (Valid counted them before they were skipped)
+            lines += '\\DefMacro{' + gen + evo + 'NumOfEquivalentEvolvedPrograms}{' + \
+                         str(len(equivalent_examples)) + '}\n'
             invalid_examples = []
             for example in examples:
                 # --------- just for a test
-                # prog_line = gen + '-' + evo + '/program0/' + example
-                # if not isLineInV0V1SameFile(prog_line):
-                #     continue
-                # print ('Match: ' + prog_line)
-                # ---------
                 # if gen != 'renameclass' or evo != 'next-program-in-order':
                 #    continue
                 # ---------
+                if (gen + '-' + evo, example) in aborted_index:
+                    # only the RetestAll logs exist, no numbers to check
+                    invalid_examples.append(example)
+                    continue
                 list_txt_lines += gen + '-' + evo + ' ' + example + '\n'
+                # each log is read once, all the numbers are computed from the records
+                records = parseExampleLogs(gen, evo, example, tools, results_dir, cache)
+                notool_state_changing_tests_list = \
+                    extractStateChangingTestsFromTwoVersion(records[('0', 'notool')], \
+                                                            records[('1', 'notool')])
+                if records[('1', 'notool')].num_of_test_runs == '0':
+                    invalid_examples.append(example)
                 for version in ['0', '1']:
                     for tool in tools:
-                        log_file = results_dir + '/' + gen + '-' + evo + '/' + example + '/' + \
-                                   version + '/' + tool + '.log'
-                        if version == '1' and tool == 'notool' and \
-                           extractNumOfTestRuns(log_file) == '0':
-                            invalid_examples.append(example)
-                        num_of_tests_run = extractNumOfTestRuns(log_file)
-                        num_of_assertion_failing_tests = \
-                                        len(extractListOfAssertionFailingTestsFromLog(log_file))
+                        record = records[(version, tool)]
+                        num_of_tests_run = record.num_of_test_runs
+                        num_of_assertion_failing_tests = len(record.assertion_failing_tests)
                         num_of_state_changing_tests = \
-                            len(extractStateChangingTestsFromTwoVersion(tool, gen, evo, example))
+                            len(extractStateChangingTestsFromTwoVersion(records[('0', tool)], \
+                                                                        records[('1', tool)]))
                         if version == '0':
                             v0_num_of_state_diff_tests = \
-                                len(extractStateDiffFromNotoolTests_V0(tool, gen, evo, example))
+                                len(extractStateDiffFromNotoolTests_V0(record, \
+                                                                       records[('0', 'notool')]))
                             numbers_txt_lines += '\\DefMacro{' + gen + '-' + evo + example + \
                                     'V' + str(version) + tool + 'NumOfStateDiffTests}{' + \
                                     str(v0_num_of_state_diff_tests) + '}\n'
                         if version == '1':
                             v1_num_of_state_diff_tests = \
-                                len(extractStateDiffFromNotoolTests_V1(tool, gen, evo, example))
+                                len(extractStateDiffFromNotoolTests_V1(record, \
+                                                                       records[('1', 'notool')], \
+                                                    notool_state_changing_tests_list))
                             numbers_txt_lines += '\\DefMacro{' + gen + '-' + evo + example + \
                                     'V' + str(version) + tool + 'NumOfStateDiffTests}{' + \
                                     str(v1_num_of_state_diff_tests) + '}\n'
@@ -349,6 +300,9 @@ if __name__ == '__main__':
     opts = parseArgs(sys.argv[1:])
     if opts.all:
         sub.run('mkdir -p ' + TABLES_DIR, shell=True)
-        genAllExamplesNumbers()
+        cache = None if opts.no_cache else ParseCache(PARSE_CACHE_FILE, 'autoep-log')
+        genAllExamplesNumbers(cache=cache)
+        if cache is not None:
+            cache.close()
         exit(0)
 
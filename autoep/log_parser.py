@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+
+import collections
+
+CLOVER_SNIFFER = '__CLR4_2_0_TEST_NAME_SNIFFER=UNK:com_atlassian_clover.TestNameSniffer'
+
+# Everything we need from one <tool>.log: the number of tests run (a string, as in the log),
+# the tests failing by assertion, and the {test_name: state_obj_list} dict.
+LogRecord = collections.namedtuple('LogRecord', ['num_of_test_runs', 'assertion_failing_tests', \
+                                                 'object_states'])
+
+def removeCloverSniffer(obj):
+    ''' Prevent clover sniffer from disturbing comparing states
+    '''
+    num_of_objects = int(obj.split('#')[1].split(' ')[0])
+    obj = obj.replace('#' + str(num_of_objects), '#' + str(num_of_objects - 1))
+    return obj.replace(CLOVER_SNIFFER + ', ', '').replace(CLOVER_SNIFFER, '')
+
+def isAssertionFailing(line):
+    ''' Return True/False for a failing/passing "Assert:" line, None if it is not one.
+    '''
+    if line.startswith('Assert: null'):
+        return line.strip().split(' ')[-1] != 'null'
+    elif line.startswith('Assert: not null'):
+        return line.strip().split(' ')[-1] == 'null'
+    elif line.startswith('Assert: ') and '==' in line:
+        actual_value = line.strip().split(' ')[-2]
+        expected_value = line.strip().split(' ')[-1]
+        return expected_value != actual_value
+    return None
+
+def parseLog(log, exclude_clover_sniffer=True):
+    ''' Read a log file exactly once, line by line, into a LogRecord.
+    The "Assert:" lines of a test directly follow its "Running" line, and the "OBJECT:" lines
+    of a test directly precede its "=====" line, so both are collected on the fly.
+    '''
+    num_of_test_runs = '0'
+    failing_tests_list = []
+    objects_dict = collections.OrderedDict({})
+    object_lines = [] # consecutive OBJECT lines seen so far
+    assert_test_name = None # test whose Assert lines are being checked
+    with open(log, 'r') as fr:
+        for line in fr:
+            if assert_test_name is not None:
+                failing = isAssertionFailing(line)
+                if failing is None or failing:
+                    if failing:
+                        failing_tests_list.append(assert_test_name)
+                    assert_test_name = None
+            if line.startswith('Tests run:') and 'Time elapsed:' not in line:
+                num_of_test_runs = line.split(',')[0].split(' ')[-1]
+            if line.startswith('Running Package_0.TestGroup'):
+                assert_test_name = line.strip().split('.')[1]
+            if line.startswith('OBJECT:'):
+                obj = line.strip()
+                if exclude_clover_sniffer and CLOVER_SNIFFER in line:
+                    obj = removeCloverSniffer(obj)
+                object_lines.append(obj)
+                continue
+            if line.startswith('===== Package_0.TestGroup'):
+                test_name = line.strip().split('.')[1]
+                # closest object first
+                objects_dict[test_name] = object_lines[::-1]
+            object_lines = []
+    return LogRecord(num_of_test_runs, failing_tests_list, objects_dict)
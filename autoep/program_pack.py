@@ -0,0 +1,235 @@
+#!/usr/bin/python3
+
+import os
+import stat
+import json
+import difflib
+import hashlib
+import collections
+
+# A packed config (<gen>-<evo>.pack) is:
+#   bases/<sha1>.json  {"tree": {relative path: content}, "info": info} of one V0 tree,
+#                      stored once however many examples evolve from it
+#   examples.json      {example: {"base": sha1, "patch": {relative path: opcodes or null},
+#                                 "info_delta": info patch, "info_patch": info patch}}
+# where the opcodes of a file turn its V0 lines into its V1 lines, and null removes the file.
+# The info of a tree is the [mode, mtime] of each file and the [mode, null] of each dir (with
+# a trailing '/', so empty dirs are kept; their mtimes change with any file written in them).
+# An info patch ({relative path: [mode, mtime] or null}) lists what differs: the info delta
+# from the info of the base to the V0 of the example (usually empty, copies of a V0 share
+# their files), the info patch from the V0 to the V1 of the example.
+# bases/ may be a link to a dir shared by the packs of all the evolutions of a generation,
+# pruneBases removes the bases none of them uses.
+# Contents are decoded as latin-1, which maps every byte to one character and back.
+BASES_DIR = 'bases'
+EXAMPLES_FILE = 'examples.json'
+ENCODING = 'latin-1'
+
+# {pack dir: ((inode, mtime) of examples.json, examples)} of the packs used by this process
+_examples_cache = {}
+
+def readTree(prog_dir):
+    tree = collections.OrderedDict([])
+    for dir_path, subpaths, files in os.walk(prog_dir):
+        subpaths.sort()
+        for f in sorted(files):
+            path = os.path.join(dir_path, f)
+            with open(path, 'rb') as fr:
+                tree[os.path.relpath(path, prog_dir)] = fr.read().decode(ENCODING)
+    return tree
+
+def readTreeInfo(prog_dir):
+    ''' [mode, mtime] of each file and [mode, None] of each dir (ending with '/') of
+    @prog_dir.
+    '''
+    info = collections.OrderedDict([])
+    for dir_path, subpaths, files in os.walk(prog_dir):
+        subpaths.sort()
+        for name in subpaths + sorted(files):
+            path = os.path.join(dir_path, name)
+            st = os.stat(path)
+            if name in subpaths:
+                info[os.path.relpath(path, prog_dir) + '/'] = [stat.S_IMODE(st.st_mode), None]
+            else:
+                info[os.path.relpath(path, prog_dir)] = [stat.S_IMODE(st.st_mode), st.st_mtime]
+    return info
+
+def writeTree(tree, dest_dir, info={}):
+    ''' Write @tree into @dest_dir, with the dirs, modes and mtimes of @info (see
+    readTreeInfo).
+    '''
+    for rel_path in info:
+        if rel_path.endswith('/'):
+            os.makedirs(os.path.join(dest_dir, rel_path), exist_ok=True)
+    for rel_path, content in tree.items():
+        path = os.path.join(dest_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fw:
+            fw.write(content.encode(ENCODING))
+    # the deepest first, as setting up a file or dir changes the mtime of its parent
+    for rel_path in sorted(info.keys(), key=lambda rel_path: -rel_path.rstrip('/').count('/')):
+        path = os.path.join(dest_dir, rel_path)
+        if os.path.exists(path):
+            mode, mtime = info[rel_path]
+            os.chmod(path, mode)
+            if mtime is not None:
+                os.utime(path, (mtime, mtime))
+
+def hashTree(tree):
+    h = hashlib.sha1()
+    for rel_path, content in tree.items():
+        h.update(rel_path.encode('utf-8') + b'\0' + content.encode(ENCODING) + b'\0')
+    return h.hexdigest()
+
+def diffTreeInfos(v0_info, v1_info):
+    info_patch = collections.OrderedDict([])
+    for rel_path in v0_info:
+        if rel_path not in v1_info:
+            info_patch[rel_path] = None
+    for rel_path, file_info in v1_info.items():
+        if v0_info.get(rel_path, None) != file_info:
+            info_patch[rel_path] = file_info
+    return info_patch
+
+def applyInfoPatch(v0_info, info_patch):
+    info = collections.OrderedDict(v0_info)
+    for rel_path, file_info in info_patch.items():
+        if file_info is None:
+            del info[rel_path]
+        else:
+            info[rel_path] = file_info
+    return info
+
+def diffTrees(v0_tree, v1_tree):
+    ''' Patch from @v0_tree to @v1_tree: for each changed file, the [i1, i2, new lines]
+    replacing V0 lines i1..i2; None for each removed file.
+    '''
+    patch = collections.OrderedDict([])
+    for rel_path in v0_tree:
+        if rel_path not in v1_tree:
+            patch[rel_path] = None
+    for rel_path, content in v1_tree.items():
+        old_content = v0_tree.get(rel_path, None)
+        if old_content == content:
+            continue
+        old_lines = [] if old_content is None else old_content.splitlines(True)
+        new_lines = content.splitlines(True)
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        patch[rel_path] = [[i1, i2, new_lines[j1:j2]] for tag, i1, i2, j1, j2 in \
+                           matcher.get_opcodes() if tag != 'equal']
+    return patch
+
+def applyPatch(v0_tree, patch):
+    tree = collections.OrderedDict(v0_tree)
+    for rel_path, opcodes in patch.items():
+        if opcodes is None:
+            del tree[rel_path]
+            continue
+        lines = tree.get(rel_path, '').splitlines(True)
+        # from the end, so the V0 line numbers of the earlier opcodes still hold
+        for i1, i2, new_lines in reversed(opcodes):
+            lines[i1:i2] = new_lines
+        tree[rel_path] = ''.join(lines)
+    return tree
+
+def packConfig(programs_dir, pack_dir, bases_dir=None):
+    ''' Pack all the examples (<example>/0 and <example>/1) in @programs_dir into @pack_dir.
+    With @bases_dir, the V0 trees are stored there, so the packs given the same @bases_dir
+    share them.
+    '''
+    os.makedirs(pack_dir, exist_ok=True)
+    if bases_dir is None:
+        os.makedirs(pack_dir + '/' + BASES_DIR, exist_ok=True)
+    else:
+        os.makedirs(bases_dir, exist_ok=True)
+        os.symlink(os.path.relpath(bases_dir, pack_dir), pack_dir + '/' + BASES_DIR)
+    _examples_cache.pop(pack_dir, None)
+    examples = collections.OrderedDict([])
+    base_infos = {}
+    for example in sorted(os.listdir(programs_dir)):
+        v0_tree = readTree(programs_dir + '/' + example + '/0')
+        v1_tree = readTree(programs_dir + '/' + example + '/1')
+        v0_info = readTreeInfo(programs_dir + '/' + example + '/0')
+        v1_info = readTreeInfo(programs_dir + '/' + example + '/1')
+        base = hashTree(v0_tree)
+        base_file = pack_dir + '/' + BASES_DIR + '/' + base + '.json'
+        if base not in base_infos and os.path.isfile(base_file):
+            base_infos[base] = readBase(pack_dir, base)['info']
+        elif base not in base_infos:
+            # written aside, so a half-written base is never shared
+            with open(base_file + '.tmp-' + str(os.getpid()), 'w') as fw:
+                json.dump(collections.OrderedDict([('tree', v0_tree), ('info', v0_info)]), fw)
+            os.rename(base_file + '.tmp-' + str(os.getpid()), base_file)
+            base_infos[base] = v0_info
+        examples[example] = collections.OrderedDict([('base', base), \
+                                                     ('patch', diffTrees(v0_tree, v1_tree)), \
+                                                     ('info_delta', \
+                                                      diffTreeInfos(base_infos[base], v0_info)), \
+                                                     ('info_patch', \
+                                                      diffTreeInfos(v0_info, v1_info))])
+    with open(pack_dir + '/' + EXAMPLES_FILE + '.tmp', 'w') as fw:
+        json.dump(examples, fw)
+    # the examples file marks the pack as complete, write it last
+    os.rename(pack_dir + '/' + EXAMPLES_FILE + '.tmp', pack_dir + '/' + EXAMPLES_FILE)
+    return list(examples.keys())
+
+def isPacked(pack_dir):
+    return os.path.isfile(pack_dir + '/' + EXAMPLES_FILE)
+
+def loadExamples(pack_dir):
+    # read again once the config is packed again (by this or another process): the file
+    # written aside and renamed has a new inode, even within the mtime granularity
+    st = os.stat(pack_dir + '/' + EXAMPLES_FILE)
+    version = (st.st_ino, st.st_mtime_ns)
+    if pack_dir not in _examples_cache or _examples_cache[pack_dir][0] != version:
+        with open(pack_dir + '/' + EXAMPLES_FILE, 'r') as fr:
+            _examples_cache[pack_dir] = (version, json.load(fr, \
+                                         object_pairs_hook=collections.OrderedDict))
+    return _examples_cache[pack_dir][1]
+
+def listPackedExamples(pack_dir):
+    return list(loadExamples(pack_dir).keys())
+
+def readBase(pack_dir, base):
+    with open(pack_dir + '/' + BASES_DIR + '/' + base + '.json', 'r') as fr:
+        return json.load(fr, object_pairs_hook=collections.OrderedDict)
+
+def pruneBases(bases_dir, packs_dir):
+    ''' Remove the bases in @bases_dir that none of the packs in @packs_dir sharing it
+    uses (e.g. after a config was packed again), return how many.
+    '''
+    used_bases = set([])
+    for name in os.listdir(packs_dir):
+        pack_dir = packs_dir + '/' + name
+        if isPacked(pack_dir) and os.path.realpath(pack_dir + '/' + BASES_DIR) == \
+           os.path.realpath(bases_dir):
+            used_bases.update([entry['base'] for entry in loadExamples(pack_dir).values()])
+    num_of_bases = 0
+    for name in os.listdir(bases_dir):
+        # bases being written end with .tmp-<pid>
+        if name.endswith('.json') and name[:-len('.json')] not in used_bases:
+            os.remove(bases_dir + '/' + name)
+            num_of_bases += 1
+    return num_of_bases
+
+def readExampleTreeAndInfo(pack_dir, example, version):
+    entry = loadExamples(pack_dir)[example]
+    base = readBase(pack_dir, entry['base'])
+    tree = base['tree']
+    info = applyInfoPatch(base['info'], entry['info_delta'])
+    if version == '1':
+        tree = applyPatch(tree, entry['patch'])
+        info = applyInfoPatch(info, entry['info_patch'])
+    return tree, info
+
+def readExampleTree(pack_dir, example, version):
+    ''' {relative path: content} of V0 or V1 (@version '0' or '1') of a packed example.
+    '''
+    return readExampleTreeAndInfo(pack_dir, example, version)[0]
+
+def materializeExample(pack_dir, example, version, dest_dir):
+    ''' Write V0 or V1 (@version '0' or '1') of a packed example into @dest_dir, with its
+    dirs, modes and mtimes.
+    '''
+    tree, info = readExampleTreeAndInfo(pack_dir, example, version)
+    writeTree(tree, dest_dir, info)
@@ -0,0 +1,89 @@
+package org.rtstest.maven;
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.InputStreamReader;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+
+import javax.tools.DiagnosticCollector;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+
+/**
+ * Compiles many small maven projects in one JVM (one javax.tools
+ * compiler session), instead of one "mvn compile" per project.
+ *
+ * Reads project dirs from stdin, one per line. For each, compiles
+ * src/main/java into target/classes (as mvn compile does) and prints
+ * "VALID dir" or "INVALID dir"; diagnostics of invalid projects go to
+ * stderr, prefixed with the project dir.
+ *
+ * The classpath is only target/classes of the project, as the programs
+ * use no library; the arguments are passed on to javac, to give the
+ * same -source and -target as the maven build.
+ *
+ * Usage: java -cp rtstest-agent.jar org.rtstest.maven.BatchCompiler \
+ *            [javac options] < dirs
+ */
+public final class BatchCompiler {
+
+    public static void main(String[] args) throws Exception {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        StandardJavaFileManager fileManager = compiler.getStandardFileManager(null, null, null);
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, "UTF-8"));
+        for (String dir = in.readLine(); dir != null; dir = in.readLine()) {
+            if (dir.isEmpty()) {
+                continue;
+            }
+            boolean valid = compile(compiler, fileManager, dir, args);
+            System.out.println((valid ? "VALID " : "INVALID ") + dir);
+            System.out.flush();
+        }
+        fileManager.close();
+    }
+
+    private static boolean compile(JavaCompiler compiler, StandardJavaFileManager fileManager,
+                                   String dir, String[] javacOptions) {
+        List<File> sources = new ArrayList<File>();
+        listJavaFiles(new File(dir, "src/main/java"), sources);
+        File classesDir = new File(dir, "target/classes");
+        classesDir.mkdirs();
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<JavaFileObject>();
+        List<String> options = new ArrayList<String>(Arrays.asList("-nowarn", "-d", classesDir.getPath(),
+                "-classpath", classesDir.getPath(), "-sourcepath", new File(dir, "src/main/java").getPath()));
+        options.addAll(Arrays.asList(javacOptions));
+        boolean valid;
+        try {
+            valid = compiler.getTask(null, fileManager, diagnostics, options, null,
+                                     fileManager.getJavaFileObjectsFromFiles(sources)).call();
+        } catch (RuntimeException ex) {
+            // crash of the compiler on this program, the session can go on
+            System.err.println(dir + ": " + ex);
+            return false;
+        }
+        if (!valid) {
+            for (Object d : diagnostics.getDiagnostics()) {
+                System.err.println(dir + ": " + d);
+            }
+        }
+        return valid;
+    }
+
+    private static void listJavaFiles(File dir, List<File> files) {
+        File[] children = dir.listFiles();
+        if (children == null) {
+            return;
+        }
+        for (File child : children) {
+            if (child.isDirectory()) {
+                listJavaFiles(child, files);
+            } else if (child.getName().endsWith(".java")) {
+                files.add(child);
+            }
+        }
+    }
+}
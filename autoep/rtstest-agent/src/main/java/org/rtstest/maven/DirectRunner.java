@@ -0,0 +1,77 @@
+package org.rtstest.maven;
+
+import org.junit.runner.JUnitCore;
+import org.junit.runner.Request;
+import org.junit.runner.Result;
+
+/**
+ * Runs JUnit test classes in the current JVM, without Maven, and
+ * prints the same lines as surefire (plain reporter) does, so that
+ * logs of both runners can be parsed the same way.
+ *
+ * Usage: java -javaagent:rtstest-agent.jar -cp ... \
+ *            org.rtstest.maven.DirectRunner TestClass1 TestClass2 ...
+ */
+public final class DirectRunner {
+
+    private static final String SEPARATOR = "-------------------------------------------------------";
+
+    public static void main(String[] args) throws Exception {
+        run(ClassLoader.getSystemClassLoader(), args);
+        // objects collected by Monitor are printed by its shutdown hook
+    }
+
+    /**
+     * Runs the given test classes, loaded by the given class loader,
+     * and prints the surefire lines to System.out.
+     */
+    public static void run(ClassLoader loader, String[] classNames) throws Exception {
+        println(SEPARATOR);
+        println(" T E S T S");
+        println(SEPARATOR);
+        int run = 0;
+        int failures = 0;
+        int errors = 0;
+        int skipped = 0;
+        JUnitCore core = new JUnitCore();
+        for (String className : classNames) {
+            println("Running " + className);
+            Class<?> clz = Class.forName(className, true, loader);
+            long start = System.currentTimeMillis();
+            Result result = core.run(Request.aClass(clz));
+            double elapsed = (System.currentTimeMillis() - start) / 1000.0;
+            int classErrors = countErrors(result);
+            int classFailures = result.getFailureCount() - classErrors;
+            int classSkipped = result.getIgnoreCount();
+            println("Tests run: " + result.getRunCount() + ", Failures: " + classFailures +
+                    ", Errors: " + classErrors + ", Skipped: " + classSkipped +
+                    ", Time elapsed: " + elapsed + " sec" +
+                    (result.wasSuccessful() ? "" : " <<< FAILURE!") + " - in " + className);
+            run += result.getRunCount();
+            failures += classFailures;
+            errors += classErrors;
+            skipped += classSkipped;
+        }
+        println("");
+        println("Results :");
+        println("");
+        println("Tests run: " + run + ", Failures: " + failures + ", Errors: " + errors +
+                ", Skipped: " + skipped);
+        println("");
+    }
+
+    /** Surefire counts failed assertions as failures, and anything else as errors. */
+    private static int countErrors(Result result) {
+        int errors = 0;
+        for (org.junit.runner.notification.Failure failure : result.getFailures()) {
+            if (!(failure.getException() instanceof AssertionError)) {
+                errors++;
+            }
+        }
+        return errors;
+    }
+
+    private static void println(String s) {
+        System.out.println(s);
+    }
+}
@@ -41,6 +41,15 @@ public class Monitor {
         objects.add(new Test(extractTestName()));
     }
 
+    /**
+     * Prints the objects collected so far, as the shutdown hook
+     * would, and forgets them. Used by TestServer after each request.
+     */
+    public static void printAllAndClear() {
+        printAllObjects(objects);
+        objects.clear();
+    }
+
     private static String extractTestName() {
         StackTraceElement stackElements[] = Thread.currentThread().getStackTrace();
         for (StackTraceElement ste : stackElements) {
@@ -0,0 +1,144 @@
+package org.rtstest.maven;
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.net.InetAddress;
+import java.net.ServerSocket;
+import java.net.Socket;
+import java.net.SocketTimeoutException;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.util.ArrayList;
+import java.util.List;
+
+/**
+ * Long-lived JVM (started with the rtstest agent) that runs tests of
+ * many programs, to avoid paying for JVM startup and warm-up on each
+ * run.
+ *
+ * On startup, prints the port it listens on (localhost) as the first
+ * line. Each connection is one request:
+ *
+ *   line 1: classpath of the program (entries separated by ':')
+ *   line 2..: test class names
+ *   empty line
+ *
+ * The tests run in a fresh class loader (whose parent provides junit
+ * and the agent), and everything they print, the surefire lines of
+ * DirectRunner and the OBJECT/===== lines of Monitor, is written back
+ * to the connection, which is then closed. Requests are served one at
+ * a time.
+ *
+ * A request whose tests do not finish within the request timeout gets
+ * the TIMEOUT line as its last line, and the server exits, as the
+ * test thread cannot be stopped safely. The server also exits when no
+ * request comes within the idle timeout, and when its stdin is closed,
+ * i.e., when the process that started it is gone.
+ *
+ * Usage: java -javaagent:rtstest-agent.jar -cp junit.jar:hamcrest.jar \
+ *            org.rtstest.maven.TestServer [port [request timeout (s) [idle timeout (s)]]]
+ */
+public final class TestServer {
+
+    public static final String TIMEOUT = "TestServer: request timed out";
+
+    public static void main(String[] args) throws Exception {
+        int port = args.length > 0 ? Integer.parseInt(args[0]) : 0;
+        long requestTimeout = args.length > 1 ? Long.parseLong(args[1]) * 1000 : 600000;
+        int idleTimeout = args.length > 2 ? Integer.parseInt(args[2]) * 1000 : 600000;
+        ServerSocket server = new ServerSocket(port, 50, InetAddress.getLoopbackAddress());
+        server.setSoTimeout(idleTimeout);
+        exitOnStdinClosed();
+        System.out.println(server.getLocalPort());
+        System.out.flush();
+        PrintStream stdout = System.out;
+        while (true) {
+            Socket socket;
+            try {
+                socket = server.accept();
+            } catch (SocketTimeoutException ex) {
+                break;
+            }
+            boolean timedOut = false;
+            try {
+                timedOut = serve(socket, requestTimeout);
+            } catch (Exception ex) {
+                ex.printStackTrace();
+            } finally {
+                System.setOut(stdout);
+                socket.close();
+            }
+            if (timedOut) {
+                System.exit(1);
+            }
+        }
+        server.close();
+        System.exit(0);
+    }
+
+    private static void exitOnStdinClosed() {
+        Thread watcher = new Thread(new Runnable() {
+            public void run() {
+                try {
+                    while (System.in.read() != -1) {
+                    }
+                } catch (IOException ex) {
+                    // same as closed
+                }
+                System.exit(0);
+            }
+        }, "TestServer-stdin");
+        watcher.setDaemon(true);
+        watcher.start();
+    }
+
+    /** Returns true if the tests did not finish within the timeout (ms). */
+    private static boolean serve(Socket socket, long requestTimeout) throws Exception {
+        BufferedReader in = new BufferedReader(new InputStreamReader(socket.getInputStream(), "UTF-8"));
+        String classpath = in.readLine();
+        List<String> classNames = new ArrayList<String>();
+        for (String line = in.readLine(); line != null && !line.isEmpty(); line = in.readLine()) {
+            classNames.add(line);
+        }
+        final PrintStream out = new PrintStream(socket.getOutputStream(), true, "UTF-8");
+        System.setOut(out);
+        final URLClassLoader loader = new URLClassLoader(toURLs(classpath), TestServer.class.getClassLoader());
+        final String[] names = classNames.toArray(new String[0]);
+        Thread runner = new Thread(new Runnable() {
+            public void run() {
+                try {
+                    DirectRunner.run(loader, names);
+                } catch (Throwable ex) {
+                    ex.printStackTrace(out);
+                }
+            }
+        }, "TestServer-request");
+        runner.setDaemon(true);
+        runner.start();
+        runner.join(requestTimeout);
+        boolean timedOut = runner.isAlive();
+        // What the shutdown hook prints at the end of a forked run
+        Monitor.printAllAndClear();
+        if (timedOut) {
+            out.println(TIMEOUT);
+        }
+        out.flush();
+        if (!timedOut) {
+            loader.close();
+        }
+        return timedOut;
+    }
+
+    private static URL[] toURLs(String classpath) throws Exception {
+        List<URL> urls = new ArrayList<URL>();
+        for (String entry : classpath.split(File.pathSeparator)) {
+            if (!entry.isEmpty()) {
+                urls.add(new File(entry).toURI().toURL());
+            }
+        }
+        return urls.toArray(new URL[0]);
+    }
+}
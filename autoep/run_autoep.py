@@ -10,6 +10,18 @@ import argparse
 import datetime
 import collections
 import distutils.core
+import hashlib
+import filecmp
+import socket
+import codecs
+import atexit
+import multiprocessing
+from concurrent import futures
+
+from program_pack import packConfig, isPacked, listPackedExamples, materializeExample, \
+                         readExampleTree, readTree, pruneBases
+from equivalence import areEquivalent, appendToEquivalenceIndex
+from log_parser import parseLog
 
 ### Requires:
 ### 1. Install JDolly in the same dir as this script.
@@ -24,8 +36,52 @@ _RESULTS_DIR = SCRIPT_DIR + '/_results'
 POM_PATH = SCRIPT_DIR + '/configs/pom.xml'
 AGENT_PATH = SCRIPT_DIR + '/rtstest-agent/target/rtstest-agent-5.1.0.jar'
 GEN_PROGRAMS_DIR = SCRIPT_DIR + '/generated_programs'
+BASE_PROGRAMS_DIR = GEN_PROGRAMS_DIR + '/_base'
+# How program trees are copied: 'hardlink' (shares the files, rewritten files get a new
+# inode, see openForRewrite), 'reflink' (copy-on-write clones where the file system has
+# them) or 'copy'
+MATERIALIZE_MODE = 'hardlink'
+# <gen>-<evo> stored as V0 trees plus V1 patches (see program_pack.py)
+PACK_SUFFIX = '.pack'
+PACK_BASES_SUFFIX = '.bases' # <gen>.bases, V0 trees shared by the packs of <gen>
+# Program generation stages, run once per generation constraint (in @BASE_PROGRAMS_DIR/<gen>)
+# and once per configuration (in <gen>-<evo>); next to the output dir, <dir>.stages/ holds
+# the tree after each stage and the manifest of each complete stage (see runStage)
+BASE_STAGES = ['jdolly', 'public', 'compiled', 'randoop']
+CONFIG_STAGES = ['evolved', 'separated']
+STAGES_SUFFIX = '.stages'
+V0_SNAPSHOTS_DIR = _DOWNLOADS_DIR + '/_v0-snapshots'
+# In the results dir: examples whose V1 is the same program as V0, not run (read by
+# gen_tables.py)
+EQUIVALENCE_INDEX_NAME = 'v0-v1-same.txt'
+# In the results dir: examples whose RetestAll baseline ran no test on V1, on which the
+# other tools were not run (read by gen_tables.py)
+INVALID_EXAMPLES_NAME = 'invalid-examples.txt'
+RANDOOP_TIME_LIMIT = 10 # --timelimit of one Randoop run (s)
+RANDOOP_GRACE_TIME = 50 # after which a Randoop run is killed (s)
+RANDOOP_MEMORY_MB = 1024 # -Xmx of one Randoop run
+RANDOOP_OUTPUT_LIMIT = 50 # --outputlimit of one Randoop run
+# Randoop tests (after the assertion and agent rewriting) by classes and parameters
+RANDOOP_CACHE_DIR = SCRIPT_DIR + '/_randoop-cache'
+# Bump when convertTestAssertionsToPrintings or insertLoadingAgentinTests change
+TEST_REWRITING_VERSION = '1'
+# Compile outcomes (and classes) of programs, by sources, pom.xml and JDK (see
+# hashCompileInputs), kept across sweeps
+COMPILE_CACHE_DIR = SCRIPT_DIR + '/_compile-cache'
+# -source/-target of maven-compiler-plugin 3.1 (the default one of maven 3.3.9) when
+# configs/pom.xml sets none, also given to the builds with javac
+MAVEN_COMPILER_LEVEL = '1.5'
+_java_version = None # see getJavaVersion
 
 TOOLS = ['notool', 'clover', 'ekstazi', 'starts']
+# What a tool leaves in the program dir after a run, restored from V0 snapshots
+TOOL_STATE_PATHS = ['.ekstazi', '.clover', '.starts', 'jdeps-cache', 'target']
+# Artifact ids in the aggregator project of a batch (see runOneToolOnBatch)
+BATCH_ARTIFACT_ID = 'rtsgen-batch'
+MODULE_ARTIFACT_PREFIX = 'rtsgen-'
+# Clover's database is binary and records absolute source paths, so it cannot be moved to
+# the sandbox of another variant; Clover always runs V0 itself.
+V0_SNAPSHOT_TOOLS = ['notool', 'ekstazi', 'starts']
 
 GENERATION_CONSTRAINTS = ['default', 'pullupmethod', 'pushdownmethod', 'movemethod', \
                           'encapsulatefield', 'addparameter', 'pullupfield', 'renameclass', \
@@ -45,20 +101,245 @@ def parseArgs(argv):
     parser.add_argument('--gen-programs-for-one-config', \
                         help='Generate evolved programs for one configuration: [gen],[evo]', \
                         required=False)
+    parser.add_argument('--jdolly-jobs', help='Number of JDolly processes (one per ' + \
+                        'generation constraint) to run in parallel with --gen-programs ' + \
+                        'or --pipeline; one constraint is never split, so only runs of ' + \
+                        'several constraints get faster', \
+                        type=int, default=1, required=False)
+    parser.add_argument('--pack', help='Store each generated config as V0 trees plus V1 ' + \
+                        'patches (<gen>-<evo>.pack), materialized when the tools run', \
+                        action='store_true', required=False)
+    parser.add_argument('--stages', help='Comma-separated generation stages to run again ' + \
+                        'even if complete (' + ', '.join(BASE_STAGES + CONFIG_STAGES) + \
+                        '); the stages after them run again too', \
+                        default='', required=False)
     parser.add_argument('--run', help='Run All the RTS tools on all the generated programs', \
                         action='store_true', required=False)
+    parser.add_argument('--pipeline', help='Generate the programs and run all the RTS ' + \
+                        'tools on them in one streaming pass; the examples of a config ' + \
+                        'are run once the whole config is generated, while the next ' + \
+                        'configs are generated', \
+                        action='store_true', required=False)
+    parser.add_argument('--jobs', help='Number of (example, tool) jobs to run in parallel', \
+                        type=int, default=1, required=False)
+    parser.add_argument('--batch-size', help='With --run, run each tool once on up to ' + \
+                        'this many examples of a config, as modules of one maven project', \
+                        type=int, default=1, required=False)
+    parser.add_argument('--run-equivalent', help='Also run the examples whose V1 is the ' + \
+                        'same program as V0 (modulo whitespace and comments)', \
+                        action='store_true', required=False)
+    parser.add_argument('--no-early-abort', help='Run all the tools on an example even ' + \
+                        'if its RetestAll baseline runs no test on V1', \
+                        action='store_true', required=False)
+    parser.add_argument('--no-v0-cache', help='Run V0 of every evolved program, even if ' + \
+                        'another variant of the same base program already ran it', \
+                        action='store_true', required=False)
+    parser.add_argument('--notool-runner', help='Run RetestAll (notool) with mvn test, ' + \
+                        'directly with javac and JUnit, or on a warm TestServer JVM', \
+                        choices=['mvn', 'direct', 'server'], \
+                        default='mvn', required=False)
     if (len(argv) == 0):
         parser.print_help()
         exit(1)
     opts = parser.parse_args(argv)
+    opts.stages = [stage for stage in opts.stages.split(',') if stage]
+    for stage in opts.stages:
+        if stage not in BASE_STAGES + CONFIG_STAGES:
+            parser.error('unknown stage: ' + stage)
+    if opts.pipeline and opts.batch_size > 1:
+        # the pipeline runs the examples one by one as they are generated
+        parser.error('--batch-size is only supported with --run')
     return opts
 
+def linkOrCopy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # e.g. another file system
+        shutil.copy2(src, dst)
+
+def materializeTree(src_dir, dst_dir, ignore=None, mode=MATERIALIZE_MODE):
+    ''' Same as shutil.copytree, but unchanged files are not duplicated on disk (see
+    MATERIALIZE_MODE). Files of the new tree must only be changed with openForRewrite.
+    '''
+    if mode == 'reflink' and ignore is None:
+        sp = sub.run(['cp', '-a', '--reflink=always', src_dir, dst_dir], \
+                     stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
+        if sp.returncode == 0:
+            return
+        if os.path.isdir(dst_dir):
+            shutil.rmtree(dst_dir)
+        mode = 'hardlink'
+    if mode == 'copy':
+        shutil.copytree(src_dir, dst_dir, ignore=ignore)
+    else:
+        shutil.copytree(src_dir, dst_dir, ignore=ignore, copy_function=linkOrCopy)
+
+def openForRewrite(path):
+    ''' open(@path, 'w') for a file that may be shared with other trees (materializeTree):
+    the file gets its own inode first, so the other trees keep the old content.
+    '''
+    if os.path.exists(path) and os.stat(path).st_nlink > 1:
+        os.remove(path)
+    return open(path, 'w')
+
+def syncTree(src_dir, dst_dir):
+    ''' Make @dst_dir the same as @src_dir by writing, adding and removing only the files
+    that differ: the others keep their mtime, so maven recompiles only the changed classes.
+    '''
+    for dir_path, subpaths, files in os.walk(src_dir):
+        dst_path = os.path.join(dst_dir, os.path.relpath(dir_path, src_dir))
+        if os.path.isfile(dst_path):
+            # a file in @dst_dir, a dir in @src_dir
+            os.remove(dst_path)
+        os.makedirs(dst_path, exist_ok=True)
+        for f in files:
+            src_file = os.path.join(dir_path, f)
+            dst_file = os.path.join(dst_path, f)
+            if os.path.isdir(dst_file):
+                # a dir in @dst_dir, a file in @src_dir
+                shutil.rmtree(dst_file)
+            if os.path.isfile(dst_file) and filecmp.cmp(src_file, dst_file, shallow=False):
+                continue
+            if os.path.exists(dst_file):
+                # new inode, the file may be shared with other trees (materializeTree)
+                os.remove(dst_file)
+            # copyfile, not copy2: the file gets a new mtime, as after an edit
+            shutil.copyfile(src_file, dst_file)
+    for dir_path, subpaths, files in os.walk(dst_dir, topdown=False):
+        src_path = os.path.join(src_dir, os.path.relpath(dir_path, dst_dir))
+        for f in files:
+            if not os.path.isfile(os.path.join(src_path, f)):
+                os.remove(os.path.join(dir_path, f))
+        if not os.path.isdir(src_path):
+            os.rmdir(dir_path)
+
+def getStageDir(path, stage, stages):
+    ''' Tree of @path after @stage: a checkpoint in <path>.stages/, except after the last of
+    @stages, which is @path itself.
+    '''
+    if stage == stages[-1]:
+        return path
+    return path + STAGES_SUFFIX + '/' + stage
+
+def getStageManifestFile(path, stage):
+    return path + STAGES_SUFFIX + '/' + stage + '.txt'
+
+def readStageManifest(path, stage, stages):
+    ''' (time the stage completed, roots that went through it), None if not complete.
+    '''
+    manifest_file = getStageManifestFile(path, stage)
+    if not os.path.isfile(manifest_file):
+        return None
+    stage_dir = getStageDir(path, stage, stages)
+    fr = open(manifest_file, 'r')
+    # '#' lines are notes, see pruneStages
+    lines = [line.strip() for line in fr if line.strip() and not line.startswith('#')]
+    fr.close()
+    return float(lines[0]), [stage_dir + '/' + line for line in lines[1:]]
+
+def writeStageManifest(path, stage, stages, root_list):
+    ''' The manifest marks @stage as complete, it is written last.
+    '''
+    manifest_file = getStageManifestFile(path, stage)
+    stage_dir = getStageDir(path, stage, stages)
+    fw = open(manifest_file + '.tmp', 'w')
+    # the clock of this script, not the mtime, which some file systems round
+    fw.write(repr(time.time()) + '\n')
+    for root in root_list:
+        fw.write(os.path.relpath(root, stage_dir) + '\n')
+    fw.close()
+    os.rename(manifest_file + '.tmp', manifest_file)
+
+def getStageTime(path, stage, stages):
+    manifest = readStageManifest(path, stage, stages)
+    return 0 if manifest is None else manifest[0]
+
+def runStage(path, stage, stages, stage_function, input_dir=None, input_root_list=[], \
+             input_time=0, rerun_stages={}):
+    ''' Run one program generation stage of @path and return its roots. The stage works on
+    a copy of @input_dir (the tree after the stage before, None for the first stage), with
+    @input_root_list moved to the copy, and stage_function(stage_dir, root_list) returns
+    the roots that went through it. A stage that completed after its input (@input_time)
+    and after the time given by @rerun_stages (--stages) is not run again, so a crashed
+    generation resumes after its last complete stage.
+    '''
+    manifest = readStageManifest(path, stage, stages)
+    if manifest is not None and manifest[0] >= max(input_time, rerun_stages.get(stage, 0)):
+        print ('[AutoEP] ' + os.path.basename(path) + ' ' + stage + ' stage is complete')
+        return manifest[1]
+    print ('[AutoEP] ' + os.path.basename(path) + ' ' + stage + ' stage started at:' + \
+           str(datetime.datetime.now()))
+    os.makedirs(path + STAGES_SUFFIX, exist_ok=True)
+    if manifest is not None:
+        os.remove(getStageManifestFile(path, stage))
+    stage_dir = getStageDir(path, stage, stages)
+    if os.path.isdir(stage_dir):
+        shutil.rmtree(stage_dir)
+    if input_dir is None:
+        os.makedirs(stage_dir)
+        root_list = []
+    else:
+        materializeTree(input_dir, stage_dir)
+        root_list = [stage_dir + '/' + os.path.relpath(root, input_dir) \
+                     for root in input_root_list]
+    root_list = stage_function(stage_dir, root_list)
+    writeStageManifest(path, stage, stages, root_list)
+    return root_list
+
+def runStages(path, stages, stage_functions, input_dir=None, input_root_list=[], \
+              input_time=0, rerun_stages={}):
+    ''' Run @stages of @path one after the other (see runStage), return the roots of the
+    last one. The stages from the first one that is not complete are run; if the checkpoint
+    it starts from was pruned (see pruneStages), the stages before are run again too.
+    '''
+    first = len(stages)
+    stage_input_time = input_time
+    for i in range(len(stages)):
+        manifest = readStageManifest(path, stages[i], stages)
+        if manifest is None or \
+           manifest[0] < max(stage_input_time, rerun_stages.get(stages[i], 0)):
+            first = i
+            break
+        stage_input_time = manifest[0]
+    if first == len(stages):
+        print ('[AutoEP] ' + os.path.basename(path) + ' stages are complete')
+        return readStageManifest(path, stages[-1], stages)[1]
+    while first > 0 and not os.path.isdir(getStageDir(path, stages[first - 1], stages)):
+        first -= 1
+    root_list = input_root_list
+    if first > 0:
+        input_dir = getStageDir(path, stages[first - 1], stages)
+        input_time = getStageTime(path, stages[first - 1], stages)
+        root_list = readStageManifest(path, stages[first - 1], stages)[1]
+    for stage in stages[first:]:
+        # not complete any more, whatever its time
+        if os.path.isfile(getStageManifestFile(path, stage)):
+            os.remove(getStageManifestFile(path, stage))
+        root_list = runStage(path, stage, stages, stage_functions[stage], input_dir, \
+                             root_list, input_time, rerun_stages)
+        input_dir = getStageDir(path, stage, stages)
+        input_time = getStageTime(path, stage, stages)
+    return root_list
+
+def pruneStages(path, stages, pack_dir=None):
+    ''' Remove the checkpoints of @stages of @path, but the tree of the last stage, which
+    the manifests keep complete (see runStages). With @pack_dir, the tree of the last stage
+    was packed there (and removed), which its manifest records.
+    '''
+    for stage in stages[:-1]:
+        stage_dir = getStageDir(path, stage, stages)
+        if os.path.isdir(stage_dir):
+            shutil.rmtree(stage_dir)
+    if pack_dir is not None:
+        with open(getStageManifestFile(path, stages[-1]), 'a') as fw:
+            fw.write('# packed in ' + pack_dir + '\n')
+
 def genV0ProgramsWithJDolly(config_gen_path, constraints, jdolly_scope=[2,3,3,2], \
                             max_programs=2525, skip=25, jdolly_dir=JDOLLY_DIR):
     ''' Generate program using jdolly, output all the generated programs to @config_gen_path
     default scope: 2,3,3,2; default max-programs: 10000; default skip: 25
     '''
-    cwd = os.getcwd()
     if constraints == 'default':
         constraints_file = JDOLLY_DIR + '/alloyTheory/default.als'
         jdolly_scope = [2,3,3,2]
@@ -93,7 +374,6 @@ def genV0ProgramsWithJDolly(config_gen_path, constraints, jdolly_scope=[2,3,3,2]
     max_class = jdolly_scope[1]
     max_method = jdolly_scope[2]
     max_field = jdolly_scope[3]
-    os.chdir(jdolly_dir)
     jdolly_cmd = 'java -classpath ' \
     'lib/org.eclipse.equinox.common_3.2.0.v20060603.jar:' \
     'lib/ant.jar:' \
@@ -110,8 +390,40 @@ def genV0ProgramsWithJDolly(config_gen_path, constraints, jdolly_scope=[2,3,3,2]
     + ' -skip ' + str(skip) \
     + ' -addconstraints ' + constraints_file
     # print (jdolly_cmd)
-    sub.run(jdolly_cmd, shell=True, stdout=open(os.devnull, 'w'))
-    os.chdir(cwd)
+    sub.run(jdolly_cmd, shell=True, cwd=jdolly_dir, stdout=open(os.devnull, 'w'))
+
+def runJDollyStage(gen, stage_dir):
+    ''' Generate the programs of one generation constraint, return their roots.
+    '''
+    genV0ProgramsWithJDolly(stage_dir, constraints=gen)
+    print ('[AutoEP] ' + gen + ' Jdolly finished at:' + str(datetime.datetime.now()))
+    # Get the list of all the generated programs roots
+    root_set = set()
+    for dir_path,subpaths,files in os.walk(stage_dir, False):
+        for f in files:
+            root_set.add('/'.join(dir_path.split('/')[:-2]))
+    return sorted(list(root_set))
+
+def genJDollyProgramsForOneGen(gen, base_programs_dir=BASE_PROGRAMS_DIR, rerun_stages={}):
+    ''' JDolly stage of the base programs of one generation constraint, which
+    genBaseProgramsForOneGen picks up later.
+    '''
+    runStage(base_programs_dir + '/' + gen, 'jdolly', BASE_STAGES, \
+             lambda stage_dir, root_list: runJDollyStage(gen, stage_dir), \
+             rerun_stages=rerun_stages)
+    return gen
+
+def genJDollyProgramsForAllGens(gens=GENERATION_CONSTRAINTS, jobs=1, rerun_stages={}):
+    ''' Run JDolly for all the generation constraints, @jobs at a time. A constraint is one
+    JDolly process over its own Alloy enumeration and output dir, so the programs and their
+    numbering are the same as when they are generated one after the other. One constraint is
+    not split: -skip is a stride, not an offset, so slices would re-enumerate each other's
+    solutions and pick other programs.
+    '''
+    with futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        for gen in executor.map(genJDollyProgramsForOneGen, gens, \
+                                [BASE_PROGRAMS_DIR] * len(gens), [rerun_stages] * len(gens)):
+            print ('[AutoEP] ' + gen + ' Jdolly programs are ready')
 
 def postProcessAllToPublic(config_gen_path):
     ''' For each src file generated by jdolly, change all access modifiers to public
@@ -131,7 +443,7 @@ def postProcessAllToPublic(config_gen_path):
                                             .replace('long', 'public long') \
                                             .replace('int', 'public int')
                         lines[i] = re.sub(pattern, object_str, lines[i])
-                fw = open(os.path.join(dir_path, f), 'w')
+                fw = openForRewrite(os.path.join(dir_path, f))
                 fw.write("".join(lines))
                 fw.close()
 
@@ -165,16 +477,169 @@ def changeAllAutoExampleDirsToMavenProject(root_list, pom_path=POM_PATH):
         fw.write('0\n')
         fw.close()
 
-def compileAllPrograms(root_list):
+def getJavaVersion():
+    ''' Output of java -version, which is part of the compile cache keys.
+    '''
+    global _java_version
+    if _java_version is None:
+        try:
+            sp = sub.run(['java', '-version'], stdout=sub.PIPE, stderr=sub.STDOUT, \
+                         universal_newlines=True)
+            _java_version = sp.stdout
+        except OSError:
+            _java_version = ''
+    return _java_version
+
+def hashCompileInputs(prog_dir):
+    ''' Hash of everything the classes of a program depend on: src/main/java (insensitive
+    to line endings and to trailing whitespace, which do not change what javac produces),
+    pom.xml and the JDK.
+    '''
+    src_dir = prog_dir + '/src/main/java'
+    h = hashlib.sha1()
+    h.update(getJavaVersion().encode('utf-8') + b'\0')
+    if os.path.isfile(prog_dir + '/pom.xml'):
+        with open(prog_dir + '/pom.xml', 'rb') as fr:
+            h.update(fr.read())
+    h.update(b'\0')
+    for dir_path, subpaths, files in os.walk(src_dir):
+        subpaths.sort()
+        for f in sorted(files):
+            if not f.endswith('.java'):
+                continue
+            path = os.path.join(dir_path, f)
+            h.update(os.path.relpath(path, src_dir).encode('utf-8') + b'\0')
+            with open(path, 'rb') as fr:
+                for line in fr:
+                    h.update(line.rstrip() + b'\n')
+            h.update(b'\0')
+    return h.hexdigest()
+
+def lookupCompileCache(key, prog_dir, cache_dir=COMPILE_CACHE_DIR):
+    ''' Return True (and copy the classes to @prog_dir/target/classes) if the sources with
+    hash @key compiled before, False if they did not compile, None if never seen.
+    '''
+    entry_dir = cache_dir + '/' + key
+    if os.path.isfile(entry_dir + '/INVALID'):
+        return False
+    if not os.path.isdir(entry_dir + '/classes'):
+        return None
+    classes_dir = prog_dir + '/target/classes'
+    if os.path.isdir(classes_dir):
+        shutil.rmtree(classes_dir)
+    # copyfile, not copy2: the classes must be newer than the sources, or maven compiles
+    # them again
+    shutil.copytree(entry_dir + '/classes', classes_dir, copy_function=shutil.copyfile)
+    return True
+
+def storeCompileCache(key, prog_dir, valid, cache_dir=COMPILE_CACHE_DIR):
+    ''' Record the compile outcome of the sources with hash @key, and their classes.
+    '''
+    entry_dir = cache_dir + '/' + key
+    if os.path.isdir(entry_dir):
+        return
+    tmp_dir = entry_dir + '.tmp-' + str(os.getpid())
+    os.makedirs(tmp_dir)
+    if valid:
+        shutil.copytree(prog_dir + '/target/classes', tmp_dir + '/classes')
+    else:
+        open(tmp_dir + '/INVALID', 'w').close()
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another process stored the same entry first
+        shutil.rmtree(tmp_dir)
+
+def getCompilerOptions(pom_path=POM_PATH):
+    ''' -source and -target of the maven build of @pom_path, for the builds with javac.
+    '''
+    with open(pom_path, 'r') as fr:
+        pom = fr.read()
+    options = []
+    for option in ['source', 'target']:
+        m = re.search('<maven.compiler.' + option + '>\\s*([^<\\s]+)\\s*<', pom)
+        options += ['-' + option, m.group(1) if m else MAVEN_COMPILER_LEVEL]
+    return options
+
+def compileAllProgramsWithCache(root_list, batch=True, cache_dir=COMPILE_CACHE_DIR, \
+                                log_file=None):
+    ''' Same as compileAllPrograms, only the programs whose sources were never compiled
+    before are compiled.
+    '''
+    keys = {}
+    not_cached_root_list = []
+    for root in root_list:
+        keys[root] = hashCompileInputs(root + '/0')
+        valid = lookupCompileCache(keys[root], root + '/0', cache_dir)
+        if valid is None:
+            not_cached_root_list.append(root)
+        elif not valid:
+            # Delete invalid programs
+            shutil.rmtree(root)
+    print ('[AutoEP]: Compiling ' + str(len(not_cached_root_list)) + ' programs, ' + \
+           str(len(root_list) - len(not_cached_root_list)) + ' found in the compile cache')
+    compiled_root_list = compileAllPrograms(not_cached_root_list, batch, cache_dir=None, \
+                                            log_file=log_file)
+    for root in not_cached_root_list:
+        storeCompileCache(keys[root], root + '/0', root in compiled_root_list, cache_dir)
+    # keep the order of @root_list
+    return [root for root in root_list if os.path.isdir(root)]
+
+def compileAllProgramsInOneBatch(root_list, agent_path=AGENT_PATH, log_file=None):
+    ''' Same as compileAllPrograms, but all the programs are compiled in a single JVM by
+    BatchCompiler (in the agent jar), which reports VALID/INVALID for each root, with the
+    same -source and -target as mvn compile (all the roots share configs/pom.xml).
+    The diagnostics, the only record of why a program was deleted, go to @log_file.
+    '''
+    if len(root_list) == 0:
+        return []
+    request = ''.join([root + '/0' + '\n' for root in root_list])
+    log = None if log_file is None else open(log_file, 'a')
+    try:
+        sp = sub.run(['java', '-cp', agent_path, 'org.rtstest.maven.BatchCompiler'] + \
+                     getCompilerOptions(), input=request, stdout=sub.PIPE, stderr=log, \
+                     universal_newlines=True)
+    finally:
+        if log is not None:
+            log.close()
+    prog_dir_validity = {}
+    for line in sp.stdout.splitlines():
+        validity, prog_dir = line.split(' ', 1)
+        prog_dir_validity[prog_dir] = validity == 'VALID'
+    valid_root_list = []
+    not_reached_root_list = []
+    for root in root_list:
+        if root + '/0' not in prog_dir_validity:
+            not_reached_root_list.append(root)
+        elif prog_dir_validity[root + '/0']:
+            valid_root_list.append(root)
+        else:
+            # Delete invalid programs
+            shutil.rmtree(root)
+    if len(not_reached_root_list) > 0:
+        # BatchCompiler crashed (or is missing), the rest goes through maven
+        print ('[AutoEP]: BatchCompiler did not finish, compiling ' + \
+               str(len(not_reached_root_list)) + ' programs with mvn')
+        valid_root_list += compileAllPrograms(not_reached_root_list, batch=False, \
+                                              cache_dir=None, log_file=log_file)
+    return valid_root_list
+
+def compileAllPrograms(root_list, batch=True, cache_dir=COMPILE_CACHE_DIR, log_file=None):
     ''' Compile all the programs generated by jdolly, return the list of all the compilable 
-    programs.
+    programs. The compiler output goes to @log_file (appended), if given.
     '''            
+    if cache_dir is not None:
+        return compileAllProgramsWithCache(root_list, batch, cache_dir, log_file)
+    if batch:
+        return compileAllProgramsInOneBatch(root_list, log_file=log_file)
     valid_root_list = []
     cwd = os.getcwd()
     for root in root_list:
         os.chdir(root + '/0')
         # Log compilation at the same time
-        sp = sub.run('mvn compile', shell=True, stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
+        log = open(os.devnull if log_file is None else log_file, 'a')
+        sp = sub.run('mvn compile', shell=True, stdout=log, stderr=sub.STDOUT)
+        log.close()
         if sp.returncode == 0:
             os.chdir(cwd)
             valid_root_list.append(root)
@@ -185,11 +650,10 @@ def compileAllPrograms(root_list):
             #pass
     return valid_root_list
 
-def genTestsWithRandoop(valid_root_list, test_method_max_size, test_method_num_limit=50, \
-                        remove_test_suite=True, libs_dir=LIBS_DIR):
-    ''' Generate tests using randoop, output into the same directory as src files
+def genClassLists(valid_root_list):
+    ''' Write classlist.txt (all the ClassId classes) of each root, used by Randoop and
+    by some evolutions.
     '''
-    # Generate classlist.txt for randoop
     for root in valid_root_list:
         fw = open(root + '/0/classlist.txt', 'w')
         for dir_path, subpaths, files in os.walk(root + '/0', False):
@@ -199,33 +663,154 @@ def genTestsWithRandoop(valid_root_list, test_method_max_size, test_method_num_l
                     class_name = f.replace('.java', '')
                     fw.write(package_name + '.' + class_name + '\n')
         fw.close()
+
+def hashRandoopInputs(root, test_method_max_sizes, test_method_num_limit=RANDOOP_OUTPUT_LIMIT):
+    ''' Hash of everything the (rewritten) Randoop tests of a root depend on: its compiled
+    classes and the Randoop parameters.
+    '''
+    classes_dir = root + '/0/target/classes'
+    h = hashlib.sha1()
+    h.update(('maxsizes=' + ','.join([str(size) for size in test_method_max_sizes]) + \
+              ' outputlimit=' + str(test_method_num_limit) + \
+              ' timelimit=' + str(RANDOOP_TIME_LIMIT) + \
+              ' testsperfile=1 basename=TestGroup<maxsize>Case' + \
+              ' rewriting=' + TEST_REWRITING_VERSION + '\0').encode('utf-8'))
+    for dir_path, subpaths, files in os.walk(classes_dir):
+        subpaths.sort()
+        for f in sorted(files):
+            path = os.path.join(dir_path, f)
+            h.update(os.path.relpath(path, classes_dir).encode('utf-8') + b'\0')
+            with open(path, 'rb') as fr:
+                h.update(fr.read())
+            h.update(b'\0')
+    return h.hexdigest()
+
+def restoreRandoopTests(key, root, cache_dir=RANDOOP_CACHE_DIR):
+    ''' Copy the cached tests with @key into @root, return False if not cached.
+    '''
+    entry_dir = cache_dir + '/' + key
+    if not os.path.isdir(entry_dir):
+        return False
+    tests_dir = root + '/0/src/test/java/Package_0'
+    if os.path.isdir(tests_dir):
+        shutil.rmtree(tests_dir)
+    shutil.copytree(entry_dir + '/Package_0', tests_dir)
+    return True
+
+def storeRandoopTests(key, root, cache_dir=RANDOOP_CACHE_DIR):
+    entry_dir = cache_dir + '/' + key
+    if os.path.isdir(entry_dir):
+        return
+    tmp_dir = entry_dir + '.tmp-' + str(os.getpid())
+    os.makedirs(tmp_dir)
+    shutil.copytree(root + '/0/src/test/java/Package_0', tmp_dir + '/Package_0')
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another process stored the same entry first
+        shutil.rmtree(tmp_dir)
+
+def getRandoopWorkers(memory_per_worker_mb=RANDOOP_MEMORY_MB):
+    ''' As many Randoop processes as there are cores, as long as they fit in the memory.
+    '''
+    workers = os.cpu_count() or 1
+    try:
+        with open('/proc/meminfo', 'r') as fr:
+            for line in fr:
+                if line.startswith('MemAvailable:'):
+                    available_mb = int(line.split()[1]) // 1024
+                    workers = min(workers, available_mb // memory_per_worker_mb)
+    except IOError:
+        pass
+    return max(1, workers)
+
+def countGeneratedTests(root):
+    tests_dir = root + '/0/src/test/java/Package_0'
+    num_of_tests = 0
+    if not os.path.isdir(tests_dir):
+        return num_of_tests
+    for f in os.listdir(tests_dir):
+        with open(tests_dir + '/' + f, 'r') as fr:
+            num_of_tests += sum(1 for line in fr if line.strip() == '@Test')
+    return num_of_tests
+
+def runRandoopOnOneProgram(root, test_method_max_size, test_method_num_limit, deadline, \
+                           remove_test_suite=True, libs_dir=LIBS_DIR):
+    ''' Run Randoop on one valid root, unless the global @deadline passed; return the number
+    of tests generated, None if Randoop was not run or did not finish.
+    '''
+    if deadline is not None and time.time() >= deadline:
+        return None
+    randoop_jar = libs_dir + '/randoop-all-3.1.5.jar'
+    junit_jar = libs_dir + '/junit-4.12.jar'
+    hamcrest_jar = libs_dir + '/hamcrest-core-1.3.jar'
+    class_list_path = root + '/0/classlist.txt'
+    package_name = 'Package_0'
+    output_dir = root + '/0/src/test/java'
+    randoop_cmd = ['java', '-ea', '-Xmx' + str(RANDOOP_MEMORY_MB) + 'm', '-classpath', \
+                   randoop_jar + ':' + junit_jar + ':' + hamcrest_jar + ':' + \
+                   root + '/0/target/classes', \
+                   'randoop.main.Main', 'gentests', \
+                   '--classlist=' + class_list_path, \
+                   '--junit-package-name=' + package_name, \
+                   '--outputlimit=' + str(test_method_num_limit), \
+                   '--timelimit=' + str(RANDOOP_TIME_LIMIT), \
+                   '--maxsize=' + str(test_method_max_size), \
+                   '--junit-output-dir=' + output_dir, \
+                   '--regression-test-basename=TestGroup' + str(test_method_max_size) + 'Case', \
+                   '--testsperfile=1']
+    try:
+        sp = sub.run(randoop_cmd, stdout=open(os.devnull, 'w'), stderr=sub.STDOUT, \
+                     timeout=RANDOOP_TIME_LIMIT + RANDOOP_GRACE_TIME)
+    except sub.TimeoutExpired:
+        return None
+    if sp.returncode != 0:
+        return None
+    if remove_test_suite and os.path.isdir(output_dir + '/' + package_name):
+        removeTestSuite(root)
+    return countGeneratedTests(root)
+
+def genTestsWithRandoop(valid_root_list, test_method_max_size, \
+                        test_method_num_limit=RANDOOP_OUTPUT_LIMIT, \
+                        remove_test_suite=True, libs_dir=LIBS_DIR, workers=None, \
+                        time_budget=None, on_finish=None):
+    ''' Generate tests using randoop, output into the same directory as src files
+    Randoop runs on @workers programs at a time (by default as many as cores and memory
+    allow), within @time_budget seconds overall if given. Programs whose run failed, timed
+    out, or never started get one more run (in the pool too) if the budget allows, and an
+    empty test package otherwise; a run that generated no test is not run again.
+    @on_finish(root) is called as soon as the run of a root generated tests.
+    Return {root: number of generated tests}.
+    '''
+    # Generate classlist.txt for randoop
+    genClassLists(valid_root_list)
     # Run randoop
-    randoop_jar = LIBS_DIR + '/randoop-all-3.1.5.jar'
-    junit_jar = LIBS_DIR + '/junit-4.12.jar'
-    hamcrest_jar = LIBS_DIR + '/hamcrest-core-1.3.jar'
+    if workers is None:
+        workers = getRandoopWorkers()
+    deadline = None if time_budget is None else time.time() + time_budget
+    print ('[AutoEP]: Running Randoop on ' + str(len(valid_root_list)) + ' programs with ' + \
+           str(workers) + ' workers')
+    num_of_tests = collections.OrderedDict([(root, None) for root in valid_root_list])
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        # Fallback: the second round retries the runs that did not finish, once
+        for attempt in range(2):
+            pending = {}
+            for root in valid_root_list:
+                if num_of_tests[root] is None:
+                    pending[executor.submit(runRandoopOnOneProgram, root, \
+                                            test_method_max_size, test_method_num_limit, \
+                                            deadline, remove_test_suite, libs_dir)] = root
+            for future in futures.as_completed(pending):
+                root = pending[future]
+                num_of_tests[root] = future.result()
+                if on_finish is not None and num_of_tests[root]:
+                    on_finish(root)
     for root in valid_root_list:
-        program_id = root.split('/')[-3]
-        class_list_path = root + '/0/classlist.txt'
-        package_name = 'Package_0'
-        output_dir = root + '/0/src/test/java'
-        randoop_cmd = 'java -ea -classpath ' \
-                      + randoop_jar + ':' \
-                      + junit_jar + ':' \
-                      + hamcrest_jar + ':' \
-                      + root + '/0/target/classes' + ' randoop.main.Main gentests' \
-                      + ' --classlist=' + class_list_path \
-                      + ' --junit-package-name=' + package_name \
-                      + ' --outputlimit=' + str(test_method_num_limit) \
-                      + ' --timelimit=10' \
-                      + ' --maxsize=' + str(test_method_max_size) \
-                      + ' --junit-output-dir=' + output_dir \
-                      + ' --regression-test-basename=TestGroup' \
-                      + str(test_method_max_size) + 'Case' \
-                      + ' --testsperfile=1'
-        sub.run(randoop_cmd, shell=True, stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
-        if remove_test_suite:
-            removeTestSuite(root)
-    return
+        # later stages expect the test package, even if empty
+        os.makedirs(root + '/0/src/test/java/Package_0', exist_ok=True)
+        if num_of_tests[root] is None:
+            num_of_tests[root] = countGeneratedTests(root)
+    return num_of_tests
 
 def removeTestSuite(root):
     tests_dir = root + '/0/src/test/java/Package_0'
@@ -351,7 +936,7 @@ def evolveIncreasingConstantsByOne(version_0_path):
     for f in places_dict:
         for i in places_dict[f]:
             version_id += 1
-            shutil.copytree(version_0_path, root + '/' + str(version_id))
+            materializeTree(version_0_path, root + '/' + str(version_id))
             fnew = f.replace(version_0_path, root + '/' + str(version_id))
             fr = open(fnew, 'r')
             lines = fr.readlines()
@@ -370,7 +955,7 @@ def evolveIncreasingConstantsByOne(version_0_path):
                 updated_constant = constant + 1
                 lines[i] = lines[i].replace('=' + str(constant) + ';', \
                                             '=' + str(updated_constant) + ';')
-            fw = open(fnew, 'w')
+            fw = openForRewrite(fnew)
             fw.write(''.join(lines))
             fw.close()
     if version_id == 0:
@@ -397,12 +982,12 @@ def evolveRemovingExtends(version_0_path):
     for f in extends_dict:
         for i in extends_dict[f]:
             version_id += 1
-            shutil.copytree(version_0_path, root + '/' + str(version_id))
+            materializeTree(version_0_path, root + '/' + str(version_id))
             fnew = f.replace(version_0_path, root + '/' + str(version_id))
             fr = open(fnew, 'r')
             lines = fr.readlines()
             fr.close()
-            fw = open(fnew, 'w')
+            fw = openForRewrite(fnew)
             pattern = re.compile(' extends \S+ {')
             lines[i] = re.sub(pattern, ' {', lines[i])
             fw.write(''.join(lines))
@@ -441,12 +1026,12 @@ def evolveAddingExtends(version_0_path):
         for i in places_dict[f]:
             for c in class_list:
                 version_id += 1
-                shutil.copytree(version_0_path, root + '/' + str(version_id))
+                materializeTree(version_0_path, root + '/' + str(version_id))
                 fnew = f.replace(version_0_path, root + '/' + str(version_id))
                 fr = open(fnew, 'r')
                 lines = fr.readlines()
                 fr.close()
-                fw = open(fnew, 'w')
+                fw = openForRewrite(fnew)
                 pattern = re.compile('public class ClassId_[0-9]+ {')
                 object_str = re.search(pattern, lines[i]).group(0) \
                                                          .replace(' {', ' extends ' + c + ' {')
@@ -468,9 +1053,9 @@ def evolveToNextProgramInNumberOrder(version_0_path):
     next_number = number_list[next_number_index]
     #print (root, next_number)
     version_1_path = '/'.join(version_0_path.split('/')[:-1]) + '/1'
-    shutil.copytree(version_0_path, version_1_path)
+    materializeTree(version_0_path, version_1_path)
     shutil.rmtree(version_1_path + '/src/main')
-    shutil.copytree('/'.join(version_0_path.split('/')[:-2]) \
+    materializeTree('/'.join(version_0_path.split('/')[:-2]) \
                     + '/test' + str(next_number) + '/0/src/main', \
                     '/'.join(version_0_path.split('/')[:-1]) + '/1/src/main')
 
@@ -497,12 +1082,12 @@ def evolveRemovingMethod(version_0_path):
     for f in places_dict:
         for i in places_dict[f]:
             version_id += 1
-            shutil.copytree(version_0_path, root + '/' + str(version_id))
+            materializeTree(version_0_path, root + '/' + str(version_id))
             fnew = f.replace(version_0_path, root + '/' + str(version_id))
             fr = open(fnew, 'r')
             lines = fr.readlines()
             fr.close()
-            fw = open(fnew, 'w')
+            fw = openForRewrite(fnew)
             for j in range(i, len(lines)):
                 if lines[j].strip() == '}':
                     lines[j] = ''
@@ -542,7 +1127,7 @@ def evolveCopyingMethod(version_0_path):
                 if fdest == f:
                     continue
                 version_id += 1
-                shutil.copytree(version_0_path, root + '/' + str(version_id))
+                materializeTree(version_0_path, root + '/' + str(version_id))
                 fr = open(f, 'r')
                 lines = fr.readlines()
                 fr.close()
@@ -557,7 +1142,7 @@ def evolveCopyingMethod(version_0_path):
                     if class_def_pattern.search(destlines[k].strip()):
                         break
                 destlines[k+1 : k+1] = lines[i : j+1]
-                fwdest = open(fdest, 'w')
+                fwdest = openForRewrite(fdest)
                 fwdest.write(''.join(destlines))
                 fwdest.close()
     if version_id == 0:
@@ -594,7 +1179,7 @@ def evolveCopyingMethodAndReplaceConstants(version_0_path):
                 if fdest == f:
                     continue
                 version_id += 1
-                shutil.copytree(version_0_path, root + '/' + str(version_id))
+                materializeTree(version_0_path, root + '/' + str(version_id))
                 fr = open(f, 'r')
                 lines = fr.readlines()
                 fr.close()
@@ -620,7 +1205,7 @@ def evolveCopyingMethodAndReplaceConstants(version_0_path):
                         lines[l] = lines[l].replace('(' + str(constant) + ')', \
                                                     '(' + str(updated_constant) + ')')
                 destlines[k+1 : k+1] = lines[i : j+1]
-                fwdest = open(fdest, 'w')
+                fwdest = openForRewrite(fdest)
                 fwdest.write(''.join(destlines))
                 fwdest.close()
     if version_id == 0:
@@ -655,7 +1240,7 @@ def evolveCopyingField(version_0_path):
                 if fdest == f:
                     continue
                 version_id += 1
-                shutil.copytree(version_0_path, root + '/' + str(version_id))
+                materializeTree(version_0_path, root + '/' + str(version_id))
                 fr = open(f, 'r')
                 lines = fr.readlines()
                 fr.close()
@@ -667,7 +1252,7 @@ def evolveCopyingField(version_0_path):
                     if class_def_pattern.search(destlines[k].strip()):
                         break
                 destlines[k+1 : k+1] = lines[i]
-                fwdest = open(fdest, 'w')
+                fwdest = openForRewrite(fdest)
                 fwdest.write(''.join(destlines))
                 fwdest.close()
     if version_id == 0:
@@ -702,7 +1287,7 @@ def evolveCopyingFieldAndReplace(version_0_path):
                 if fdest == f:
                     continue
                 version_id += 1
-                shutil.copytree(version_0_path, root + '/' + str(version_id))
+                materializeTree(version_0_path, root + '/' + str(version_id))
                 fr = open(f, 'r')
                 lines = fr.readlines()
                 fr.close()
@@ -719,7 +1304,7 @@ def evolveCopyingFieldAndReplace(version_0_path):
                     if class_def_pattern.search(destlines[k].strip()):
                         break
                 destlines[k+1 : k+1] = lines[i]
-                fwdest = open(fdest, 'w')
+                fwdest = openForRewrite(fdest)
                 fwdest.write(''.join(destlines))
                 fwdest.close()
     if version_id == 0:
@@ -739,8 +1324,8 @@ def separateEvolvedPrograms(valid_root_list):
             if i > 1:
                 dest_root = root + '-' + str(i)
                 os.makedirs(dest_root)
-                shutil.copytree(root + '/0', dest_root + '/0')
-                shutil.copytree(root + '/' + str(i), dest_root + '/1')
+                materializeTree(root + '/0', dest_root + '/0')
+                materializeTree(root + '/' + str(i), dest_root + '/1')
                 shutil.rmtree(root + '/' + str(i))
         shutil.move(root, root + '-1')
     evolved_valid_root_list = []
@@ -749,69 +1334,149 @@ def separateEvolvedPrograms(valid_root_list):
     os.chdir(cwd)
     return evolved_valid_root_list
 
-def genEvolvingProgramsForOneConfig(gen, evo, jdolly_gen_dir=GEN_PROGRAMS_DIR):
-    gen_start_time = time.time()
-    print ('[AutoEP] ' + gen + '-' + evo + ' started at:' + str(datetime.datetime.now()))
-    # Clean existing directory
-    config_gen_path = jdolly_gen_dir + '/' + gen + '-' + evo
-    if os.path.isdir(config_gen_path):
-        shutil.rmtree(config_gen_path)
-    sub.run('mkdir -p ' + config_gen_path, shell=True)
-    # Generate programs using Jdolly
-    jdolly_start_time = time.time()
-    genV0ProgramsWithJDolly(config_gen_path, constraints=gen)
-    jdolly_end_time = time.time()
-    jdolly_exec_time = jdolly_end_time - jdolly_start_time
-    print('[AutoEP] ' + gen + '-' + evo + ' Jdolly finished at:' + str(datetime.datetime.now()))
-    # Get the list of all the generated programs roots
-    root_set = set()
-    for dir_path,subpaths,files in os.walk(config_gen_path, False):
-        for f in files:
-            root_set.add('/'.join(dir_path.split('/')[:-2]))
-    root_list = sorted(list(root_set))
+def writeRandoopSummary(num_of_tests, base_gen_path, test_method_max_size):
+    ''' Save the number of tests Randoop generated for each program, print the totals.
+    '''
+    summary_file = base_gen_path + '/RANDOOP_TESTS_' + str(test_method_max_size)
+    fw = open(summary_file, 'w')
+    for root, num in num_of_tests.items():
+        fw.write(os.path.relpath(root, base_gen_path) + ' ' + str(num) + '\n')
+    fw.close()
+    nums = list(num_of_tests.values())
+    print ('[AutoEP]: Randoop generated ' + str(sum(nums)) + ' tests for ' + \
+           str(len(nums)) + ' programs (' + str(nums.count(0)) + ' without tests), ' + \
+           'see ' + summary_file)
+
+def runPublicStage(stage_dir, root_list):
     # Post-process all the generated programs, change all the access to public
-    postProcessAllToPublic(config_gen_path)
+    postProcessAllToPublic(stage_dir)
     # Change all the directory structures to maven projects
     changeAllAutoExampleDirsToMavenProject(root_list)
-    # Compile all the generated programs, only keep those can compile
-    compile_start_time = time.time()
-    valid_root_list = compileAllPrograms(root_list)
-    compile_end_time = time.time()
-    compile_exec_time = compile_end_time - compile_start_time
-    print('[AutoEP] ' + gen + '-' + evo + ' compile finished at:' + str(datetime.datetime.now()))
+    return root_list
+
+def runCompiledStage(gen, stage_dir, root_list):
+    # Compile all the generated programs, only keep those can compile; <gen>.stages/
+    # compiled.log tells why the others were deleted
+    if os.path.isfile(stage_dir + '.log'):
+        os.remove(stage_dir + '.log')
+    valid_root_list = compileAllPrograms(root_list, log_file=stage_dir + '.log')
+    print('[AutoEP] ' + gen + ' compile finished at:' + str(datetime.datetime.now()))
+    return valid_root_list
+
+def runRandoopStage(gen, stage_dir, valid_root_list):
     # Use Randoop to generate regression tests
-    randoop_start_time = time.time()
     #for test_method_max_size in [1, 2, 4, 100]: !!!
-    for test_method_max_size in [4]:
+    test_method_max_sizes = [4]
+    # Programs whose classes were seen before get their (rewritten) tests from the cache
+    randoop_keys = {}
+    cached_root_list = []
+    not_cached_root_list = []
+    for root in valid_root_list:
+        randoop_keys[root] = hashRandoopInputs(root, test_method_max_sizes)
+        if restoreRandoopTests(randoop_keys[root], root):
+            cached_root_list.append(root)
+        else:
+            not_cached_root_list.append(root)
+    genClassLists(cached_root_list)
+    print ('[AutoEP] ' + gen + ' Randoop tests of ' + str(len(cached_root_list)) + \
+           ' programs found in the cache')
+    finished_root_list = []
+    def finishRandoopTests(root):
+        # cached at once, so if the stage is killed, it resumes with the programs left
+        convertTestAssertionsToPrintings([root])
+        insertLoadingAgentinTests([root])
+        storeRandoopTests(randoop_keys[root], root)
+        finished_root_list.append(root)
+    for test_method_max_size in test_method_max_sizes:
         # limit maxsize and limit test class
-        genTestsWithRandoop(valid_root_list, test_method_max_size)
-    randoop_end_time = time.time()
-    randoop_exec_time = randoop_end_time - randoop_start_time
-    print('[AutoEP] ' + gen + '-' + evo + ' Randoop finished at:' + str(datetime.datetime.now()))
+        last_run = test_method_max_size == test_method_max_sizes[-1]
+        generated = genTestsWithRandoop(not_cached_root_list, test_method_max_size, \
+                                        on_finish=finishRandoopTests if last_run else None)
+        num_of_tests = collections.OrderedDict([])
+        for root in valid_root_list:
+            num_of_tests[root] = generated[root] if root in generated else \
+                                 countGeneratedTests(root)
+        writeRandoopSummary(num_of_tests, stage_dir, test_method_max_size)
+    print('[AutoEP] ' + gen + ' Randoop finished at:' + str(datetime.datetime.now()))
+    not_finished_root_list = [root for root in not_cached_root_list \
+                              if root not in finished_root_list]
     # Convert assertions to printings
-    convertTestAssertionsToPrintings(valid_root_list)
+    convertTestAssertionsToPrintings(not_finished_root_list)
     # Insert loading agent in tests
-    insertLoadingAgentinTests(valid_root_list)
+    insertLoadingAgentinTests(not_finished_root_list)
+    for root in not_finished_root_list:
+        # a failed Randoop run is not an outcome to remember
+        if countGeneratedTests(root) > 0:
+            storeRandoopTests(randoop_keys[root], root)
     # Clean the generated maven directories
     cleanAutoGenMvenProjects(valid_root_list)
-    # Evolve programs
-    valid_root_list = genEvolvedPrograms(valid_root_list, evo)
-    print('[AutoEP] ' + gen + '-' + evo + ' Evolution finished at:' + str(datetime.datetime.now()))
-    # Put each evolved program in a separate root dir
-    evolved_valid_root_list = separateEvolvedPrograms(valid_root_list)
+    return valid_root_list
+
+def genBaseProgramsForOneGen(gen, base_programs_dir=BASE_PROGRAMS_DIR, rerun_stages={}):
+    ''' Base program stages: generate the V0 programs of one generation constraint with JDolly,
+    make them public maven projects, keep the compilable ones and generate their Randoop tests.
+    None of this depends on the evolution, so it is computed once per constraint and kept in
+    @base_programs_dir/<gen>; return the path of the base programs and their roots.
+    '''
+    base_gen_path = base_programs_dir + '/' + gen
+    stage_functions = {'jdolly': lambda stage_dir, root_list: runJDollyStage(gen, stage_dir), \
+                       'public': runPublicStage, \
+                       'compiled': lambda stage_dir, root_list: \
+                                   runCompiledStage(gen, stage_dir, root_list), \
+                       'randoop': lambda stage_dir, root_list: \
+                                  runRandoopStage(gen, stage_dir, root_list)}
+    valid_root_list = runStages(base_gen_path, BASE_STAGES, stage_functions, \
+                                rerun_stages=rerun_stages)
+    print ('[AutoEP] ' + gen + ' number of base programs:' + str(len(valid_root_list)))
+    return base_gen_path, valid_root_list
+
+def genEvolvingProgramsForOneConfig(gen, evo, jdolly_gen_dir=GEN_PROGRAMS_DIR, pack=False, \
+                                    rerun_stages={}):
+    print ('[AutoEP] ' + gen + '-' + evo + ' started at:' + str(datetime.datetime.now()))
+    # Base programs are shared by all the evolutions of the same generation constraint
+    base_gen_path, valid_root_list = genBaseProgramsForOneGen(gen, rerun_stages=rerun_stages)
+    config_gen_path = jdolly_gen_dir + '/' + gen + '-' + evo
+    stage_functions = {'evolved': lambda stage_dir, root_list: \
+                                  genEvolvedPrograms(root_list, evo), \
+                       'separated': lambda stage_dir, root_list: \
+                                    separateEvolvedPrograms(root_list)}
+    # Evolve programs, then put each evolved program in a separate root dir
+    evolved_valid_root_list = runStages(config_gen_path, CONFIG_STAGES, stage_functions, \
+                                        base_gen_path, valid_root_list, \
+                                        getStageTime(base_gen_path, BASE_STAGES[-1], \
+                                                     BASE_STAGES), \
+                                        rerun_stages)
     print('[AutoEP] number of evolved programs:' + str(len(evolved_valid_root_list)))
+    # the config dir exists if it was (re)generated since it was last packed
+    if pack and os.path.isdir(config_gen_path):
+        # Keep only the V0 trees and the V1 patches, examples are materialized when run
+        if os.path.isdir(config_gen_path + PACK_SUFFIX):
+            shutil.rmtree(config_gen_path + PACK_SUFFIX)
+        # the V0 trees are shared by the packs of all the evolutions of @gen
+        bases_dir = jdolly_gen_dir + '/' + gen + PACK_BASES_SUFFIX
+        packConfig(config_gen_path + '/program0', config_gen_path + PACK_SUFFIX, bases_dir)
+        shutil.rmtree(config_gen_path)
+        pruneStages(config_gen_path, CONFIG_STAGES, config_gen_path + PACK_SUFFIX)
+        # those of the previous pack of the config may be used by no pack any more
+        pruneBases(bases_dir, jdolly_gen_dir)
     print('[AutoEP] ' + gen + '-' + evo + ' the whole program generation finished at:' + \
           str(datetime.datetime.now()))
 
 def genEvolvingProgramsForAllConfigs(gens=GENERATION_CONSTRAINTS, evos=EVOLUTIONS, \
-                                     genprograms_dir=GEN_PROGRAMS_DIR):
-    if os.path.isdir(gen_programs_dir):
-        shutil.rmtree(gen_programs_dir)
-    sub.run('mkdir -p ' + gen_programs_dir, shell=True)
+                                     gen_programs_dir=GEN_PROGRAMS_DIR, jdolly_jobs=1, \
+                                     pack=False, rerun_stages={}):
+    ''' Generate all the configs, resuming from the stages that are already complete.
+    '''
+    os.makedirs(gen_programs_dir, exist_ok=True)
     all_gen_start_time = time.time()
+    if jdolly_jobs > 1:
+        genJDollyProgramsForAllGens(gens, jdolly_jobs, rerun_stages)
     for gen in gens:
         for evo in evos:
-            genEvolvingProgramsForOneConfig(gen, evo)
+            genEvolvingProgramsForOneConfig(gen, evo, gen_programs_dir, pack, rerun_stages)
+        if pack:
+            # the evolutions only start from the base programs (the last base stage)
+            pruneStages(BASE_PROGRAMS_DIR + '/' + gen, BASE_STAGES)
     all_gen_end_time = time.time()
     all_gen_exec_time = all_gen_end_time - all_gen_start_time
 
@@ -827,167 +1492,739 @@ def prependAndAppendTimeInLogFile(tool, start_time, end_time, log_file):
         fw.write(''.join(lines))
         fw.close()
 
+TOOL_MVN_GOALS = {'notool': 'test', \
+                  'clover': '-Pcloverp test', \
+                  'ekstazi': '-Pekstazip test', \
+                  'starts': '-Pstartsp starts:starts'}
+TOOL_NAMES = {'notool': 'RetestAll', 'clover': 'Clover', 'ekstazi': 'Ekstazi', 'starts': 'STARTS'}
+
+def runToolOnOneVersion(tool, version, prog_dir, logs_dir, agent_path=AGENT_PATH, \
+                        notool_runner='mvn'):
+    ''' Run the RTS tool once in @prog_dir, save the log as @logs_dir/<tool>.log
+    With @notool_runner 'direct' or 'server', RetestAll runs without maven (see
+    runTestsDirectly and runTestsOnServer).
+    '''
+    log_file = logs_dir + '/' + tool + '.log'
+    start_time = int(round(time.time() * 1000))
+    print ('[AutoEP]: Running ' + TOOL_NAMES[tool] + ' on V' + version)
+    with open(log_file, 'w') as log:
+        if tool == 'notool' and notool_runner == 'direct':
+            runTestsDirectly(prog_dir, log, agent_path)
+        elif tool == 'notool' and notool_runner == 'server':
+            runTestsOnServer(prog_dir, log, agent_path)
+        else:
+            sub.run('mvn ' + TOOL_MVN_GOALS[tool] + ' -fn -DargLine=\"-javaagent:' + \
+                    agent_path + '\"', shell=True, cwd=prog_dir, stdout=log, stderr=sub.STDOUT)
+    end_time = int(round(time.time() * 1000))
+    prependAndAppendTimeInLogFile(tool, start_time, end_time, log_file)
+
+def listJavaFiles(src_dir):
+    java_files = []
+    for dir_path, subpaths, files in os.walk(src_dir):
+        for f in files:
+            if f.endswith('.java'):
+                java_files.append(os.path.join(dir_path, f))
+    return java_files
+
+def listTestClasses(test_src_dir):
+    ''' Test classes in the same (filesystem) order and with the same name patterns as
+    surefire's defaults.
+    '''
+    test_classes = []
+    for dir_path, subpaths, files in os.walk(test_src_dir):
+        for f in files:
+            name = f.replace('.java', '')
+            if f.endswith('.java') and (name.startswith('Test') or name.endswith('Test') or \
+                                        name.endswith('TestCase')):
+                rel_path = os.path.relpath(os.path.join(dir_path, name), test_src_dir)
+                test_classes.append(rel_path.replace('/', '.'))
+    return test_classes
+
+def compileForDirectRun(prog_dir, log, libs_dir=LIBS_DIR):
+    ''' javac src/main and src/test of @prog_dir into target/, as mvn test-compile would,
+    return the classpath to run the tests with, or None if the compilation failed.
+    '''
+    classes_dir = prog_dir + '/target/classes'
+    test_classes_dir = prog_dir + '/target/test-classes'
+    for d in [classes_dir, test_classes_dir]:
+        if os.path.isdir(d):
+            shutil.rmtree(d)
+        os.makedirs(d)
+    junit_cp = libs_dir + '/junit-4.12.jar' + ':' + libs_dir + '/hamcrest-core-1.3.jar'
+    key = hashCompileInputs(prog_dir)
+    if not lookupCompileCache(key, prog_dir):
+        sp = sub.run(['javac', '-nowarn', '-d', classes_dir, '-classpath', classes_dir] + \
+                     getCompilerOptions(prog_dir + '/pom.xml') + \
+                     listJavaFiles(prog_dir + '/src/main/java'), \
+                     cwd=prog_dir, stdout=log, stderr=sub.STDOUT)
+        if sp.returncode != 0:
+            return None
+        storeCompileCache(key, prog_dir, True)
+    sp = sub.run(['javac', '-nowarn', '-d', test_classes_dir, '-cp', \
+                  classes_dir + ':' + junit_cp] + getCompilerOptions(prog_dir + '/pom.xml') + \
+                 listJavaFiles(prog_dir + '/src/test/java'), \
+                 cwd=prog_dir, stdout=log, stderr=sub.STDOUT)
+    if sp.returncode != 0:
+        return None
+    return test_classes_dir + ':' + classes_dir
+
+def runTestsDirectly(prog_dir, log, agent_path=AGENT_PATH, libs_dir=LIBS_DIR):
+    ''' RetestAll without maven: javac the sources into target/, then run the tests with
+    DirectRunner (in the agent jar), which prints the same lines as surefire into @log.
+    '''
+    prog_cp = compileForDirectRun(prog_dir, log, libs_dir)
+    if prog_cp is None:
+        return
+    junit_cp = libs_dir + '/junit-4.12.jar' + ':' + libs_dir + '/hamcrest-core-1.3.jar'
+    log.flush()
+    sub.run(['java', '-javaagent:' + agent_path, '-cp', prog_cp + ':' + junit_cp, \
+             'org.rtstest.maven.DirectRunner'] + listTestClasses(prog_dir + '/src/test/java'), \
+            cwd=prog_dir, stdout=log, stderr=sub.STDOUT)
+
+# One warm TestServer JVM per (worker) process, started on first use
+_test_server = None
+TEST_SERVER_REQUEST_TIMEOUT = 600 # tests of one program on the TestServer (s)
+TEST_SERVER_IDLE_TIMEOUT = 600 # after which an unused TestServer exits (s)
+# Last line of the reply when the tests of a request timed out (TestServer.TIMEOUT)
+TEST_SERVER_TIMEOUT_LINE = 'TestServer: request timed out'
+
+def startTestServer(agent_path=AGENT_PATH, libs_dir=LIBS_DIR):
+    ''' Start a TestServer (in the agent jar) and return (process, port).
+    The server exits when its stdin is closed, so it does not outlive this process, even
+    when this process is a pool worker, which exits without running the atexit handlers.
+    '''
+    junit_cp = libs_dir + '/junit-4.12.jar' + ':' + libs_dir + '/hamcrest-core-1.3.jar'
+    server = sub.Popen(['java', '-javaagent:' + agent_path, '-cp', junit_cp, \
+                        'org.rtstest.maven.TestServer', '0', \
+                        str(TEST_SERVER_REQUEST_TIMEOUT), str(TEST_SERVER_IDLE_TIMEOUT)], \
+                       stdin=sub.PIPE, stdout=sub.PIPE, universal_newlines=True)
+    port = int(server.stdout.readline())
+    atexit.register(stopTestServer, server)
+    print ('[AutoEP]: TestServer ' + str(server.pid) + ' listening on port ' + str(port))
+    return (server, port)
+
+def stopTestServer(server):
+    if server.poll() is None:
+        server.kill()
+        server.wait()
+
+def getTestServer(agent_path=AGENT_PATH):
+    global _test_server
+    if _test_server is None or _test_server[0].poll() is not None:
+        _test_server = startTestServer(agent_path)
+    return _test_server
+
+def dropTestServer():
+    ''' Stop the TestServer of this process, the next request starts a new one.
+    '''
+    global _test_server
+    if _test_server is not None:
+        stopTestServer(_test_server[0])
+        _test_server = None
+
+def runTestsOnServer(prog_dir, log, agent_path=AGENT_PATH, libs_dir=LIBS_DIR):
+    ''' Same as runTestsDirectly, but the tests run in a fresh class loader of a warm
+    TestServer JVM; its output (also the OBJECT/===== lines) is streamed into @log.
+    '''
+    prog_cp = compileForDirectRun(prog_dir, log, libs_dir)
+    if prog_cp is None:
+        return
+    server, port = getTestServer(agent_path)
+    request = prog_cp + '\n' + ''.join([test_class + '\n' for test_class in \
+                                        listTestClasses(prog_dir + '/src/test/java')]) + '\n'
+    log.flush()
+    # a multibyte character can be split across two chunks
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    tail = ''
+    conn = socket.create_connection(('127.0.0.1', port))
+    conn.settimeout(TEST_SERVER_REQUEST_TIMEOUT + 60)
+    try:
+        conn.sendall(request.encode('utf-8'))
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                break
+            text = decoder.decode(data)
+            log.write(text)
+            tail = (tail + text)[-len(TEST_SERVER_TIMEOUT_LINE) - 2:]
+        log.write(decoder.decode(b'', final=True))
+    except socket.timeout:
+        log.write('\n' + TEST_SERVER_TIMEOUT_LINE + '\n')
+        tail = TEST_SERVER_TIMEOUT_LINE
+    finally:
+        conn.close()
+    if tail.rstrip().endswith(TEST_SERVER_TIMEOUT_LINE):
+        # the tests are still running in the server, which exits
+        print ('[AutoEP]: TestServer timed out on ' + prog_dir)
+        dropTestServer()
+
+def hashProgramTree(prog_dir, exclude=TOOL_STATE_PATHS):
+    ''' Hash the relative paths and the contents of all the files of a program, the tool
+    state (@exclude, top level only) is not part of the program.
+    '''
+    h = hashlib.sha1()
+    for dir_path, subpaths, files in os.walk(prog_dir):
+        if dir_path == prog_dir:
+            subpaths[:] = [d for d in subpaths if d not in exclude]
+            files = [f for f in files if f not in exclude]
+        subpaths.sort()
+        for f in sorted(files):
+            path = os.path.join(dir_path, f)
+            h.update(os.path.relpath(path, prog_dir).encode('utf-8') + b'\0')
+            with open(path, 'rb') as fr:
+                h.update(fr.read())
+            h.update(b'\0')
+    return h.hexdigest()
+
+def relocateFile(path, old_prog_dir, new_prog_dir):
+    ''' Replace the absolute path of the old program dir in a (text) state file.
+    '''
+    with open(path, 'rb') as fr:
+        content = fr.read()
+    old = old_prog_dir.encode('utf-8')
+    if old in content:
+        with open(path, 'wb') as fw:
+            fw.write(content.replace(old, new_prog_dir.encode('utf-8')))
+
+def isRelocatable(state_dir, prog_dir):
+    ''' State can be moved to another program dir if no binary file refers to @prog_dir.
+    '''
+    needle = prog_dir.encode('utf-8')
+    for dir_path, subpaths, files in os.walk(state_dir):
+        for f in files:
+            with open(os.path.join(dir_path, f), 'rb') as fr:
+                content = fr.read()
+            if b'\0' in content and needle in content:
+                return False
+    return True
+
+def storeV0Snapshot(tool, key, prog_dir, log_file, snapshots_dir=V0_SNAPSHOTS_DIR):
+    ''' Save the V0 log and the tool state left in @prog_dir after running V0.
+    '''
+    snapshot_dir = snapshots_dir + '/' + tool + '/' + key
+    if os.path.isdir(snapshot_dir):
+        return
+    tmp_dir = snapshot_dir + '.tmp-' + str(os.getpid())
+    os.makedirs(tmp_dir + '/state')
+    shutil.copy2(log_file, tmp_dir + '/v0.log')
+    for item in TOOL_STATE_PATHS:
+        if os.path.isdir(prog_dir + '/' + item):
+            shutil.copytree(prog_dir + '/' + item, tmp_dir + '/state/' + item)
+        elif os.path.isfile(prog_dir + '/' + item):
+            shutil.copy2(prog_dir + '/' + item, tmp_dir + '/state/' + item)
+    if not isRelocatable(tmp_dir + '/state', prog_dir):
+        shutil.rmtree(tmp_dir)
+        return
+    fw = open(tmp_dir + '/PROG_DIR', 'w')
+    fw.write(prog_dir)
+    fw.close()
+    try:
+        os.rename(tmp_dir, snapshot_dir)
+    except OSError:
+        # Another job stored the same snapshot first
+        shutil.rmtree(tmp_dir)
+
+def restoreV0Snapshot(tool, key, prog_dir, log_file, snapshots_dir=V0_SNAPSHOTS_DIR):
+    ''' Restore the V0 log and tool state into @prog_dir, return False if not cached.
+    '''
+    snapshot_dir = snapshots_dir + '/' + tool + '/' + key
+    if not os.path.isdir(snapshot_dir):
+        return False
+    fr = open(snapshot_dir + '/PROG_DIR', 'r')
+    old_prog_dir = fr.read()
+    fr.close()
+    for item in os.listdir(snapshot_dir + '/state'):
+        if os.path.isdir(snapshot_dir + '/state/' + item):
+            shutil.copytree(snapshot_dir + '/state/' + item, prog_dir + '/' + item)
+        else:
+            shutil.copy2(snapshot_dir + '/state/' + item, prog_dir + '/' + item)
+        for dir_path, subpaths, files in os.walk(prog_dir + '/' + item):
+            for f in files:
+                relocateFile(os.path.join(dir_path, f), old_prog_dir, prog_dir)
+        if os.path.isfile(prog_dir + '/' + item):
+            relocateFile(prog_dir + '/' + item, old_prog_dir, prog_dir)
+    shutil.copy2(snapshot_dir + '/v0.log', log_file)
+    return True
+
+def isConfigGenerated(gen, evo, gen_programs_dir=GEN_PROGRAMS_DIR):
+    config_dir = gen_programs_dir + '/' + gen + '-' + evo
+    return os.path.isdir(config_dir) or isPacked(config_dir + PACK_SUFFIX)
+
+def listExamples(gen, evo, gen_programs_dir=GEN_PROGRAMS_DIR):
+    config_dir = gen_programs_dir + '/' + gen + '-' + evo
+    if os.path.isdir(config_dir):
+        return sorted(os.listdir(config_dir + '/program0'))
+    return listPackedExamples(config_dir + PACK_SUFFIX)
+
+def materializeExampleVersion(gen, evo, example, version, dest_dir, \
+                              gen_programs_dir=GEN_PROGRAMS_DIR):
+    ''' Put V0 or V1 of an example into @dest_dir, from the generated or the packed config.
+    '''
+    config_dir = gen_programs_dir + '/' + gen + '-' + evo
+    if os.path.isdir(config_dir):
+        materializeTree(config_dir + '/program0/' + example + '/' + version, dest_dir)
+    else:
+        materializeExample(config_dir + PACK_SUFFIX, example, version, dest_dir)
+
+def readExampleVersion(gen, evo, example, version, gen_programs_dir=GEN_PROGRAMS_DIR):
+    config_dir = gen_programs_dir + '/' + gen + '-' + evo
+    if os.path.isdir(config_dir):
+        return readTree(config_dir + '/program0/' + example + '/' + version)
+    return readExampleTree(config_dir + PACK_SUFFIX, example, version)
+
+def listExamplesToRun(gen, evo, gen_programs_dir=GEN_PROGRAMS_DIR, skip_equivalent=True, \
+                      results_dir=_RESULTS_DIR):
+    ''' Examples of a config, without those whose V0 and V1 are equivalent (same sources
+    modulo whitespace and comments), which are recorded in the equivalence index instead.
+    '''
+    examples = listExamples(gen, evo, gen_programs_dir)
+    if not skip_equivalent:
+        return examples
+    examples_to_run = []
+    equivalent_examples = []
+    for example in examples:
+        if areEquivalent(readExampleVersion(gen, evo, example, '0', gen_programs_dir), \
+                         readExampleVersion(gen, evo, example, '1', gen_programs_dir)):
+            equivalent_examples.append(example)
+        else:
+            examples_to_run.append(example)
+    appendToEquivalenceIndex(results_dir + '/' + EQUIVALENCE_INDEX_NAME, gen + '-' + evo, \
+                             equivalent_examples)
+    if len(equivalent_examples) > 0:
+        print ('[AutoEP]: ' + gen + '-' + evo + ' skipping ' + str(len(equivalent_examples)) + \
+               ' examples whose V1 is the same as V0')
+    return examples_to_run
+
 def runOneToolOnOneExample(tool, gen, evo, example, gen_programs_dir=GEN_PROGRAMS_DIR,\
                            downloads_dir=_DOWNLOADS_DIR, results_dir=_RESULTS_DIR, \
-                           agent_path=AGENT_PATH):
-    ''' Run all version of one single example with the RTS tool given as option
+                           agent_path=AGENT_PATH, v0_cache=True, notool_runner='mvn'):
+    ''' Run all version of one single example with the RTS tool given as option.
+    Every path is explicit (no os.chdir), so several jobs can run at the same time; each
+    (example, tool) job works in its own _downloads/<gen>-<evo>/<example>-<tool> sandbox.
+    With @v0_cache, V0 runs are shared by the evolved variants of the same base program.
     '''
     v0_logs_dir = results_dir + '/' + gen + '-' + evo + '/' + example + '/0'
     v1_logs_dir = results_dir + '/' + gen + '-' + evo + '/' + example + '/1'
-    sub.run('mkdir -p ' + v0_logs_dir, shell=True, stdout=open(os.devnull, 'w'), \
-            stderr=sub.STDOUT)
-    sub.run('mkdir -p ' + v1_logs_dir, shell=True, stdout=open(os.devnull, 'w'), \
-            stderr=sub.STDOUT)
+    os.makedirs(v0_logs_dir, exist_ok=True)
+    os.makedirs(v1_logs_dir, exist_ok=True)
     # create a copy of program for each tool
-    v0_prog_dir = downloads_dir + '/' + gen + '-' + evo + '/' + example + '-' + \
-                  tool + '/0'
+    sandbox_dir = downloads_dir + '/' + gen + '-' + evo + '/' + example + '-' + tool
+    v0_prog_dir = sandbox_dir + '/0'
     if os.path.isdir(v0_prog_dir):
         shutil.rmtree(v0_prog_dir)
-    shutil.copytree(gen_programs_dir + '/' + gen + '-' + evo + '/program0/' + example + '/0', \
-                    v0_prog_dir)
-    v1_prog_dir = downloads_dir + '/' + gen + '-' + evo + '/' + example + '-' + \
-                  tool + '/1'
+    materializeExampleVersion(gen, evo, example, '0', v0_prog_dir, gen_programs_dir)
+    v1_prog_dir = sandbox_dir + '/1'
     if os.path.isdir(v1_prog_dir):
         shutil.rmtree(v1_prog_dir)
-    shutil.copytree(gen_programs_dir + '/' + gen + '-' + evo + '/program0/' + example + '/1', \
-                    v1_prog_dir)
-    if tool == 'notool':
-        # V0 start
-        os.chdir(v0_prog_dir)
-        start_time = int(round(time.time() * 1000))
-        print ('[AutoEP]: Running RetestAll on V0')
-        sub.run('mvn test -fn -DargLine=\"-javaagent:' + agent_path + '\"', shell=True, \
-                stdout=open(v0_logs_dir + '/notool.log', 'w'), stderr=sub.STDOUT)
-        end_time = int(round(time.time() * 1000))
-        prependAndAppendTimeInLogFile(tool, start_time, end_time, \
-                                      v0_logs_dir + '/' + 'notool.log')
-        # V0 end
-        #shutil.move(v0_prog_dir + '/target', v1_prog_dir)
-        # V1 start
-        os.chdir(v0_prog_dir)
-        shutil.rmtree(v0_prog_dir + '/src/main')
-        sub.run('cp -r ' + v1_prog_dir + '/src/main' + ' ' + v0_prog_dir + '/src', shell=True)
-        start_time = int(round(time.time() * 1000))
-        print ('[AutoEP]: Running RetestAll on V1')
-        sub.run('mvn test -fn -DargLine=\"-javaagent:' + agent_path + '\"', shell=True, \
-                stdout=open(v1_logs_dir + '/notool.log', 'w'), stderr=sub.STDOUT)
-        end_time = int(round(time.time() * 1000))
-        prependAndAppendTimeInLogFile(tool, start_time, end_time, \
-                                      v1_logs_dir + '/' + 'notool.log')
-        # V1 end
-    elif tool == 'clover':
-        # V0 start
-        os.chdir(v0_prog_dir)
-        start_time = int(round(time.time() * 1000))
-        print ('[AutoEP]: Running Clover on V0')
-        sub.run('mvn -Pcloverp test -fn -DargLine=\"-javaagent:' + agent_path + '\"', \
-                shell=True, stdout=open(v0_logs_dir + '/clover.log', 'w'), stderr=sub.STDOUT)
-        end_time = int(round(time.time() * 1000))
-        prependAndAppendTimeInLogFile(tool, start_time, end_time, \
-                                      v0_logs_dir + '/' + 'clover.log')
-        # V0 end
-        #shutil.move(v0_prog_dir + '/.clover', v1_prog_dir)
-        #shutil.move(v0_prog_dir + '/target', v1_prog_dir)
-        # V1 start
-        os.chdir(v0_prog_dir)
-        shutil.rmtree(v0_prog_dir + '/src/main')
-        sub.run('cp -r ' + v1_prog_dir + '/src/main' + ' ' + v0_prog_dir + '/src', shell=True)
-        start_time = int(round(time.time() * 1000))
-        print ('[AutoEP]: Running Clover on V1')
-        sub.run('mvn -Pcloverp test -fn -DargLine=\"-javaagent:' + agent_path + '\"', \
-                shell=True, stdout=open(v1_logs_dir + '/clover.log', 'w'), stderr=sub.STDOUT)
-        end_time = int(round(time.time() * 1000))
-        prependAndAppendTimeInLogFile(tool, start_time, end_time, \
-                                      v1_logs_dir + '/' + 'clover.log')
-        # V1 end
-    elif tool == 'ekstazi':
-        # V0 start
-        os.chdir(v0_prog_dir)
-        start_time = int(round(time.time() * 1000))
-        print ('[AutoEP]: Running Ekstazi on V0')
-        sub.run('mvn -Pekstazip test -fn -DargLine=\"-javaagent:' + agent_path + '\"', \
-                shell=True, stdout=open(v0_logs_dir + '/ekstazi.log', 'w'), stderr=sub.STDOUT)
-        end_time = int(round(time.time() * 1000))
-        prependAndAppendTimeInLogFile(tool, start_time, end_time, \
-                                      v0_logs_dir + '/' + 'ekstazi.log')
-        # V0 end
-        #shutil.move(v0_prog_dir + '/.ekstazi', v1_prog_dir)
-        #shutil.move(v0_prog_dir + '/target', v1_prog_dir)
-        # V1 start
-        os.chdir(v0_prog_dir)
-        shutil.rmtree(v0_prog_dir + '/src/main')
-        sub.run('cp -r ' + v1_prog_dir + '/src/main' + ' ' + v0_prog_dir + '/src', shell=True)
-        start_time = int(round(time.time() * 1000))
-        print ('[AutoEP]: Running Ekstazi on V1')
-        sub.run('mvn -Pekstazip test -fn -DargLine=\"-javaagent:' + agent_path + '\"', \
-                shell=True, stdout=open(v1_logs_dir + '/ekstazi.log', 'w'), stderr=sub.STDOUT)
-        end_time = int(round(time.time() * 1000))
-        prependAndAppendTimeInLogFile(tool, start_time, end_time, \
-                                      v1_logs_dir + '/' + 'ekstazi.log')
-        # V1 end
-    elif tool == 'starts':
-        # V0 start
-        os.chdir(v0_prog_dir)
-        start_time = int(round(time.time() * 1000))
-        print ('[AutoEP]: Running STARTS on V0')
-        sub.run('mvn -Pstartsp starts:starts -fn -DargLine=\"-javaagent:' + agent_path + '\"', \
-                shell=True, stdout=open(v0_logs_dir + '/starts.log', 'w'), stderr=sub.STDOUT)
-        end_time = int(round(time.time() * 1000))
-        prependAndAppendTimeInLogFile(tool, start_time, end_time, \
-                                      v0_logs_dir + '/' + 'starts.log')
-        # V0 end
-        #shutil.move(v0_prog_dir + '/.starts', v1_prog_dir)
-        #shutil.move(v0_prog_dir + '/jdeps-cache', v1_prog_dir)
-        #shutil.move(v0_prog_dir + '/target', v1_prog_dir)
-        # V1 start
-        os.chdir(v0_prog_dir)
-        shutil.rmtree(v0_prog_dir + '/src/main')
-        sub.run('cp -r ' + v1_prog_dir + '/src/main' + ' ' + v0_prog_dir + '/src', shell=True)
-        start_time = int(round(time.time() * 1000))
-        print ('[AutoEP]: Running STARTS on V1')
-        sub.run('mvn -Pstartsp starts:starts -fn -DargLine=\"-javaagent:' + agent_path + '\"', \
-                shell=True, stdout=open(v1_logs_dir + '/starts.log', 'w'), stderr=sub.STDOUT)
-        end_time = int(round(time.time() * 1000))
-        prependAndAppendTimeInLogFile(tool, start_time, end_time, \
-                                      v1_logs_dir + '/' + 'starts.log')
-        # V1 end
-
-def runAllToolsOnOneExample(gen, evo, example, tools=TOOLS):
+    materializeExampleVersion(gen, evo, example, '1', v1_prog_dir, gen_programs_dir)
+    # V0: the variants of a base program share the same V0, run it only once per tool
+    v0_log_file = v0_logs_dir + '/' + tool + '.log'
+    v0_cache = v0_cache and tool in V0_SNAPSHOT_TOOLS
+    # logs of the two RetestAll runners differ in timing, keep their snapshots apart
+    snapshot_tool = tool + '-' + notool_runner if tool == 'notool' and \
+                    notool_runner != 'mvn' else tool
+    if v0_cache:
+        v0_key = hashProgramTree(v0_prog_dir)
+    if v0_cache and restoreV0Snapshot(snapshot_tool, v0_key, v0_prog_dir, v0_log_file):
+        print ('[AutoEP]: Restored ' + TOOL_NAMES[tool] + ' V0 from snapshot ' + v0_key)
+    else:
+        runToolOnOneVersion(tool, '0', v0_prog_dir, v0_logs_dir, agent_path, notool_runner)
+        if v0_cache:
+            storeV0Snapshot(snapshot_tool, v0_key, v0_prog_dir, v0_log_file)
+    # V1: reuse the V0 directory (and the tool's metadata in it), only update src/main
+    syncTree(v1_prog_dir + '/src/main', v0_prog_dir + '/src/main')
+    runToolOnOneVersion(tool, '1', v0_prog_dir, v1_logs_dir, agent_path, notool_runner)
+
+def writeAggregatorPom(batch_dir, modules, pom_path=POM_PATH):
+    ''' Aggregator POM of a batch, derived from configs/pom.xml so that the tool profiles
+    and plugin prefixes (starts:starts) resolve as they do in a single program.
+    '''
+    with open(pom_path, 'r') as fr:
+        pom = fr.read()
+    module_lines = ''.join(['    <module>' + module + '</module>\n' for module in modules])
+    pom = pom.replace('<artifactId>rtsgen</artifactId>', \
+                      '<artifactId>' + BATCH_ARTIFACT_ID + '</artifactId>\n' + \
+                      '  <packaging>pom</packaging>', 1)
+    pom = pom.replace('<version>1</version>', '<version>1</version>\n\n' + \
+                      '  <modules>\n' + module_lines + '  </modules>', 1)
+    with open(batch_dir + '/pom.xml', 'w') as fw:
+        fw.write(pom)
+
+def renameModule(module_dir, module):
+    ''' Modules of one reactor need distinct artifactIds; the name is what maven prints in
+    the "Building" line starting the output of the module.
+    '''
+    with open(module_dir + '/pom.xml', 'r') as fr:
+        pom = fr.read()
+    with openForRewrite(module_dir + '/pom.xml') as fw:
+        fw.write(pom.replace('<artifactId>rtsgen</artifactId>', \
+                             '<artifactId>' + MODULE_ARTIFACT_PREFIX + module + \
+                             '</artifactId>\n  <name>' + MODULE_ARTIFACT_PREFIX + module + \
+                             '</name>', 1))
+
+def splitReactorLog(reactor_log_file, modules):
+    ''' {module: lines} of a reactor build, the lines between the "Building" line of a
+    module and the next one (or the reactor summary). Lines of the aggregator are dropped.
+    '''
+    names = dict([(MODULE_ARTIFACT_PREFIX + module, module) for module in modules])
+    module_lines = dict([(module, []) for module in modules])
+    current = None
+    with open(reactor_log_file, 'r') as fr:
+        for line in fr:
+            if line.startswith('[INFO] Building ') and len(line.split()) > 2:
+                current = names.get(line.split()[2], None)
+                continue
+            if line.startswith('[INFO] Reactor Summary'):
+                current = None
+            if current is not None:
+                module_lines[current].append(line)
+    return module_lines
+
+def runToolOnOneBatch(tool, version, batch_dir, modules, logs_dirs, agent_path=AGENT_PATH):
+    ''' Run the RTS tool once on all the @modules of @batch_dir, split the output into
+    @logs_dirs[module]/<tool>.log. Each module keeps its own tool state (.ekstazi, .starts,
+    target/clover) in its own dir, so test selection is the same as in a single run.
+    '''
+    writeAggregatorPom(batch_dir, modules)
+    reactor_log_file = batch_dir + '/' + tool + '-' + version + '.log'
+    start_time = int(round(time.time() * 1000))
+    print ('[AutoEP]: Running ' + TOOL_NAMES[tool] + ' on V' + version + ' of ' + \
+           str(len(modules)) + ' examples')
+    with open(reactor_log_file, 'w') as log:
+        # -fn: a module that fails does not stop the others
+        sub.run('mvn ' + TOOL_MVN_GOALS[tool] + ' -fn -DargLine=\"-javaagent:' + \
+                agent_path + '\"', shell=True, cwd=batch_dir, stdout=log, stderr=sub.STDOUT)
+    end_time = int(round(time.time() * 1000))
+    module_lines = splitReactorLog(reactor_log_file, modules)
+    for module in modules:
+        log_file = logs_dirs[module] + '/' + tool + '.log'
+        with open(log_file, 'w') as fw:
+            fw.write(''.join(module_lines[module]))
+        # the time of the whole batch, maven does not time each module
+        prependAndAppendTimeInLogFile(tool, start_time, end_time, log_file)
+
+def runOneToolOnBatch(tool, gen, evo, examples, gen_programs_dir=GEN_PROGRAMS_DIR, \
+                      downloads_dir=_DOWNLOADS_DIR, results_dir=_RESULTS_DIR, \
+                      agent_path=AGENT_PATH, v0_cache=True, notool_runner='mvn'):
+    ''' Same as runOneToolOnOneExample on each of @examples, but with one maven run per
+    version for all of them: the examples are the modules of an aggregator project in the
+    _downloads/<gen>-<evo>/batch-<first example>-<tool> sandbox.
+    '''
+    if tool == 'notool' and notool_runner != 'mvn':
+        # nothing to batch, RetestAll does not run through maven
+        for example in examples:
+            runOneToolOnOneExample(tool, gen, evo, example, gen_programs_dir, downloads_dir, \
+                                   results_dir, agent_path, v0_cache, notool_runner)
+        return
+    batch_dir = downloads_dir + '/' + gen + '-' + evo + '/batch-' + examples[0] + '-' + tool
+    if os.path.isdir(batch_dir):
+        shutil.rmtree(batch_dir)
+    os.makedirs(batch_dir + '/_v1')
+    v0_logs_dirs = {}
+    v1_logs_dirs = {}
+    v0_modules = []
+    v0_cache = v0_cache and tool in V0_SNAPSHOT_TOOLS
+    # a module log is only the section of the module, keep its snapshots apart
+    snapshot_tool = tool + '-batch'
+    for example in examples:
+        v0_logs_dirs[example] = results_dir + '/' + gen + '-' + evo + '/' + example + '/0'
+        v1_logs_dirs[example] = results_dir + '/' + gen + '-' + evo + '/' + example + '/1'
+        os.makedirs(v0_logs_dirs[example], exist_ok=True)
+        os.makedirs(v1_logs_dirs[example], exist_ok=True)
+        module_dir = batch_dir + '/' + example
+        materializeExampleVersion(gen, evo, example, '0', module_dir, gen_programs_dir)
+        materializeExampleVersion(gen, evo, example, '1', batch_dir + '/_v1/' + example, \
+                                  gen_programs_dir)
+        v0_log_file = v0_logs_dirs[example] + '/' + tool + '.log'
+        # same key as a single run, before the module is renamed
+        v0_key = hashProgramTree(module_dir) if v0_cache else None
+        renameModule(module_dir, example)
+        if v0_cache and restoreV0Snapshot(snapshot_tool, v0_key, module_dir, v0_log_file):
+            print ('[AutoEP]: Restored ' + TOOL_NAMES[tool] + ' V0 from snapshot ' + v0_key)
+        else:
+            v0_modules.append((example, v0_key))
+    # V0: only the modules not restored from a snapshot
+    if len(v0_modules) > 0:
+        runToolOnOneBatch(tool, '0', batch_dir, [example for example, v0_key in v0_modules], \
+                          v0_logs_dirs, agent_path)
+        if v0_cache:
+            for example, v0_key in v0_modules:
+                storeV0Snapshot(snapshot_tool, v0_key, batch_dir + '/' + example, \
+                                v0_logs_dirs[example] + '/' + tool + '.log')
+    # V1: reuse the V0 modules (and the tool's metadata in them), only update src/main
+    for example in examples:
+        syncTree(batch_dir + '/_v1/' + example + '/src/main', \
+                 batch_dir + '/' + example + '/src/main')
+    runToolOnOneBatch(tool, '1', batch_dir, examples, v1_logs_dirs, agent_path)
+
+def batchJobs(job_list, batch_size=1):
+    ''' Group the (tool, gen, evo, example) jobs of the same tool and config into
+    (tool, gen, evo, examples) jobs of up to @batch_size examples (a tuple).
+    '''
+    if batch_size <= 1:
+        return job_list
+    batches = collections.OrderedDict([])
+    for tool, gen, evo, example in job_list:
+        batches.setdefault((tool, gen, evo), []).append(example)
+    batch_job_list = []
+    for (tool, gen, evo), examples in batches.items():
+        for i in range(0, len(examples), batch_size):
+            batch_job_list.append((tool, gen, evo, tuple(examples[i:i + batch_size])))
+    return batch_job_list
+
+def runJob(job, run_opts={}):
+    ''' Entry point of one (example, tool) or (examples, tool) job (see batchJobs), in the
+    current or in a worker process.
+    '''
+    tool, gen, evo, example = job
+    if isinstance(example, tuple):
+        runOneToolOnBatch(tool, gen, evo, example, **run_opts)
+    else:
+        runOneToolOnOneExample(tool, gen, evo, example, **run_opts)
+    return job
+
+def getJobName(job):
+    tool, gen, evo, example = job
+    if isinstance(example, tuple):
+        example = ' '.join(example)
+    return gen + '-' + evo + ' ' + example + ' ' + tool
+
+def runJobs(job_list, jobs=1, run_opts={}):
+    ''' Run (tool, gen, evo, example) jobs, serially or in a pool of @jobs processes. A job
+    that fails is reported, the others still run.
+    '''
+    if jobs <= 1:
+        for job in job_list:
+            try:
+                runJob(job, run_opts)
+            except Exception as e:
+                print ('[RTSCheck] Failed: ' + getJobName(job) + ': ' + str(e))
+        return
+    with futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = {}
+        for job in job_list:
+            pending[executor.submit(runJob, job, run_opts)] = job
+        for future in futures.as_completed(pending):
+            try:
+                future.result()
+                print ('[RTSCheck] Finished: ' + getJobName(pending[future]))
+            except Exception as e: # e.g. a broken example, do not stop the other jobs
+                print ('[RTSCheck] Failed: ' + getJobName(pending[future]) + ': ' + str(e))
+
+def collectJobsOfOneConfig(gen, evo, tools=TOOLS, gen_programs_dir=GEN_PROGRAMS_DIR, \
+                           skip_equivalent=True, results_dir=_RESULTS_DIR):
+    job_list = []
+    examples = listExamplesToRun(gen, evo, gen_programs_dir, skip_equivalent, results_dir)
+    for example in examples:
+        for tool in tools:
+            job_list.append((tool, gen, evo, example))
+    return job_list
+
+def isBaselineInvalid(gen, evo, example, results_dir=_RESULTS_DIR):
+    ''' RetestAll ran no test on V1, which makes the example invalid in gen_tables.py.
+    '''
+    log_file = results_dir + '/' + gen + '-' + evo + '/' + example + '/1/notool.log'
+    if not os.path.isfile(log_file):
+        return True
+    return parseLog(log_file).num_of_test_runs == '0'
+
+def recordInvalidExample(gen, evo, example, results_dir=_RESULTS_DIR):
+    print ('[RTSCheck] Invalid baseline, skipping the other tools: ' + gen + '-' + evo + \
+           ' ' + example)
+    # one short line in append mode, safe with concurrent jobs
+    with open(results_dir + '/' + INVALID_EXAMPLES_NAME, 'a') as fw:
+        fw.write(gen + '-' + evo + ' ' + example + '\n')
+
+def jobsAfterBaseline(job, tools=TOOLS, results_dir=_RESULTS_DIR):
+    ''' The jobs of the other tools once the notool @job finished, none if the baseline
+    is invalid.
+    '''
+    tool, gen, evo, example = job
+    if isBaselineInvalid(gen, evo, example, results_dir):
+        recordInvalidExample(gen, evo, example, results_dir)
+        return []
+    return [(other_tool, gen, evo, example) for other_tool in tools if other_tool != 'notool']
+
+def runAllToolsOnOneExample(gen, evo, example, tools=TOOLS, run_opts={}, early_abort=True, \
+                            results_dir=_RESULTS_DIR):
+    ''' With @early_abort, RetestAll runs first and the other tools only if it is valid.
+    '''
+    if early_abort and 'notool' in tools:
+        runOneToolOnOneExample('notool', gen, evo, example, **run_opts)
+        for job in jobsAfterBaseline(('notool', gen, evo, example), tools, results_dir):
+            runOneToolOnOneExample(job[0], gen, evo, example, **run_opts)
+        return
     for tool in tools:
-        runOneToolOnOneExample(tool, gen, evo, example)
+        runOneToolOnOneExample(tool, gen, evo, example, **run_opts)
 
-def runAllToolsOnOneConfig(gen, evo, tools=TOOLS, gen_programs_dir=GEN_PROGRAMS_DIR):
-    examples = sorted(os.listdir(gen_programs_dir + '/' + gen + '-' + evo + '/program0'))
+def runAllToolsOnOneConfig(gen, evo, tools=TOOLS, gen_programs_dir=GEN_PROGRAMS_DIR, \
+                           run_opts={}, skip_equivalent=True, results_dir=_RESULTS_DIR, \
+                           early_abort=True):
+    examples = listExamplesToRun(gen, evo, gen_programs_dir, skip_equivalent, results_dir)
     for example in examples:
         print ('[RTSCheck] Example: ' + gen + evo + ' ' + example)
-        runAllToolsOnOneExample(gen, evo, example)
+        runAllToolsOnOneExample(gen, evo, example, run_opts=run_opts, early_abort=early_abort, \
+                                results_dir=results_dir)
 
 def runAllToolsOnAllConfigs(gens=GENERATION_CONSTRAINTS, evos=EVOLUTIONS, \
                             downloads_dir=_DOWNLOADS_DIR, results_dir=_RESULTS_DIR, \
-                            gen_programs_dir=GEN_PROGRAMS_DIR):
+                            gen_programs_dir=GEN_PROGRAMS_DIR, jobs=1, run_opts={}, \
+                            skip_equivalent=True, early_abort=True, batch_size=1):
+    ''' With @batch_size > 1, each tool runs once per version on up to @batch_size examples
+    of a config (see runOneToolOnBatch).
+    '''
     if os.path.isdir(downloads_dir):
         shutil.rmtree(downloads_dir)
     os.makedirs(downloads_dir)
     if os.path.isdir(results_dir):
         shutil.rmtree(results_dir)
     os.makedirs(results_dir)
+    if jobs <= 1 and batch_size <= 1:
+        for gen in gens:
+            for evo in evos:
+                if not isConfigGenerated(gen, evo, gen_programs_dir):
+                    continue
+                runAllToolsOnOneConfig(gen, evo, run_opts=run_opts, \
+                                       skip_equivalent=skip_equivalent, results_dir=results_dir, \
+                                       early_abort=early_abort)
+        return
+    # Parallel: one job per (example, tool) or per batch, all the configs share one pool
+    job_list = []
     for gen in gens:
         for evo in evos:
-            config_dir = gen_programs_dir + '/' + gen + '-' + evo
-            if not os.path.isdir(config_dir):
+            if not isConfigGenerated(gen, evo, gen_programs_dir):
                 continue
-            runAllToolsOnOneConfig(gen, evo)
+            job_list += collectJobsOfOneConfig(gen, evo, skip_equivalent=skip_equivalent, \
+                                               results_dir=results_dir)
+    if early_abort:
+        # the RetestAll baselines first, the other tools only on the valid examples
+        baseline_job_list = [job for job in job_list if job[0] == 'notool']
+        print ('[RTSCheck] Running ' + str(len(baseline_job_list)) + ' baseline jobs with ' + \
+               str(jobs) + ' workers')
+        runJobs(batchJobs(baseline_job_list, batch_size), jobs, run_opts)
+        job_list = []
+        for job in baseline_job_list:
+            job_list += jobsAfterBaseline(job, TOOLS, results_dir)
+    job_list = batchJobs(job_list, batch_size)
+    print ('[RTSCheck] Running ' + str(len(job_list)) + ' jobs with ' + str(jobs) + ' workers')
+    runJobs(job_list, jobs, run_opts)
+
+def produceExamples(example_queue, gens, evos, jdolly_jobs=1, pack=False, \
+                    skip_equivalent=True, gen_programs_dir=GEN_PROGRAMS_DIR, \
+                    results_dir=_RESULTS_DIR, rerun_stages={}):
+    ''' Producer of the pipeline: generate the configs one after the other and put each of
+    their examples on @example_queue as soon as the config is complete, None at the end.
+    A config is the smallest unit, as JDolly outputs all the programs of a constraint at
+    once, evolutions (next-program-in-order) read the other programs of the config, and the
+    stages are checkpointed (and packed) per config tree. So the tools wait for the whole
+    first config; after it, they overlap with the generation of the next configs.
+    '''
+    try:
+        if jdolly_jobs > 1:
+            genJDollyProgramsForAllGens(gens, jdolly_jobs, rerun_stages)
+        for gen in gens:
+            for evo in evos:
+                genEvolvingProgramsForOneConfig(gen, evo, gen_programs_dir, pack, rerun_stages)
+                for example in listExamplesToRun(gen, evo, gen_programs_dir, skip_equivalent, \
+                                                 results_dir):
+                    # blocks while the tools are behind
+                    example_queue.put((gen, evo, example))
+            if pack:
+                pruneStages(BASE_PROGRAMS_DIR + '/' + gen, BASE_STAGES)
+    finally:
+        example_queue.put(None)
+
+def runPipeline(gens=GENERATION_CONSTRAINTS, evos=EVOLUTIONS, tools=TOOLS, jobs=1, \
+                jdolly_jobs=1, pack=False, skip_equivalent=True, early_abort=True, \
+                run_opts={}, gen_programs_dir=GEN_PROGRAMS_DIR, downloads_dir=_DOWNLOADS_DIR, \
+                results_dir=_RESULTS_DIR, rerun_stages={}):
+    ''' Streaming --gen-programs plus --run: the programs are generated in a separate
+    process, whose examples go through a bounded queue to a pool of @jobs processes running
+    the (example, tool) jobs, so generation and tool execution overlap. Generation resumes
+    from the complete stages, as with --gen-programs.
+    '''
+    os.makedirs(gen_programs_dir, exist_ok=True)
+    for d in [downloads_dir, results_dir]:
+        if os.path.isdir(d):
+            shutil.rmtree(d)
+        os.makedirs(d)
+    # a few examples ahead of the tools, enough to keep all the workers busy
+    example_queue = multiprocessing.Queue(maxsize=max(1, jobs))
+    producer = multiprocessing.Process(target=produceExamples, \
+                                       args=(example_queue, gens, evos, jdolly_jobs, pack, \
+                                             skip_equivalent, gen_programs_dir, results_dir, \
+                                             rerun_stages))
+    producer.start()
+    max_running = 2 * max(1, jobs)
+    try:
+        with futures.ProcessPoolExecutor(max_workers=max(1, jobs)) as executor:
+            # future: job
+            running = {}
+            while True:
+                example = example_queue.get()
+                if example is None:
+                    break
+                gen, evo, example = example
+                for tool in tools:
+                    if early_abort and tool != 'notool' and 'notool' in tools:
+                        # submitted once the baseline is known to be valid
+                        continue
+                    job = (tool, gen, evo, example)
+                    running[executor.submit(runJob, job, run_opts)] = job
+                while len(running) >= max_running:
+                    for job in reportFinishedJobs(running, early_abort, tools, results_dir):
+                        running[executor.submit(runJob, job, run_opts)] = job
+            while len(running) > 0:
+                for job in reportFinishedJobs(running, early_abort, tools, results_dir):
+                    running[executor.submit(runJob, job, run_opts)] = job
+    finally:
+        # the producer may be blocked on the full queue if the tools stopped early
+        if producer.is_alive():
+            producer.terminate()
+        producer.join()
+
+def reportFinishedJobs(running, early_abort=False, tools=TOOLS, results_dir=_RESULTS_DIR):
+    ''' Wait for jobs of @running ({future: job}) to finish, remove and print them, and
+    return the jobs to start after them (the other tools of the examples whose baseline
+    finished, with @early_abort). A failed job is reported, the others still run.
+    '''
+    done, not_done = futures.wait(list(running.keys()), return_when=futures.FIRST_COMPLETED)
+    next_job_list = []
+    for future in done:
+        job = running.pop(future)
+        try:
+            future.result()
+            print ('[RTSCheck] Finished: ' + getJobName(job))
+        except Exception as e: # its baseline is invalid, as it has no log
+            print ('[RTSCheck] Failed: ' + getJobName(job) + ': ' + str(e))
+        if early_abort and job[0] == 'notool':
+            next_job_list += jobsAfterBaseline(job, tools, results_dir)
+    return next_job_list
 
 if __name__ == '__main__':
     opts = parseArgs(sys.argv[1:])
+    # the stages to run again are those completed before now
+    rerun_stages = dict([(stage, time.time()) for stage in opts.stages])
     if opts.gen_programs:
-        genEvolvingProgramsForAllConfigs()
+        genEvolvingProgramsForAllConfigs(jdolly_jobs=opts.jdolly_jobs, pack=opts.pack, \
+                                         rerun_stages=rerun_stages)
         exit(0)
     elif opts.gen_programs_for_one_config:
         gen = opts.gen_programs_for_one_config.split(',')[0]
         evo = opts.gen_programs_for_one_config.split(',')[1]
-        genEvolvingProgramsForOneConfig(gen, evo)
+        genEvolvingProgramsForOneConfig(gen, evo, pack=opts.pack, rerun_stages=rerun_stages)
+        exit(0)
+    elif opts.pipeline:
+        run_opts = {'v0_cache': not opts.no_v0_cache, 'notool_runner': opts.notool_runner}
+        runPipeline(jobs=opts.jobs, jdolly_jobs=opts.jdolly_jobs, pack=opts.pack, \
+                    skip_equivalent=not opts.run_equivalent, \
+                    early_abort=not opts.no_early_abort, run_opts=run_opts, \
+                    rerun_stages=rerun_stages)
         exit(0)
     elif opts.run:
-        runAllToolsOnAllConfigs()
+        run_opts = {'v0_cache': not opts.no_v0_cache, 'notool_runner': opts.notool_runner}
+        runAllToolsOnAllConfigs(jobs=opts.jobs, run_opts=run_opts, \
+                                skip_equivalent=not opts.run_equivalent, \
+                                early_abort=not opts.no_early_abort, \
+                                batch_size=opts.batch_size)
         exit(0)
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from run_autoep import isBaselineInvalid, jobsAfterBaseline, INVALID_EXAMPLES_NAME
+from equivalence import loadEquivalenceIndex
+
+def writeNotoolLog(results_dir, example, num_of_test_runs):
+    log_dir = results_dir + '/default-copy-field/' + example + '/1'
+    os.makedirs(log_dir)
+    with open(log_dir + '/notool.log', 'w') as fw:
+        fw.write('Running Package_0.TestGroup0\n===== Package_0.TestGroup0\n')
+        fw.write('Tests run: ' + num_of_test_runs + ', Failures: 0, Errors: 0, Skipped: 0\n')
+
+class BaselineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.results_dir = tempfile.mkdtemp()
+        writeNotoolLog(self.results_dir, '1', '3')
+        writeNotoolLog(self.results_dir, '2', '0')
+
+    def tearDown(self):
+        shutil.rmtree(self.results_dir)
+
+    def testIsBaselineInvalid(self):
+        self.assertFalse(isBaselineInvalid('default', 'copy-field', '1', self.results_dir))
+        # RetestAll ran no test on V1
+        self.assertTrue(isBaselineInvalid('default', 'copy-field', '2', self.results_dir))
+        # RetestAll did not get to V1
+        self.assertTrue(isBaselineInvalid('default', 'copy-field', '3', self.results_dir))
+
+    def testJobsAfterBaseline(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(jobsAfterBaseline(('notool', 'default', 'copy-field', '1'), \
+                                               ['notool', 'clover', 'ekstazi'], \
+                                               self.results_dir), \
+                             [('clover', 'default', 'copy-field', '1'), \
+                              ('ekstazi', 'default', 'copy-field', '1')])
+            self.assertEqual(jobsAfterBaseline(('notool', 'default', 'copy-field', '2'), \
+                                               ['notool', 'clover', 'ekstazi'], \
+                                               self.results_dir), [])
+        self.assertIn('skipping the other tools: default-copy-field 2', output.getvalue())
+        # read by gen_tables.py, which counts it as invalid
+        self.assertEqual(loadEquivalenceIndex(self.results_dir + '/' + INVALID_EXAMPLES_NAME), \
+                         set([('default-copy-field', '2')]))
+
+if __name__ == '__main__':
+    unittest.main()
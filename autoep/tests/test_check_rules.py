@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../..'))
+from check_rules import loadResults, checkRuleR1, checkRuleR2, checkRuleR3, checkRuleR4, \
+                        checkRuleR6, checkRuleR7, VIOLATION_FIELDS, VIOLATION_KEY_FIELDS, \
+                        TOOLS, GENERATION_MAP, EVOLUTION_MAP
+from common.macros import loadMacros
+from common.violations import ViolationStore
+
+CONFIGS = ['default-add-extends', 'pullupmethod-copy-field', 'renameclass-remove-method']
+METRICS = ['NumOfRunTests', 'NumOfAssertionFailTests', 'NumOfStateChangeTests', \
+           'NumOfStateDiffTests']
+
+# The rules check_rules.py checked before they were array expressions, one example, version
+# and tool at a time
+
+def reportOldViolation(rule, tool, config, example_id, violation_list, fail_type):
+    # the old duplicate scan, no printing
+    gen = config.split('-')[0]
+    evo = '-'.join(config.split('-')[1:])
+    v = (rule, GENERATION_MAP[gen], EVOLUTION_MAP[evo], tool, example_id, fail_type)
+    for reported_v in violation_list:
+        if reported_v[:5] == v[:5]:
+            return
+    violation_list.append(v)
+
+def checkOldRuleR1(macro_lines, violation_list, list_tex_file, tools=TOOLS):
+    fr = open(list_tex_file, 'r')
+    lines = fr.readlines()
+    fr.close()
+    for i in range(len(lines)):
+        config = lines[i].split()[0]
+        example_id = lines[i].strip().split()[1]
+        for metric, fail_type in [('NumOfAssertionFailTests', 'Assertion'), \
+                                  ('NumOfStateChangeTests', 'State')]:
+            retestall_num_of_failed_tests = \
+                macro_lines[config + example_id + 'V1' + 'notool' + metric]
+            for tool in tools:
+                tool_num_of_failed_tests = macro_lines[config + example_id + 'V1' + tool + metric]
+                if int(tool_num_of_failed_tests) < int(retestall_num_of_failed_tests):
+                    reportOldViolation('R1', tool, config, example_id, violation_list, fail_type)
+
+def checkOldRuleR2AndR4(rule, macro_lines, violation_list, list_tex_file, tools=TOOLS):
+    fr = open(list_tex_file, 'r')
+    lines = fr.readlines()
+    fr.close()
+    for i in range(len(lines)):
+        config = lines[i].split()[0]
+        example_id = lines[i].strip().split()[1]
+        for version in ['V0', 'V1']:
+            num_of_all_tests = int(macro_lines[config + example_id + version + \
+                                               'notoolNumOfRunTests'])
+            num_of_run_tests_map = {}
+            for tool in tools:
+                num_of_run_tests_map[tool] = int(macro_lines[config + example_id + version + \
+                                                             tool + 'NumOfRunTests'])
+            values = list(num_of_run_tests_map.values())
+            if rule == 'R2' and values.count(0) == 1 and \
+               values.count(num_of_all_tests) == len(tools) - 1:
+                for tool in num_of_run_tests_map:
+                    if num_of_run_tests_map[tool] == 0:
+                        reportOldViolation('R2', tool, config, example_id, violation_list, 'Run')
+            if rule == 'R4' and values.count(0) == len(tools) - 1 and \
+               values.count(num_of_all_tests) == 1:
+                for tool in num_of_run_tests_map:
+                    if num_of_run_tests_map[tool] == num_of_all_tests:
+                        reportOldViolation('R4', tool, config, example_id, violation_list, 'Run')
+
+def checkOldRuleR3(macro_lines, violation_list, list_tex_file, tools=TOOLS):
+    fr = open(list_tex_file, 'r')
+    lines = fr.readlines()
+    fr.close()
+    for i in range(len(lines)):
+        config = lines[i].split()[0]
+        example_id = lines[i].strip().split()[1]
+        v0_num_of_all_tests = int(macro_lines[config + example_id + 'V0notoolNumOfRunTests'])
+        v1_num_of_all_tests = int(macro_lines[config + example_id + 'V1notoolNumOfRunTests'])
+        for tool in tools:
+            if int(macro_lines[config + example_id + 'V0' + tool + 'NumOfRunTests']) == \
+               v0_num_of_all_tests and \
+               int(macro_lines[config + example_id + 'V1' + tool + 'NumOfRunTests']) == \
+               v1_num_of_all_tests and \
+               v1_num_of_all_tests != 0:
+                reportOldViolation('R3', tool, config, example_id, violation_list, 'Run')
+
+def checkOldRuleR6(macro_lines, violation_list, list_tex_file, tools=TOOLS):
+    fr = open(list_tex_file, 'r')
+    lines = fr.readlines()
+    fr.close()
+    for i in range(len(lines)):
+        config = lines[i].split()[0]
+        example_id = lines[i].strip().split()[1]
+        retestall_num_of_run_tests = macro_lines[config + example_id + 'V0notoolNumOfRunTests']
+        for tool in tools:
+            tool_num_of_run_tests = macro_lines[config + example_id + 'V0' + tool + \
+                                                'NumOfRunTests']
+            if int(tool_num_of_run_tests) != int(retestall_num_of_run_tests):
+                reportOldViolation('R6', tool, config, example_id, violation_list, 'Run')
+
+def checkOldRuleR7(macro_lines, violation_list, list_tex_file, tools=TOOLS):
+    fr = open(list_tex_file, 'r')
+    lines = fr.readlines()
+    fr.close()
+    for i in range(len(lines)):
+        config = lines[i].split()[0]
+        example_id = lines[i].strip().split()[1]
+        retestall_num_of_failed_tests = \
+            macro_lines[config + example_id + 'V1notoolNumOfAssertionFailTests']
+        for tool in tools:
+            tool_num_of_failed_tests = macro_lines[config + example_id + 'V1' + tool + \
+                                                   'NumOfAssertionFailTests']
+            if int(tool_num_of_failed_tests) > int(retestall_num_of_failed_tests):
+                reportOldViolation('R7', tool, config, example_id, violation_list, 'Assertion')
+        for tool in tools:
+            tool_num_of_state_diff_tests = macro_lines[config + example_id + 'V0' + tool + \
+                                                       'NumOfStateDiffTests']
+            if int(tool_num_of_state_diff_tests) > 0:
+                reportOldViolation('R7', tool, config, example_id, violation_list, 'State')
+
+class CheckRulesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.numbers_file = self.tmp_dir + '/all-examples-numbers.txt'
+        self.list_file = self.tmp_dir + '/all-examples-list.txt'
+        # small numbers, so that the tools often tie with RetestAll and with each other
+        rand = random.Random(0)
+        list_lines = ''
+        numbers_lines = ''
+        for config in CONFIGS:
+            for i in range(100):
+                example_id = str(i) + '-' + str(i + 1)
+                list_lines += config + ' ' + example_id + '\n'
+                for version in ['V0', 'V1']:
+                    for tool in ['notool'] + TOOLS:
+                        for metric in METRICS:
+                            numbers_lines += '\\DefMacro{' + config + example_id + \
+                                             version + tool + metric + '}{' + \
+                                             str(rand.randint(0, 2)) + '}\n'
+        with open(self.list_file, 'w') as fw:
+            fw.write(list_lines)
+        with open(self.numbers_file, 'w') as fw:
+            fw.write(numbers_lines)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def checkOldRules(self):
+        macro_lines = loadMacros(self.numbers_file)
+        violation_list = []
+        checkOldRuleR1(macro_lines, violation_list, self.list_file)
+        checkOldRuleR2AndR4('R2', macro_lines, violation_list, self.list_file)
+        checkOldRuleR3(macro_lines, violation_list, self.list_file)
+        checkOldRuleR2AndR4('R4', macro_lines, violation_list, self.list_file)
+        checkOldRuleR6(macro_lines, violation_list, self.list_file)
+        checkOldRuleR7(macro_lines, violation_list, self.list_file)
+        return violation_list
+
+    def checkRules(self):
+        results = loadResults(self.numbers_file, self.list_file)
+        violation_list = ViolationStore(VIOLATION_FIELDS, VIOLATION_KEY_FIELDS)
+        for checkRule in [checkRuleR1, checkRuleR2, checkRuleR3, checkRuleR4, checkRuleR6, \
+                          checkRuleR7]:
+            checkRule(results, violation_list)
+        return list(violation_list)
+
+    def testSameAsOldRules(self):
+        old_violations = self.checkOldRules()
+        # same violations, in the same order
+        self.assertEqual(self.checkRules(), old_violations)
+        # every rule is found on some examples, but not on all
+        num_of_checks = 3 * len(CONFIGS) * 100
+        for rule in ['R1', 'R2', 'R3', 'R4', 'R6', 'R7']:
+            num_of_violations = len([v for v in old_violations if v[0] == rule])
+            self.assertTrue(0 < num_of_violations < num_of_checks, rule)
+
+    def testNoExamples(self):
+        with open(self.list_file, 'w') as fw:
+            fw.write('')
+        self.assertEqual(self.checkRules(), [])
+
+if __name__ == '__main__':
+    unittest.main()
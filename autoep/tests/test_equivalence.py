@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from equivalence import normalizeJavaSource, areEquivalent
+
+SOURCE = '''package Package_0;
+
+public class ClassId_0 {
+  int fieldid_0 = 0;
+  int methodid_0() {
+    return fieldid_0++ + 1;
+  }
+}
+'''
+
+class NormalizeJavaSourceTest(unittest.TestCase):
+
+    def testFormatting(self):
+        formatted = '/* generated */\npackage   Package_0;\npublic class ClassId_0\n{\n' + \
+                    '\tint fieldid_0=0; // a field\n' + \
+                    '\tint methodid_0(){return fieldid_0++ +1;}\n}'
+        self.assertEqual(normalizeJavaSource(formatted), normalizeJavaSource(SOURCE))
+        self.assertEqual(normalizeJavaSource('int  i=0;'), 'int i = 0 ;')
+
+    def testOperators(self):
+        self.assertNotEqual(normalizeJavaSource('i++ + j'), normalizeJavaSource('i + ++j'))
+        self.assertEqual(normalizeJavaSource('i>>>=1'), 'i >>>= 1')
+
+    def testLiterals(self):
+        # not comments, nor whitespace to drop
+        self.assertEqual(normalizeJavaSource('s = "// a  b";'), 's = "// a  b" ;')
+        self.assertEqual(normalizeJavaSource("c = '/';"), "c = '/' ;")
+        self.assertNotEqual(normalizeJavaSource('s = "a b";'), normalizeJavaSource('s = "a  b";'))
+
+class AreEquivalentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.v0_tree = {'pom.xml': '<project/>\n', \
+                        'src/main/java/Package_0/ClassId_0.java': SOURCE, \
+                        'src/test/java/Package_0/TestGroup4Case0.java': 'class T {}\n'}
+
+    def testOnlyMainSourcesMatter(self):
+        v1_tree = dict(self.v0_tree)
+        v1_tree['pom.xml'] = '<project></project>\n'
+        v1_tree['src/test/java/Package_0/TestGroup4Case0.java'] = 'class T { int i; }\n'
+        v1_tree['src/main/java/Package_0/ClassId_0.java'] = SOURCE.replace('  ', '    ')
+        v1_tree['src/main/java/Package_0/notes.txt'] = 'not java\n'
+        self.assertTrue(areEquivalent(self.v0_tree, v1_tree))
+
+    def testChangedProgram(self):
+        v1_tree = dict(self.v0_tree)
+        v1_tree['src/main/java/Package_0/ClassId_0.java'] = SOURCE.replace('+ 1', '+ 2')
+        self.assertFalse(areEquivalent(self.v0_tree, v1_tree))
+
+    def testMovedOrAddedClass(self):
+        v1_tree = dict(self.v0_tree)
+        v1_tree['src/main/java/Package_0/ClassId_1.java'] = \
+            v1_tree.pop('src/main/java/Package_0/ClassId_0.java')
+        self.assertFalse(areEquivalent(self.v0_tree, v1_tree))
+        v1_tree = dict(self.v0_tree)
+        v1_tree['src/main/java/Package_0/ClassId_1.java'] = ''
+        self.assertFalse(areEquivalent(self.v0_tree, v1_tree))
+
+if __name__ == '__main__':
+    unittest.main()
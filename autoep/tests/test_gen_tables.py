@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from gen_tables import genAllExamplesNumbers, EQUIVALENCE_INDEX_NAME
+
+LOG = '''Running Package_0.TestGroup0
+===== Package_0.TestGroup0
+Tests run: 1, Failures: 0, Errors: 0, Skipped: 0
+'''
+
+class GenAllExamplesNumbersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.results_dir = self.tmp_dir + '/_results'
+        # default-copy-field: all the examples were skipped as equivalent, so no results dir
+        # default-next-program-in-order: one example run, one skipped as equivalent
+        # default-add-extends: no example
+        os.makedirs(self.results_dir)
+        with open(self.results_dir + '/' + EQUIVALENCE_INDEX_NAME, 'w') as fw:
+            fw.write('default-copy-field 1\n')
+            fw.write('default-copy-field 2\n')
+            fw.write('default-next-program-in-order 2-3\n')
+        for version in ['0', '1']:
+            log_dir = self.results_dir + '/default-next-program-in-order/1-2/' + version
+            os.makedirs(log_dir)
+            with open(log_dir + '/notool.log', 'w') as fw:
+                fw.write(LOG)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def genNumbers(self):
+        genAllExamplesNumbers(['default'], ['add-extends', 'copy-field', \
+                                            'next-program-in-order'], ['notool'], \
+                              self.results_dir, self.tmp_dir + '/numbers.tex', \
+                              self.tmp_dir + '/list.txt', self.tmp_dir + '/numbers.txt')
+        with open(self.tmp_dir + '/numbers.tex', 'r') as fr:
+            return fr.read().splitlines()
+
+    def testAllEquivalent(self):
+        lines = self.genNumbers()
+        self.assertIn('\\DefMacro{defaultcopy-fieldNumOfEvolvedPrograms}{2}', lines)
+        self.assertIn('\\DefMacro{defaultcopy-fieldNumOfEquivalentEvolvedPrograms}{2}', lines)
+        self.assertIn('\\DefMacro{defaultcopy-fieldNumOfValidEvolvedPrograms}{0}', lines)
+        self.assertIn('\\DefMacro{JD1E2NumOfEvolvedPrograms}{2}', lines)
+
+    def testSomeEquivalent(self):
+        lines = self.genNumbers()
+        self.assertIn('\\DefMacro{defaultnext-program-in-orderNumOfEvolvedPrograms}{2}', lines)
+        self.assertIn('\\DefMacro{defaultnext-program-in-orderNumOfValidEvolvedPrograms}{1}', \
+                      lines)
+        # the base programs of the equivalent examples count too
+        self.assertIn('\\DefMacro{defaultNumOfBasePrograms}{2}', lines)
+        with open(self.tmp_dir + '/list.txt', 'r') as fr:
+            self.assertEqual(fr.read(), 'default-next-program-in-order 1-2\n')
+
+    def testNoExamples(self):
+        lines = self.genNumbers()
+        self.assertIn('\\DefMacro{defaultadd-extendsNumOfEvolvedPrograms}{0}', lines)
+        self.assertIn('\\DefMacro{defaultadd-extendsNumOfValidEvolvedPrograms}{0}', lines)
+
+if __name__ == '__main__':
+    unittest.main()
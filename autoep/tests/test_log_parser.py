@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import collections
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from log_parser import parseLog, CLOVER_SNIFFER
+
+# A <tool>.log with passing and failing asserts of each kind, a clover sniffer and tests
+# without objects
+LOG = '''-------------------------------------------------------
+ T E S T S
+-------------------------------------------------------
+Running Package_0.TestGroup0
+Assert: null null
+Assert: not null Package_0.Class_0@1
+Assert: 1 == 1 1
+OBJECT: Package_0.Class_0#2 {f=1}
+OBJECT: Package_0.Class_1#1 {}
+===== Package_0.TestGroup0
+Running Package_0.TestGroup1
+Assert: 1 == 2 1
+Assert: null null
+OBJECT: Package_0.Class_0#2 {''' + CLOVER_SNIFFER + ''', f=2}
+===== Package_0.TestGroup1
+Running Package_0.TestGroup2
+Assert: not null null
+===== Package_0.TestGroup2
+Running Package_0.TestGroup3
+Assert: null Package_0.Class_0@2
+OBJECT: Package_0.Class_1#2 {''' + CLOVER_SNIFFER + '''}
+===== Package_0.TestGroup3
+Tests run: 4, Failures: 0, Errors: 0, Skipped: 0, Time elapsed: 0.1 sec
+
+Results :
+
+Tests run: 4, Failures: 0, Errors: 0, Skipped: 0
+'''
+
+# The parsers gen_tables.py used before log_parser.py, each reading the whole log
+
+def extractNumOfTestRuns(log):
+    f = open(log, 'r')
+    lines = f.readlines()
+    f.close()
+    num_of_test_runs = '0'
+    for i in range(len(lines)):
+        if lines[i].startswith('Tests run:') and \
+           'Time elapsed:' not in lines[i]:
+            num_of_test_runs = lines[i].split(',')[0].split(' ')[-1]
+    return num_of_test_runs
+
+def extractListOfAssertionFailingTestsFromLog(log):
+    f = open(log, 'r')
+    lines = f.readlines()
+    f.close()
+    failing_tests_list = []
+    for i in range(len(lines)):
+        if lines[i].startswith('Running Package_0.TestGroup'):
+            test_name = lines[i].strip().split('.')[1]
+            for j in range(i+1, len(lines)):
+                if lines[j].startswith('Assert: null'):
+                    actual_value = lines[j].strip().split(' ')[-1]
+                    if actual_value == 'null':
+                        pass
+                    else:
+                        failing_tests_list.append(test_name)
+                        break
+                elif lines[j].startswith('Assert: not null'):
+                    actual_value = lines[j].strip().split(' ')[-1]
+                    if not actual_value == 'null':
+                        pass
+                    else:
+                        failing_tests_list.append(test_name)
+                        break
+                elif lines[j].startswith('Assert: ') and '==' in lines[j]:
+                    actual_value = lines[j].strip().split(' ')[-2]
+                    expected_value = lines[j].strip().split(' ')[-1]
+                    if expected_value == actual_value:
+                        pass
+                    else:
+                        failing_tests_list.append(test_name)
+                        break
+                else:
+                    break
+    return failing_tests_list
+
+def extractDictOfObjectStates(log, exclude_clover_sniffer=True):
+    f = open(log, 'r')
+    lines = f.readlines()
+    f.close()
+    objects_dict = collections.OrderedDict({})
+    for i in range(len(lines)):
+        if lines[i].startswith('===== Package_0.TestGroup'):
+            test_name = lines[i].strip().split('.')[1]
+            objects_dict[test_name] = []
+            j = i-1
+            while j >= 0:
+                if lines[j].startswith('OBJECT:'):
+                    obj = lines[j].strip()
+                    if exclude_clover_sniffer:
+                        if CLOVER_SNIFFER in lines[j]:
+                            num_of_objects = int(lines[j].strip().split('#')[1].split(' ')[0])
+                            old_num_of_objects = str(num_of_objects)
+                            new_num_of_objects = str(num_of_objects - 1)
+                            obj = obj.replace('#' + old_num_of_objects, '#' + new_num_of_objects)
+                            obj = obj.replace(CLOVER_SNIFFER + ', ', '').replace(CLOVER_SNIFFER, '')
+                    objects_dict[test_name].append(obj)
+                    j -= 1
+                else:
+                    break
+    return objects_dict
+
+class LogParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_file = self.tmp_dir + '/notool.log'
+        with open(self.log_file, 'w') as fw:
+            fw.write(LOG)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assertSameAsOldParsers(self, record):
+        self.assertEqual(record.num_of_test_runs, extractNumOfTestRuns(self.log_file))
+        self.assertEqual(record.assertion_failing_tests, \
+                         extractListOfAssertionFailingTestsFromLog(self.log_file))
+        self.assertEqual(record.object_states, extractDictOfObjectStates(self.log_file))
+
+    def testSameAsOldParsers(self):
+        record = parseLog(self.log_file)
+        self.assertSameAsOldParsers(record)
+        self.assertEqual(record.num_of_test_runs, '4')
+        self.assertEqual(record.assertion_failing_tests, ['TestGroup1', 'TestGroup2', \
+                                                          'TestGroup3'])
+        # without the clover sniffer
+        self.assertEqual(record.object_states['TestGroup1'], \
+                         ['OBJECT: Package_0.Class_0#1 {f=2}'])
+        self.assertEqual(record.object_states['TestGroup2'], [])
+
+    def testWithCloverSniffer(self):
+        self.assertEqual(parseLog(self.log_file, False).object_states, \
+                         extractDictOfObjectStates(self.log_file, False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../..'))
+from log_parser import LogRecord, parseLog
+from common.parse_cache import ParseCache
+
+LOG = '''Running Package_0.TestGroup0
+Assert: 1 == 2 1
+OBJECT: Package_0.Class_0#1 {f=1}
+===== Package_0.TestGroup0
+Running Package_0.TestGroup1
+OBJECT: Package_0.Class_0#1 {f=2}
+===== Package_0.TestGroup1
+Tests run: 2, Failures: 0, Errors: 0, Skipped: 0
+'''
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_file = self.tmp_dir + '/notool.log'
+        with open(self.log_file, 'w') as fw:
+            fw.write(LOG)
+        self.cache = ParseCache(self.tmp_dir + '/parsed-logs.db', 'autoep-log')
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def getRecord(self):
+        # as gen_tables.py reads records
+        return LogRecord(*self.cache.get(self.log_file, parseLog))
+
+    def assertCounts(self, num_of_hits, num_of_misses):
+        self.assertEqual((self.cache.num_of_hits, self.cache.num_of_misses), \
+                         (num_of_hits, num_of_misses))
+
+    def testSameRecordsAsParser(self):
+        self.assertEqual(self.getRecord(), parseLog(self.log_file))
+        self.assertEqual(self.getRecord(), parseLog(self.log_file))
+        self.assertCounts(1, 1)
+
+    def testTouchedLog(self):
+        self.getRecord()
+        os.utime(self.log_file, (time.time() + 10, time.time() + 10))
+        # same content, served from the cache
+        self.assertEqual(self.getRecord(), parseLog(self.log_file))
+        self.assertCounts(1, 1)
+
+    def testChangedLog(self):
+        self.getRecord()
+        with open(self.log_file, 'w') as fw:
+            # same size, other content
+            fw.write(LOG.replace('Tests run: 2', 'Tests run: 3'))
+        record = self.getRecord()
+        self.assertEqual(record, parseLog(self.log_file))
+        self.assertEqual(record.num_of_test_runs, '3')
+        self.assertCounts(0, 2)
+
+    def testPersistent(self):
+        self.getRecord()
+        self.cache.close()
+        self.cache = ParseCache(self.tmp_dir + '/parsed-logs.db', 'autoep-log')
+        self.assertEqual(self.getRecord(), parseLog(self.log_file))
+        self.assertCounts(1, 0)
+        # the records of another parser are kept apart
+        other_cache = ParseCache(self.tmp_dir + '/parsed-logs.db', 'defectsep-log')
+        other_cache.get(self.log_file, parseLog)
+        self.assertEqual(other_cache.num_of_misses, 1)
+        other_cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
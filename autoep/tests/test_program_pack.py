@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+import program_pack
+from program_pack import packConfig, isPacked, listPackedExamples, materializeExample, \
+                         readExampleTree, readTree, readTreeInfo, pruneBases, BASES_DIR, \
+                         EXAMPLES_FILE
+
+def writeFiles(root, files):
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fw:
+            fw.write(content)
+
+class ProgramPackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.umask = os.umask(0)
+        os.umask(self.umask)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def makeConfig(self, config, field='f'):
+        ''' Two examples evolved from the same V0 (copies of it, as separateEvolvedPrograms
+        makes them): V1 changes, adds and removes files, adds an empty dir and changes a mode.
+        '''
+        programs_dir = self.tmp_dir + '/' + config + '/program0'
+        v0_dir = self.tmp_dir + '/' + config + '/v0'
+        writeFiles(v0_dir, {'pom.xml': '<project/>\n', \
+                            'src/main/java/A.java': 'class A {\n  int ' + field + ';\n}\n', \
+                            'src/main/java/B.java': 'class B {}\n', \
+                            'run.sh': '#!/bin/sh\n'})
+        os.makedirs(v0_dir + '/target/classes')
+        os.chmod(v0_dir + '/run.sh', 0o755)
+        for example in ['p1-1', 'p1-2']:
+            shutil.copytree(v0_dir, programs_dir + '/' + example + '/0')
+            v1_dir = programs_dir + '/' + example + '/1'
+            writeFiles(v1_dir, {'pom.xml': '<project/>\n', \
+                                'src/main/java/A.java': 'class A {\n  int g;\n}\n', \
+                                'src/main/java/C.java': 'class C extends A {}', \
+                                'run.sh': '#!/bin/sh\n'})
+            os.makedirs(v1_dir + '/target/classes')
+            os.makedirs(v1_dir + '/lib')
+            os.utime(v1_dir + '/pom.xml', (1000000000, 1000000000))
+        return programs_dir
+
+    def testRoundTrip(self):
+        programs_dir = self.makeConfig('default-copy-field')
+        pack_dir = self.tmp_dir + '/default-copy-field.pack'
+        self.assertEqual(packConfig(programs_dir, pack_dir), ['p1-1', 'p1-2'])
+        self.assertTrue(isPacked(pack_dir))
+        self.assertEqual(listPackedExamples(pack_dir), ['p1-1', 'p1-2'])
+        # both examples evolve from the same V0
+        self.assertEqual(len(os.listdir(pack_dir + '/' + BASES_DIR)), 1)
+        for example in ['p1-1', 'p1-2']:
+            for version in ['0', '1']:
+                prog_dir = programs_dir + '/' + example + '/' + version
+                dest_dir = self.tmp_dir + '/out/' + example + '/' + version
+                materializeExample(pack_dir, example, version, dest_dir)
+                self.assertEqual(readTree(dest_dir), readTree(prog_dir))
+                self.assertEqual(readExampleTree(pack_dir, example, version), \
+                                 readTree(prog_dir))
+                # dirs (empty ones too), modes and mtimes
+                self.assertEqual(readTreeInfo(dest_dir), readTreeInfo(prog_dir))
+
+    def testInfoStoredWithBase(self):
+        programs_dir = self.makeConfig('default-copy-field')
+        pack_dir = self.tmp_dir + '/default-copy-field.pack'
+        os.utime(programs_dir + '/p1-2/0/src/main/java/B.java', (1000000000, 1000000000))
+        packConfig(programs_dir, pack_dir)
+        with open(pack_dir + '/' + EXAMPLES_FILE, 'r') as fr:
+            examples = json.load(fr)
+        # the info of V0 is in the base, the examples only keep what differs from it
+        self.assertEqual(examples['p1-1']['info_delta'], {})
+        self.assertEqual(examples['p1-2']['info_delta'], \
+                         {'src/main/java/B.java': [0o644 & ~self.umask, 1000000000]})
+        self.assertEqual(examples['p1-1']['info_patch']['pom.xml'][1], 1000000000)
+        materializeExample(pack_dir, 'p1-2', '0', self.tmp_dir + '/out')
+        self.assertEqual(readTreeInfo(self.tmp_dir + '/out'), \
+                         readTreeInfo(programs_dir + '/p1-2/0'))
+
+    def testPackAgain(self):
+        programs_dir = self.makeConfig('default-copy-field')
+        pack_dir = self.tmp_dir + '/default-copy-field.pack'
+        packConfig(programs_dir, pack_dir)
+        self.assertEqual(listPackedExamples(pack_dir), ['p1-1', 'p1-2'])
+        stale_entry = program_pack._examples_cache[pack_dir]
+        shutil.rmtree(pack_dir)
+        shutil.rmtree(programs_dir + '/p1-1')
+        packConfig(programs_dir, pack_dir)
+        self.assertEqual(listPackedExamples(pack_dir), ['p1-2'])
+        # packed again by another process, e.g. the producer of the pipeline
+        program_pack._examples_cache[pack_dir] = stale_entry
+        self.assertEqual(listPackedExamples(pack_dir), ['p1-2'])
+
+    def testSharedBases(self):
+        bases_dir = self.tmp_dir + '/default' + '.bases'
+        for config in ['default-copy-field', 'default-copy-method']:
+            packConfig(self.makeConfig(config), self.tmp_dir + '/' + config + '.pack', \
+                       bases_dir)
+        self.assertEqual(len(os.listdir(bases_dir)), 1)
+        pack_dir = self.tmp_dir + '/default-copy-method.pack'
+        shutil.rmtree(self.tmp_dir + '/default-copy-field.pack')
+        self.assertEqual(len(os.listdir(bases_dir)), 1)
+        materializeExample(pack_dir, 'p1-2', '1', self.tmp_dir + '/out')
+        self.assertEqual(readTree(self.tmp_dir + '/out'), \
+                         readTree(self.tmp_dir + '/default-copy-method/program0/p1-2/1'))
+
+    def testPruneBases(self):
+        bases_dir = self.tmp_dir + '/default' + '.bases'
+        for config in ['default-copy-field', 'default-copy-method']:
+            packConfig(self.makeConfig(config), self.tmp_dir + '/' + config + '.pack', \
+                       bases_dir)
+        self.assertEqual(pruneBases(bases_dir, self.tmp_dir), 0)
+        # packed again from another V0, the old base is used by the other pack only
+        pack_dir = self.tmp_dir + '/default-copy-field.pack'
+        shutil.rmtree(pack_dir)
+        shutil.rmtree(self.tmp_dir + '/default-copy-field')
+        packConfig(self.makeConfig('default-copy-field', 'g'), pack_dir, bases_dir)
+        self.assertEqual(pruneBases(bases_dir, self.tmp_dir), 0)
+        self.assertEqual(len(os.listdir(bases_dir)), 2)
+        shutil.rmtree(self.tmp_dir + '/default-copy-method.pack')
+        self.assertEqual(pruneBases(bases_dir, self.tmp_dir), 1)
+        materializeExample(pack_dir, 'p1-1', '0', self.tmp_dir + '/out')
+        self.assertEqual(readTree(self.tmp_dir + '/out'), \
+                         readTree(self.tmp_dir + '/default-copy-field/program0/p1-1/0'))
+
+if __name__ == '__main__':
+    unittest.main()
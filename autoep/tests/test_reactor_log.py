@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from run_autoep import splitReactorLog
+
+# mvn -fn test on a batch of two modules and the aggregator, the second module fails
+REACTOR_LOG = '''[INFO] Scanning for projects...
+[INFO] ------------------------------------------------------------------------
+[INFO] Reactor Build Order:
+[INFO]
+[INFO] rtsgen-1-2                                                         [jar]
+[INFO] rtsgen-3-4                                                         [jar]
+[INFO] rtsgen-batch                                                       [pom]
+[INFO]
+[INFO] -------------------------< rtsgen:rtsgen-1-2 >--------------------------
+[INFO] Building rtsgen-1-2 1                                              [1/3]
+[INFO] --------------------------------[ jar ]---------------------------------
+Running Package_0.TestGroup0
+===== Package_0.TestGroup0
+Tests run: 1, Failures: 0, Errors: 0, Skipped: 0
+[INFO] -------------------------< rtsgen:rtsgen-3-4 >--------------------------
+[INFO] Building rtsgen-3-4 1                                              [2/3]
+[INFO] --------------------------------[ jar ]---------------------------------
+[ERROR] COMPILATION ERROR :
+[INFO] ------------------------< rtsgen:rtsgen-batch >-------------------------
+[INFO] Building rtsgen-batch 1                                            [3/3]
+[INFO] --------------------------------[ pom ]---------------------------------
+[INFO] ------------------------------------------------------------------------
+[INFO] Reactor Summary for rtsgen-batch 1:
+[INFO]
+[INFO] rtsgen-1-2 ......................................... SUCCESS [  1.000 s]
+[INFO] rtsgen-3-4 ......................................... FAILURE [  0.500 s]
+[INFO] rtsgen-batch ....................................... SUCCESS [  0.001 s]
+'''
+
+class SplitReactorLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_file = self.tmp_dir + '/notool-0.log'
+        with open(self.log_file, 'w') as fw:
+            fw.write(REACTOR_LOG)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def testSplit(self):
+        lines = REACTOR_LOG.splitlines(True)
+        module_lines = splitReactorLog(self.log_file, ['1-2', '3-4'])
+        self.assertEqual(sorted(module_lines.keys()), ['1-2', '3-4'])
+        # from the line after "Building" to the next "Building" line
+        self.assertEqual(module_lines['1-2'], lines[10:15])
+        # nothing of the aggregator or of the summary
+        self.assertEqual(module_lines['3-4'], lines[16:19])
+
+    def testModuleNotBuilt(self):
+        # e.g. a module maven skipped: an empty log, which parses as no test run
+        module_lines = splitReactorLog(self.log_file, ['1-2', '5-6'])
+        self.assertEqual(module_lines['5-6'], [])
+        self.assertEqual(len(module_lines['1-2']), 5)
+
+if __name__ == '__main__':
+    unittest.main()
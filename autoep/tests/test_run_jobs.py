@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import contextlib
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+import run_autoep
+from run_autoep import runJobs
+
+class RunJobsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.job_list = [(tool, 'default', 'copy-field', example) \
+                         for example in ['1', '2', '3'] for tool in ['notool', 'ekstazi']]
+        tmp_dir = self.tmp_dir
+        def runOneToolOnOneExample(tool, gen, evo, example, **run_opts):
+            if example == '2' and tool == 'ekstazi':
+                raise RuntimeError('broken example')
+            # a file, as the job may run in a worker process
+            open(tmp_dir + '/' + example + '-' + tool, 'w').close()
+        self.patch = mock.patch.object(run_autoep, 'runOneToolOnOneExample', \
+                                       runOneToolOnOneExample)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def runJobs(self, jobs):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            runJobs(self.job_list, jobs)
+        return output.getvalue().splitlines()
+
+    def assertOtherJobsRan(self):
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), \
+                         ['1-ekstazi', '1-notool', '2-notool', '3-ekstazi', '3-notool'])
+
+    def testSerial(self):
+        lines = self.runJobs(1)
+        self.assertEqual(lines, ['[RTSCheck] Failed: default-copy-field 2 ekstazi: ' + \
+                                 'broken example'])
+        self.assertOtherJobsRan()
+
+    def testPool(self):
+        lines = self.runJobs(2)
+        self.assertIn('[RTSCheck] Failed: default-copy-field 2 ekstazi: broken example', lines)
+        self.assertEqual(len([line for line in lines if 'Failed' in line]), 1)
+        self.assertEqual(len([line for line in lines if 'Finished' in line]), 5)
+        self.assertIn('[RTSCheck] Finished: default-copy-field 3 notool', lines)
+        self.assertOtherJobsRan()
+
+if __name__ == '__main__':
+    unittest.main()
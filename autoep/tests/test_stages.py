@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+import run_autoep
+from run_autoep import runStages, pruneStages, runRandoopStage, getStageDir, \
+                       readStageManifest
+
+def writeFiles(root, files):
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fw:
+            fw.write(content)
+
+class StagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = self.tmp_dir + '/default-copy-field'
+        self.stages = ['evolved', 'separated']
+        self.stage_runs = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def runStage(self, stage):
+        def runOneStage(stage_dir, root_list):
+            self.stage_runs.append(stage)
+            if len(root_list) == 0:
+                root_list = [stage_dir + '/program0/' + str(i) for i in range(3)]
+            for root in root_list:
+                writeFiles(root, {stage + '.txt': stage})
+            return root_list
+        return runOneStage
+
+    def runAllStages(self, rerun_stages={}):
+        stage_functions = dict([(stage, self.runStage(stage)) for stage in self.stages])
+        return runStages(self.path, self.stages, stage_functions, rerun_stages=rerun_stages)
+
+    def testRunOnce(self):
+        root_list = self.runAllStages()
+        self.assertEqual(self.stage_runs, ['evolved', 'separated'])
+        self.assertEqual(root_list, [self.path + '/program0/' + str(i) for i in range(3)])
+        # the tree after each stage
+        self.assertTrue(os.path.isfile(getStageDir(self.path, 'evolved', self.stages) + \
+                                       '/program0/0/evolved.txt'))
+        self.assertFalse(os.path.exists(getStageDir(self.path, 'evolved', self.stages) + \
+                                        '/program0/0/separated.txt'))
+        self.assertEqual(sorted(os.listdir(self.path + '/program0/0')), \
+                         ['evolved.txt', 'separated.txt'])
+        self.stage_runs = []
+        self.assertEqual(self.runAllStages(), root_list)
+        self.assertEqual(self.stage_runs, [])
+
+    def testResumeAfterIncompleteStage(self):
+        self.runAllStages()
+        # as if the last stage crashed: no manifest
+        os.remove(self.path + '.stages/separated.txt')
+        self.stage_runs = []
+        self.runAllStages()
+        self.assertEqual(self.stage_runs, ['separated'])
+
+    def testRerunStages(self):
+        self.runAllStages()
+        self.stage_runs = []
+        self.runAllStages({'evolved': time.time()})
+        # the stages after a stage that ran again run again too
+        self.assertEqual(self.stage_runs, ['evolved', 'separated'])
+
+    def testPrunedStages(self):
+        root_list = self.runAllStages()
+        shutil.rmtree(self.path)
+        pruneStages(self.path, self.stages, self.path + '.pack')
+        self.assertFalse(os.path.exists(getStageDir(self.path, 'evolved', self.stages)))
+        with open(self.path + '.stages/separated.txt', 'r') as fr:
+            self.assertIn('# packed in ' + self.path + '.pack\n', fr.read())
+        # still complete
+        self.stage_runs = []
+        self.assertEqual(self.runAllStages(), root_list)
+        self.assertEqual(readStageManifest(self.path, 'separated', self.stages)[1], root_list)
+        self.assertEqual(self.stage_runs, [])
+        # the checkpoint of evolved is gone, so it runs again before separated
+        self.runAllStages({'separated': time.time()})
+        self.assertEqual(self.stage_runs, ['evolved', 'separated'])
+
+class RandoopStageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = self.tmp_dir + '/randoop-cache'
+        self.randoop_runs = []
+        self.killed_after = None
+        cache_dir = self.cache_dir
+        restore = run_autoep.restoreRandoopTests
+        store = run_autoep.storeRandoopTests
+        self.patches = [mock.patch.object(run_autoep, 'runRandoopOnOneProgram', \
+                                          self.fakeRandoop), \
+                        mock.patch.object(run_autoep, 'getRandoopWorkers', lambda: 1), \
+                        mock.patch.object(run_autoep, 'cleanAutoGenMvenProjects', \
+                                          lambda root_list: None), \
+                        mock.patch.object(run_autoep, 'restoreRandoopTests', \
+                                          lambda key, root: restore(key, root, cache_dir)), \
+                        mock.patch.object(run_autoep, 'storeRandoopTests', \
+                                          lambda key, root: store(key, root, cache_dir))]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def fakeRandoop(self, root, test_method_max_size, *args):
+        if self.killed_after is not None and len(self.randoop_runs) >= self.killed_after:
+            raise KeyboardInterrupt()
+        self.randoop_runs.append(os.path.basename(root))
+        writeFiles(root + '/0/src/test/java/Package_0', \
+                   {'TestGroup4Case0.java': 'public class TestGroup4Case0 {\n' + \
+                                            '  @Test\n  public void test() {}\n}\n'})
+        return 1
+
+    def runBaseStages(self):
+        def runCompiledStage(stage_dir, root_list):
+            root_list = []
+            for i in range(6):
+                root = stage_dir + '/program0/' + str(i)
+                writeFiles(root + '/0', {'src/main/java/Package_0/ClassId_0.java': \
+                                         'class ClassId_0 { int f = ' + str(i) + '; }\n', \
+                                         'target/classes/Package_0/ClassId_0.class': str(i)})
+                root_list.append(root)
+            return root_list
+        stage_functions = {'compiled': runCompiledStage, \
+                           'randoop': lambda stage_dir, root_list: \
+                                      runRandoopStage('default', stage_dir, root_list)}
+        return runStages(self.tmp_dir + '/default', ['compiled', 'randoop'], stage_functions)
+
+    def testResumeAfterKill(self):
+        self.killed_after = 3
+        with self.assertRaises(KeyboardInterrupt):
+            self.runBaseStages()
+        # the runs that finished before the kill are kept
+        self.assertEqual(self.randoop_runs, ['0', '1', '2'])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+        self.killed_after = None
+        self.randoop_runs = []
+        root_list = self.runBaseStages()
+        self.assertEqual(self.randoop_runs, ['3', '4', '5'])
+        for root in root_list:
+            with open(root + '/0/src/test/java/Package_0/TestGroup4Case0.java', 'r') as fr:
+                # rewritten once, whether restored or run
+                self.assertEqual(fr.read().count('printAndClean'), 1)
+        # complete, nothing runs again
+        self.randoop_runs = []
+        self.assertEqual(self.runBaseStages(), root_list)
+        self.assertEqual(self.randoop_runs, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from run_autoep import syncTree, materializeTree
+from program_pack import readTree
+
+def writeFiles(root, files):
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fw:
+            fw.write(content)
+
+class SyncTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # V0 sources, the sandbox made from them, and the V1 sources
+        writeFiles(self.tmp_dir + '/v0', {'p/A.java': 'class A {}\n', \
+                                          'p/B.java': 'class B {}\n', \
+                                          'q/C.java': 'class C {}\n'})
+        writeFiles(self.tmp_dir + '/v1', {'p/A.java': 'class A { int f; }\n', \
+                                          'p/B.java': 'class B {}\n', \
+                                          'r/D.java': 'class D {}\n'})
+        os.makedirs(self.tmp_dir + '/v1/empty')
+        materializeTree(self.tmp_dir + '/v0', self.tmp_dir + '/sandbox')
+        past = 1000000000
+        for rel_path in ['p/A.java', 'p/B.java', 'q/C.java']:
+            os.utime(self.tmp_dir + '/sandbox/' + rel_path, (past, past))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def testSameTree(self):
+        syncTree(self.tmp_dir + '/v1', self.tmp_dir + '/sandbox')
+        self.assertEqual(readTree(self.tmp_dir + '/sandbox'), readTree(self.tmp_dir + '/v1'))
+        self.assertTrue(os.path.isdir(self.tmp_dir + '/sandbox/empty'))
+        self.assertFalse(os.path.exists(self.tmp_dir + '/sandbox/q'))
+
+    def testOnlyChangedFilesAreWritten(self):
+        syncTree(self.tmp_dir + '/v1', self.tmp_dir + '/sandbox')
+        # unchanged: same mtime, so maven does not recompile it
+        self.assertEqual(os.stat(self.tmp_dir + '/sandbox/p/B.java').st_mtime, 1000000000)
+        self.assertNotEqual(os.stat(self.tmp_dir + '/sandbox/p/A.java').st_mtime, 1000000000)
+
+    def testSharedFilesAreNotChanged(self):
+        syncTree(self.tmp_dir + '/v1', self.tmp_dir + '/sandbox')
+        # the sandbox shared the files of v0 (materializeTree), v0 keeps its content
+        self.assertEqual(readTree(self.tmp_dir + '/v0'), \
+                         {'p/A.java': 'class A {}\n', 'p/B.java': 'class B {}\n', \
+                          'q/C.java': 'class C {}\n'})
+
+    def testDirAndFileSwapped(self):
+        # q is a dir in the sandbox and a file in v1, p/B.java the other way round
+        os.remove(self.tmp_dir + '/v1/p/B.java')
+        writeFiles(self.tmp_dir + '/v1', {'q': 'not a dir\n', 'p/B.java/E.java': 'class E {}\n'})
+        syncTree(self.tmp_dir + '/v1', self.tmp_dir + '/sandbox')
+        self.assertEqual(readTree(self.tmp_dir + '/sandbox'), readTree(self.tmp_dir + '/v1'))
+        self.assertTrue(os.path.isfile(self.tmp_dir + '/sandbox/q'))
+        self.assertTrue(os.path.isdir(self.tmp_dir + '/sandbox/p/B.java'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from run_autoep import hashProgramTree, isRelocatable, storeV0Snapshot, restoreV0Snapshot
+from program_pack import readTree
+
+def writeFiles(root, files):
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fw:
+            fw.write(content)
+
+PROGRAM = {'pom.xml': '<project/>\n', \
+           'src/main/java/Package_0/ClassId_0.java': 'class ClassId_0 {}\n', \
+           'src/test/java/Package_0/TestGroup4Case0.java': 'class TestGroup4Case0 {}\n'}
+
+class V0SnapshotsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.snapshots_dir = self.tmp_dir + '/_v0-snapshots'
+        # the V0 sandboxes of two variants of the same base program
+        self.v0_dir = self.tmp_dir + '/default-copy-field/1-ekstazi/0'
+        self.other_v0_dir = self.tmp_dir + '/default-copy-method/1-ekstazi/0'
+        writeFiles(self.v0_dir, PROGRAM)
+        writeFiles(self.other_v0_dir, PROGRAM)
+        # what running V0 leaves: the tool state, some of it with absolute paths, and a log
+        writeFiles(self.v0_dir, {'.ekstazi/Package_0.TestGroup4Case0.clz': \
+                                 'file:' + self.v0_dir + '/target/classes/ClassId_0.class\n', \
+                                 'target/classes/Package_0/ClassId_0.class': 'bytecode\n'})
+        self.log_file = self.tmp_dir + '/results/0/ekstazi.log'
+        writeFiles(self.tmp_dir + '/results/0', {'ekstazi.log': 'Tests run: 1\n'})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def testSameKey(self):
+        # the tool state is not part of the program
+        self.assertEqual(hashProgramTree(self.v0_dir), hashProgramTree(self.other_v0_dir))
+        writeFiles(self.other_v0_dir, {'src/main/java/Package_0/ClassId_0.java': \
+                                       'class ClassId_0 { int f; }\n'})
+        self.assertNotEqual(hashProgramTree(self.v0_dir), hashProgramTree(self.other_v0_dir))
+
+    def testStoreAndRestore(self):
+        key = hashProgramTree(self.v0_dir)
+        self.assertFalse(restoreV0Snapshot('ekstazi', key, self.other_v0_dir, \
+                                           self.tmp_dir + '/v0.log', self.snapshots_dir))
+        storeV0Snapshot('ekstazi', key, self.v0_dir, self.log_file, self.snapshots_dir)
+        self.assertTrue(restoreV0Snapshot('ekstazi', key, self.other_v0_dir, \
+                                          self.tmp_dir + '/v0.log', self.snapshots_dir))
+        with open(self.tmp_dir + '/v0.log', 'r') as fr:
+            self.assertEqual(fr.read(), 'Tests run: 1\n')
+        # the same tree, with the paths moved to the other sandbox
+        tree = readTree(self.other_v0_dir)
+        self.assertEqual(tree['.ekstazi/Package_0.TestGroup4Case0.clz'], \
+                         'file:' + self.other_v0_dir + '/target/classes/ClassId_0.class\n')
+        self.assertEqual(sorted(tree.keys()), sorted(readTree(self.v0_dir).keys()))
+        # snapshots of other tools are apart
+        self.assertFalse(restoreV0Snapshot('starts', key, self.other_v0_dir, \
+                                           self.tmp_dir + '/v0.log', self.snapshots_dir))
+
+    def testStoreOnce(self):
+        key = hashProgramTree(self.v0_dir)
+        storeV0Snapshot('ekstazi', key, self.v0_dir, self.log_file, self.snapshots_dir)
+        writeFiles(self.tmp_dir + '/results/0', {'ekstazi.log': 'Tests run: 2\n'})
+        storeV0Snapshot('ekstazi', key, self.v0_dir, self.log_file, self.snapshots_dir)
+        restoreV0Snapshot('ekstazi', key, self.other_v0_dir, self.tmp_dir + '/v0.log', \
+                          self.snapshots_dir)
+        with open(self.tmp_dir + '/v0.log', 'r') as fr:
+            self.assertEqual(fr.read(), 'Tests run: 1\n')
+        self.assertEqual(os.listdir(self.snapshots_dir + '/ekstazi'), [key])
+
+    def testIsRelocatable(self):
+        state_dir = self.v0_dir + '/.ekstazi'
+        # absolute paths in text files are rewritten on restore
+        self.assertTrue(isRelocatable(state_dir, self.v0_dir))
+        with open(state_dir + '/deps.bin', 'wb') as fw:
+            fw.write(b'\0\1' + self.v0_dir.encode('utf-8') + b'\0')
+        self.assertFalse(isRelocatable(state_dir, self.v0_dir))
+        # binary, but without the path
+        self.assertTrue(isRelocatable(state_dir, self.other_v0_dir))
+
+    def testNotRelocatable(self):
+        with open(self.v0_dir + '/.ekstazi/deps.bin', 'wb') as fw:
+            fw.write(b'\0\1' + self.v0_dir.encode('utf-8') + b'\0')
+        key = hashProgramTree(self.v0_dir)
+        storeV0Snapshot('ekstazi', key, self.v0_dir, self.log_file, self.snapshots_dir)
+        # V0 runs again in the other sandbox
+        self.assertFalse(restoreV0Snapshot('ekstazi', key, self.other_v0_dir, \
+                                           self.tmp_dir + '/v0.log', self.snapshots_dir))
+        self.assertEqual(os.listdir(self.snapshots_dir + '/ekstazi'), [])
+
+if __name__ == '__main__':
+    unittest.main()
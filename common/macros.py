@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+
+import re
+import collections
+import numpy as np
+import pandas as pd
+
+# numbers file -> {macro: value}, each file is parsed only once per process
+_MACRO_DICTS = {}
+
+# \DefMacro{macro}{value}
+MACRO_LINE_RE = re.compile('^\\\\DefMacro\\{([^{}]*)\\}\\{([^{}]*)\\}', re.MULTILINE)
+
+def loadMacros(numbers_file):
+    ''' Index all the \\DefMacro lines of a numbers file into a dict (the last
+    definition of a macro wins, as in LaTeX).
+    '''
+    if numbers_file not in _MACRO_DICTS:
+        with open(numbers_file, 'r') as fr:
+            _MACRO_DICTS[numbers_file] = dict(MACRO_LINE_RE.findall(fr.read()))
+    return _MACRO_DICTS[numbers_file]
+
+def getMacroValue(macro, numbers_file):
+    return loadMacros(numbers_file)[macro]
+
+def loadMacroMatrix(numbers_file, macro_re, rows):
+    ''' Load the numbers file as a DataFrame with one row per element of rows (in order).
+    macro_re splits a macro name into the row (first group) and the column, a tuple of the
+    remaining groups, e.g. 'lang30' and ('notool', 'NumOfRunTestsExcludeFlaky').
+    Macros not matching macro_re are ignored.
+    '''
+    regex = re.compile(macro_re)
+    row_positions = {}
+    for i, row in enumerate(rows):
+        row_positions[row] = i
+    columns = collections.OrderedDict({})
+    for macro, value in loadMacros(numbers_file).items():
+        match = regex.match(macro)
+        if match is None or match.group(1) not in row_positions:
+            continue
+        column = match.groups()[1:]
+        if column not in columns:
+            columns[column] = np.full(len(rows), np.nan)
+        columns[column][row_positions[match.group(1)]] = int(value)
+    return pd.DataFrame(columns, index=list(rows))
+
+def getMacroColumns(matrix, columns):
+    ''' Return the given columns of a macro matrix as a (rows x columns) numpy array.
+    '''
+    if len(matrix.index) == 0:
+        return np.zeros((0, len(columns)))
+    values = matrix[list(columns)].values
+    if np.isnan(values).any(): # same as looking up a macro which is not defined
+        raise KeyError('Missing macros for ' + str(list(columns)))
+    return values
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+
+import os
+import json
+import sqlite3
+import hashlib
+import collections
+
+# Bump when the format of the cached records changes
+PARSE_CACHE_VERSION = 1
+
+def hashFile(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as fr:
+        for chunk in iter(lambda: fr.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+class ParseCache(object):
+    ''' On-disk cache of parsed log records, shared by the gen_tables.py scripts.
+    A record is keyed by (namespace, log path) and is served from the cache while the log
+    keeps its size and mtime; if only the mtime changed, the content hash decides.
+    Records are stored as JSON, so a parser must return lists/dicts/strings/numbers.
+    '''
+
+    def __init__(self, db_file, namespace):
+        self.namespace = namespace + '-v' + str(PARSE_CACHE_VERSION)
+        self.num_of_hits = 0
+        self.num_of_misses = 0
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS records (' + \
+                          'namespace TEXT, path TEXT, size INTEGER, mtime_ns INTEGER, ' + \
+                          'sha1 TEXT, record TEXT, PRIMARY KEY (namespace, path))')
+
+    def get(self, path, parse_fn):
+        ''' Return the record of the log at path, parsing it with parse_fn only if it is new
+        or has changed since it was cached.
+        '''
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        row = self.conn.execute('SELECT size, mtime_ns, sha1, record FROM records ' + \
+                                'WHERE namespace = ? AND path = ?', \
+                                (self.namespace, path)).fetchone()
+        sha1 = None
+        if row is not None and row[0] == st.st_size:
+            if row[1] == st.st_mtime_ns:
+                self.num_of_hits += 1
+                return self.decode(row[3])
+            sha1 = hashFile(path)
+            if row[2] == sha1: # touched or copied, but the same content
+                self.conn.execute('UPDATE records SET mtime_ns = ? ' + \
+                                  'WHERE namespace = ? AND path = ?', \
+                                  (st.st_mtime_ns, self.namespace, path))
+                self.num_of_hits += 1
+                return self.decode(row[3])
+        if sha1 is None:
+            sha1 = hashFile(path)
+        self.num_of_misses += 1
+        record = parse_fn(path)
+        self.conn.execute('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)', \
+                          (self.namespace, path, st.st_size, st.st_mtime_ns, sha1, \
+                           json.dumps(record)))
+        return self.decode(json.dumps(record))
+
+    def decode(self, record):
+        # keep the order of dicts (e.g. tests in the order they appear in the log)
+        return json.loads(record, object_pairs_hook=collections.OrderedDict)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+        print ('[ParseCache]: ' + str(self.num_of_hits) + ' cached, ' + \
+               str(self.num_of_misses) + ' parsed')
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+
+import os
+import csv
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../..'))
+from common.violations import ViolationStore
+
+FIELDS = ['rule', 'gen', 'evo', 'tool', 'example', 'fail_type']
+KEY_FIELDS = ['rule', 'gen', 'evo', 'tool', 'example']
+
+class ViolationStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.added = []
+        self.store = ViolationStore(FIELDS, KEY_FIELDS, on_add=self.added.append)
+        for violation in [('R1', 'JD1', 'E2', 'clover', '1-2', 'Assertion'), \
+                          ('R1', 'JD1', 'E2', 'clover', '1-2', 'State'), \
+                          ('R1', 'JD1', 'E2', 'ekstazi', '1-2', 'State'), \
+                          ('R6', 'JD2', 'E2', 'clover', '3', 'Run'), \
+                          ['R1', 'JD1', 'E2', 'clover', '1-2', 'Assertion']]:
+            self.store.add(violation)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def testDedup(self):
+        # the State diff finds the same violation as the Assertion diff, reported once
+        self.assertEqual(list(self.store), [('R1', 'JD1', 'E2', 'clover', '1-2', 'Assertion'), \
+                                            ('R1', 'JD1', 'E2', 'ekstazi', '1-2', 'State'), \
+                                            ('R6', 'JD2', 'E2', 'clover', '3', 'Run')])
+        self.assertEqual(self.added, list(self.store))
+        self.assertFalse(self.store.add(('R6', 'JD2', 'E2', 'clover', '3', 'Run')))
+        self.assertTrue(self.store.add(('R6', 'JD2', 'E2', 'starts', '3', 'Run')))
+        self.assertIn(('R1', 'JD1', 'E2', 'ekstazi', '1-2', 'Assertion'), self.store)
+        self.assertNotIn(('R7', 'JD1', 'E2', 'ekstazi', '1-2', 'Assertion'), self.store)
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store[1][3], 'ekstazi')
+
+    def testAllFieldsAreKey(self):
+        store = ViolationStore(FIELDS)
+        store.add(('R1', 'JD1', 'E2', 'clover', '1-2', 'Assertion'))
+        self.assertTrue(store.add(('R1', 'JD1', 'E2', 'clover', '1-2', 'State')))
+        self.assertEqual(len(store), 2)
+
+    def testCountBy(self):
+        self.assertEqual(list(self.store.countBy('rule', 'tool').items()), \
+                         [(('R1', 'clover'), 1), (('R1', 'ekstazi'), 1), (('R6', 'clover'), 1)])
+        self.assertEqual(list(self.store.countBy('gen').items()), [('JD1', 2), ('JD2', 1)])
+        self.assertEqual(self.store.countBy('evo'), {'E2': 3})
+
+    def testExportJson(self):
+        self.store.exportJson(self.tmp_dir + '/violations.json')
+        with open(self.tmp_dir + '/violations.json', 'r') as fr:
+            records = json.load(fr)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0], {'rule': 'R1', 'gen': 'JD1', 'evo': 'E2', \
+                                      'tool': 'clover', 'example': '1-2', \
+                                      'fail_type': 'Assertion'})
+        self.assertEqual([tuple(record[field] for field in FIELDS) for record in records], \
+                         list(self.store))
+
+    def testExportCsv(self):
+        self.store.exportCsv(self.tmp_dir + '/violations.csv')
+        with open(self.tmp_dir + '/violations.csv', 'r', newline='') as fr:
+            rows = list(csv.reader(fr))
+        self.assertEqual(rows[0], FIELDS)
+        self.assertEqual([tuple(row) for row in rows[1:]], list(self.store))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+
+import csv
+import json
+import collections
+
+class ViolationStore(object):
+    ''' Violations in the order they are reported, with a hash index on key_fields so that
+    reporting the same violation twice is a constant-time no-op.
+    Each violation is a tuple with one value per field. on_add, if given, is called with
+    every new violation as soon as it is added (e.g. to print it).
+    '''
+
+    def __init__(self, fields, key_fields=None, on_add=None):
+        self.fields = list(fields)
+        if key_fields is None:
+            key_fields = fields
+        self.key_positions = [self.fields.index(field) for field in key_fields]
+        self.on_add = on_add
+        self.violations = []
+        self.keys = set()
+
+    def key(self, violation):
+        return tuple(violation[i] for i in self.key_positions)
+
+    def add(self, violation):
+        ''' Add a violation, return False if it was already reported.
+        '''
+        violation = tuple(violation)
+        key = self.key(violation)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        self.violations.append(violation)
+        if self.on_add is not None:
+            self.on_add(violation)
+        return True
+
+    def __contains__(self, violation):
+        return self.key(violation) in self.keys
+
+    def __iter__(self):
+        return iter(self.violations)
+
+    def __len__(self):
+        return len(self.violations)
+
+    def __getitem__(self, i):
+        return self.violations[i]
+
+    def countBy(self, *fields):
+        ''' Number of violations per value of the given fields, e.g. countBy('rule', 'tool')
+        '''
+        positions = [self.fields.index(field) for field in fields]
+        counts = collections.OrderedDict({})
+        for violation in self.violations:
+            value = tuple(violation[i] for i in positions)
+            if len(value) == 1:
+                value = value[0]
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def exportJson(self, json_file):
+        records = [collections.OrderedDict(zip(self.fields, violation)) \
+                   for violation in self.violations]
+        with open(json_file, 'w') as fw:
+            json.dump(records, fw, indent=2)
+            fw.write('\n')
+
+    def exportCsv(self, csv_file):
+        with open(csv_file, 'w', newline='') as fw:
+            writer = csv.writer(fw)
+            writer.writerow(self.fields)
+            for violation in self.violations:
+                writer.writerow(violation)
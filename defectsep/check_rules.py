@@ -10,6 +10,11 @@ import argparse
 import datetime
 import collections
 import distutils.core
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from common.macros import getMacroValue, loadMacroMatrix, getMacroColumns
+from common.violations import ViolationStore
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__)) # Dir of this script
 RUN_FIXED_THEN_BUGGY_TABLE = SCRIPT_DIR + '/tables/defectsep-fixed-buggy-table.tex'
@@ -32,6 +37,9 @@ def parseArgs(argv):
     parser.add_argument('--R5', help='Check all rule R5', action='store_true', required=False)
     parser.add_argument('--R6', help='Check all rule R6', action='store_true', required=False)
     parser.add_argument('--R7', help='Check all rule R7', action='store_true', required=False)
+    parser.add_argument('--json', help='Export the violations to a JSON file', \
+                        required=False)
+    parser.add_argument('--csv', help='Export the violations to a CSV file', required=False)
 
     if (len(argv) == 0):
         parser.print_help()
@@ -40,13 +48,36 @@ def parseArgs(argv):
     return opts
 
 def extractMacroValue(macro, numbers_tex_file):
-    fr = open(numbers_tex_file, 'r')
+    # the numbers file is indexed on the first lookup, later lookups are dict lookups
+    return getMacroValue(macro, numbers_tex_file)
+
+# DefectsEP macros are <example_id without '-'><tool><metric>, e.g. lang30notoolonceNumOfRunTests
+RESULTS_MACRO_RE = '^([a-z]+[0-9]+)(' + '|'.join(['notool'] + TOOLS) + ')([A-Za-z]+)$'
+
+# All the numbers of the examples listed in a table, matrix has one row per example and one
+# column per (tool, metric)
+Results = collections.namedtuple('Results', ['example_ids', 'matrix'])
+
+def loadResults(numbers_tex_file, table_tex_file):
+    fr = open(table_tex_file, 'r')
     lines = fr.readlines()
     fr.close()
+    example_ids = []
     for i in range(len(lines)):
-        if lines[i].startswith('\\DefMacro{' + macro):
-            value = lines[i].split('{')[2].split('}')[0]
-    return value
+        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
+            example_ids.append(lines[i].split(' & ')[0])
+    matrix = loadMacroMatrix(numbers_tex_file, RESULTS_MACRO_RE, \
+                             [example_id.replace('-', '') for example_id in example_ids])
+    return Results(example_ids, matrix)
+
+def extractMetric(results, tools, metric):
+    # (num of examples x num of tools) array
+    return getMacroColumns(results.matrix, [(tool, metric) for tool in tools])
+
+def reportViolations(rule, violations, results, violation_list, tools):
+    # violations is a boolean (example x tool) array
+    for i, j in zip(*np.nonzero(violations)):
+        reportViolation(rule, tools[j], results.example_ids[i], violation_list)
 
 def checkRuleR1(violation_list, tools=TOOLS):
     checkRuleR1OnFixedVersion(violation_list, tools=TOOLS)
@@ -55,189 +86,88 @@ def checkRuleR1(violation_list, tools=TOOLS):
 def checkRuleR1OnBuggyVersion(violation_list, tools=TOOLS, \
                               numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                               table_tex_file=RUN_FIXED_THEN_BUGGY_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + 'notoolNumOfFailedTestsExcludeFlaky'
-            retestall_num_of_failed_tests = extractMacroValue(retestall_macro, numbers_tex_file)
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + 'NumOfFailedTestsExcludeFlaky'
-                tool_num_of_failed_tests = extractMacroValue(tool_macro, numbers_tex_file)
-                if int(tool_num_of_failed_tests) < int(retestall_num_of_failed_tests):
-                    reportViolation('R1', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    violations = extractMetric(results, tools, 'NumOfFailedTestsExcludeFlaky') < \
+                 extractMetric(results, ['notool'], 'NumOfFailedTestsExcludeFlaky')
+    reportViolations('R1', violations, results, violation_list, tools)
 
 def checkRuleR1OnFixedVersion(violation_list, tools=TOOLS, \
                               numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                               table_tex_file=RUN_FIXED_THEN_BUGGY_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + \
-                              'notoolNumOfFailedTestsFixedExcludeFlaky'
-            retestall_num_of_failed_tests = extractMacroValue(retestall_macro, numbers_tex_file)
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + \
-                             'NumOfFailedTestsFixedExcludeFlaky'
-                tool_num_of_failed_tests = extractMacroValue(tool_macro, numbers_tex_file)
-                if int(tool_num_of_failed_tests) < int(retestall_num_of_failed_tests):
-                    reportViolation('R1', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    violations = extractMetric(results, tools, 'NumOfFailedTestsFixedExcludeFlaky') < \
+                 extractMetric(results, ['notool'], 'NumOfFailedTestsFixedExcludeFlaky')
+    reportViolations('R1', violations, results, violation_list, tools)
 
 def checkRuleR2(violation_list, tools=TOOLS):
     checkRuleR2OnFixedVersion(violation_list, tools)
     checkRuleR2OnBuggyVersion(violation_list, tools)
 
+def checkRuleR2OnRunTests(results, metric, violation_list, tools):
+    num_of_all_tests = extractMetric(results, ['notool'], metric)
+    num_of_run_tests = extractMetric(results, tools, metric)
+    # exactly one tool runs no test, all the others run all tests
+    only_one_runs_none = ((num_of_run_tests == 0).sum(axis=1) == 1) & \
+                         ((num_of_run_tests == num_of_all_tests).sum(axis=1) == len(tools) - 1)
+    violations = only_one_runs_none[:, None] & (num_of_run_tests == 0)
+    reportViolations('R2', violations, results, violation_list, tools)
+
 def checkRuleR2OnFixedVersion(violation_list, tools, numbers_tex_file=RUN_FIXED_TWICE_NUMBERS, \
                               table_tex_file=RUN_FIXED_TWICE_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + 'notoolonceNumOfRunTests'
-            num_of_all_tests = int(extractMacroValue(retestall_macro, numbers_tex_file))
-            num_of_run_tests_map = {}
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + 'onceNumOfRunTests'
-                tool_num_of_run_tests = int(extractMacroValue(tool_macro, numbers_tex_file))
-                num_of_run_tests_map[tool] = tool_num_of_run_tests
-            if list(num_of_run_tests_map.values()).count(0) == 1 and \
-               list(num_of_run_tests_map.values()).count(num_of_all_tests) == len(tools) - 1:
-                for tool in num_of_run_tests_map:
-                    if num_of_run_tests_map[tool] == 0:
-                        reportViolation('R2', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    checkRuleR2OnRunTests(results, 'onceNumOfRunTests', violation_list, tools)
 
 def checkRuleR2OnBuggyVersion(violation_list, tools, \
                               numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                               table_tex_file=RUN_FIXED_THEN_BUGGY_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + 'notoolNumOfRunTestsExcludeFlaky'
-            num_of_all_tests = int(extractMacroValue(retestall_macro, numbers_tex_file))
-            num_of_run_tests_map = {}
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + 'NumOfRunTestsExcludeFlaky'
-                tool_num_of_run_tests = int(extractMacroValue(tool_macro, numbers_tex_file))
-                num_of_run_tests_map[tool] = tool_num_of_run_tests
-            if list(num_of_run_tests_map.values()).count(0) == 1 and \
-               list(num_of_run_tests_map.values()).count(num_of_all_tests) == len(tools) - 1:
-                for tool in num_of_run_tests_map:
-                    if num_of_run_tests_map[tool] == 0:
-                        reportViolation('R2', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    checkRuleR2OnRunTests(results, 'NumOfRunTestsExcludeFlaky', violation_list, tools)
 
 def checkRuleR3(violation_list, tools=TOOLS, numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                 table_tex_file=RUN_FIXED_THEN_BUGGY_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + \
-                              'notoolNumOfRunTestsFixedExcludeFlaky'
-            num_of_all_tests = int(extractMacroValue(retestall_macro, numbers_tex_file))
-            for tool in tools:
-                tool_fixed_macro = example_id.replace('-', '') + tool + \
-                                   'NumOfRunTestsFixedExcludeFlaky'
-                tool_buggy_macro = example_id.replace('-', '') + tool + \
-                                   'NumOfRunTestsExcludeFlaky'
-                tool_num_of_run_tests_on_fixed_version = \
-                                int(extractMacroValue(tool_fixed_macro, numbers_tex_file))
-                tool_num_of_run_tests_on_buggy_version = \
-                                int(extractMacroValue(tool_buggy_macro, numbers_tex_file))
-                if tool_num_of_run_tests_on_fixed_version == num_of_all_tests and \
-                   tool_num_of_run_tests_on_buggy_version == num_of_all_tests:
-                    reportViolation('R3', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    num_of_all_tests = extractMetric(results, ['notool'], 'NumOfRunTestsFixedExcludeFlaky')
+    violations = \
+        (extractMetric(results, tools, 'NumOfRunTestsFixedExcludeFlaky') == num_of_all_tests) & \
+        (extractMetric(results, tools, 'NumOfRunTestsExcludeFlaky') == num_of_all_tests)
+    reportViolations('R3', violations, results, violation_list, tools)
 
 def checkRuleR4(violation_list, tools=TOOLS):
     checkRuleR4OnFixedVersion(violation_list, tools)
     checkRuleR4OnBuggyVersion(violation_list, tools)
 
+def checkRuleR4OnRunTests(results, metric, violation_list, tools):
+    num_of_all_tests = extractMetric(results, ['notool'], metric)
+    num_of_run_tests = extractMetric(results, tools, metric)
+    # exactly one tool runs all tests, all the others run no test
+    only_one_runs_all = ((num_of_run_tests == 0).sum(axis=1) == len(tools) - 1) & \
+                        ((num_of_run_tests == num_of_all_tests).sum(axis=1) == 1)
+    violations = only_one_runs_all[:, None] & (num_of_run_tests != 0)
+    reportViolations('R4', violations, results, violation_list, tools)
+
 def checkRuleR4OnFixedVersion(violation_list, tools, numbers_tex_file=RUN_FIXED_TWICE_NUMBERS, \
                               table_tex_file=RUN_FIXED_TWICE_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + 'notoolonceNumOfRunTests'
-            num_of_all_tests = int(extractMacroValue(retestall_macro, numbers_tex_file))
-            num_of_run_tests_map = {}
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + 'onceNumOfRunTests'
-                tool_num_of_run_tests = int(extractMacroValue(tool_macro, numbers_tex_file))
-                num_of_run_tests_map[tool] = tool_num_of_run_tests
-            if list(num_of_run_tests_map.values()).count(0) == len(tools) - 1 and \
-               list(num_of_run_tests_map.values()).count(num_of_all_tests) == 1:
-                for tool in num_of_run_tests_map:
-                    if num_of_run_tests_map[tool] != 0:
-                        reportViolation('R4', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    checkRuleR4OnRunTests(results, 'onceNumOfRunTests', violation_list, tools)
 
 def checkRuleR4OnBuggyVersion(violation_list, tools, \
                               numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                               table_tex_file=RUN_FIXED_THEN_BUGGY_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + 'notoolNumOfRunTestsExcludeFlaky'
-            num_of_all_tests = int(extractMacroValue(retestall_macro, numbers_tex_file))
-            num_of_run_tests_map = {}
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + 'NumOfRunTestsExcludeFlaky'
-                tool_num_of_run_tests = int(extractMacroValue(tool_macro, numbers_tex_file))
-                num_of_run_tests_map[tool] = tool_num_of_run_tests
-            if list(num_of_run_tests_map.values()).count(0) == len(tools) - 1 and \
-               list(num_of_run_tests_map.values()).count(num_of_all_tests) == 1:
-                for tool in num_of_run_tests_map:
-                    if num_of_run_tests_map[tool] != 0:
-                        reportViolation('R4', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    checkRuleR4OnRunTests(results, 'NumOfRunTestsExcludeFlaky', violation_list, tools)
 
 def checkRuleR5(violation_list, tools=TOOLS, numbers_tex_file=RUN_FIXED_TWICE_NUMBERS, \
                 table_tex_file=RUN_FIXED_TWICE_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            num_of_run_tests_map = {}
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + 'twiceNumOfRunTests'
-                tool_num_of_run_tests = int(extractMacroValue(tool_macro, numbers_tex_file))
-                if tool_num_of_run_tests != 0:
-                    reportViolation('R5', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    violations = extractMetric(results, tools, 'twiceNumOfRunTests') != 0
+    reportViolations('R5', violations, results, violation_list, tools)
 
 def checkRuleR6(violation_list, tools=TOOLS, numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                 table_tex_file=RUN_FIXED_THEN_BUGGY_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + \
-                              'notoolNumOfRunTestsFixedExcludeFlaky'
-            retestall_num_of_run_tests = extractMacroValue(retestall_macro, numbers_tex_file)
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + \
-                             'NumOfRunTestsFixedExcludeFlaky'
-                tool_num_of_run_tests = extractMacroValue(tool_macro, numbers_tex_file)
-                if int(tool_num_of_run_tests) != int(retestall_num_of_run_tests):
-                    reportViolation('R6', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    violations = extractMetric(results, tools, 'NumOfRunTestsFixedExcludeFlaky') != \
+                 extractMetric(results, ['notool'], 'NumOfRunTestsFixedExcludeFlaky')
+    reportViolations('R6', violations, results, violation_list, tools)
 
 def checkRuleR7(violation_list, tools=TOOLS):
     checkRuleR7OnFixedVersion(violation_list, tools)
@@ -246,42 +176,32 @@ def checkRuleR7(violation_list, tools=TOOLS):
 def checkRuleR7OnBuggyVersion(violation_list, tools=TOOLS, \
                               numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                               table_tex_file=RUN_FIXED_THEN_BUGGY_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + 'notoolNumOfFailedTestsExcludeFlaky'
-            retestall_num_of_failed_tests = extractMacroValue(retestall_macro, numbers_tex_file)
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + 'NumOfFailedTestsExcludeFlaky'
-                tool_num_of_failed_tests = extractMacroValue(tool_macro, numbers_tex_file)
-                if int(tool_num_of_failed_tests) > int(retestall_num_of_failed_tests):
-                    reportViolation('R7', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    violations = extractMetric(results, tools, 'NumOfFailedTestsExcludeFlaky') > \
+                 extractMetric(results, ['notool'], 'NumOfFailedTestsExcludeFlaky')
+    reportViolations('R7', violations, results, violation_list, tools)
 
 def checkRuleR7OnFixedVersion(violation_list, tools=TOOLS, \
                               numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                               table_tex_file=RUN_FIXED_THEN_BUGGY_TABLE):
-    fr = open(table_tex_file, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if ' & ' in lines[i] and '\\UseMacro{' in lines[i] and lines[i].strip().endswith('\\'):
-            example_id = lines[i].split(' & ')[0]
-            retestall_macro = example_id.replace('-', '') + \
-                              'notoolNumOfFailedTestsFixedExcludeFlaky'
-            retestall_num_of_failed_tests = extractMacroValue(retestall_macro, numbers_tex_file)
-            for tool in tools:
-                tool_macro = example_id.replace('-', '') + tool + \
-                             'NumOfFailedTestsFixedExcludeFlaky'
-                tool_num_of_failed_tests = extractMacroValue(tool_macro, numbers_tex_file)
-                if int(tool_num_of_failed_tests) > int(retestall_num_of_failed_tests):
-                    reportViolation('R7', tool, example_id, violation_list)
+    results = loadResults(numbers_tex_file, table_tex_file)
+    violations = extractMetric(results, tools, 'NumOfFailedTestsFixedExcludeFlaky') > \
+                 extractMetric(results, ['notool'], 'NumOfFailedTestsFixedExcludeFlaky')
+    reportViolations('R7', violations, results, violation_list, tools)
+
+# A violation is (rule, tool, example_id), an example violating a rule on both the fixed and
+# the buggy version is reported (and grouped) once
+VIOLATION_FIELDS = ['rule', 'tool', 'example']
 
 def reportViolation(rule, tool, example_id, violation_list):
     # print (rule, tool, example_id)
-    violation_list.append((rule, tool, example_id))
+    violation_list.add((rule, tool, example_id))
+
+def exportViolations(violation_list, opts):
+    if opts.json:
+        violation_list.exportJson(opts.json)
+    if opts.csv:
+        violation_list.exportCsv(opts.csv)
 
 def groupViolations(violation_list, buggy_numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS, \
                     fixed_numbers_tex_file=RUN_FIXED_TWICE_NUMBERS):
@@ -570,7 +490,7 @@ def matchGroupingRule6(rule, tool, project, violations_grouping_dict, \
             
 if __name__ == '__main__':
     opts = parseArgs(sys.argv[1:])
-    violation_list = []
+    violation_list = ViolationStore(VIOLATION_FIELDS)
     if opts.all:
         checkRuleR1(violation_list)
         checkRuleR2(violation_list)
@@ -582,6 +502,7 @@ if __name__ == '__main__':
         # for v in violation_list:
         #     print (v)
         groupViolations(violation_list)
+        exportViolations(violation_list, opts)
         exit(0)
     if opts.R1:
         checkRuleR1(violation_list)
@@ -597,3 +518,4 @@ if __name__ == '__main__':
         checkRuleR6(violation_list)
     if opts.R7:
         checkRuleR7(violation_list)
+    exportViolations(violation_list, opts)
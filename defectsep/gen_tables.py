@@ -15,12 +15,16 @@ import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from common.parse_cache import ParseCache
+
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__)) # Dir of this script
 TABLES_DIR = SCRIPT_DIR + '/tables'
 RUN_FIXED_THEN_BUGGY_NUMBERS_TEX_FILE = TABLES_DIR + '/defectsep-fixed-buggy-numbers.tex'
 RUN_FIXED_THEN_BUGGY_TABLE_TEX_FILE = TABLES_DIR + '/defectsep-fixed-buggy-table.tex'
 RUN_FIXED_TWICE_NUMBERS_TEX_FILE = TABLES_DIR + '/defectsep-fixed-version-twice-numbers.tex'
 RUN_FIXED_TWICE_TABLE_TEX_FILE = TABLES_DIR + '/defectsep-fixed-version-twice-table.tex'
+PARSE_CACHE_FILE = TABLES_DIR + '/parsed-logs.db'
 
 _RESULTS_DIR = SCRIPT_DIR + '/_results'
 #_RESULTS_DIR = SCRIPT_DIR + '/../../run-defects4j/_results'
@@ -38,6 +42,8 @@ def parseArgs(argv):
                         action='store_true', required=False)
     parser.add_argument('--plot', help='Plot efficiency report', \
                         action='store_true', required=False)
+    parser.add_argument('--no-cache', help='Re-parse all logs instead of using ' + \
+                        PARSE_CACHE_FILE, action='store_true', required=False)
 
     if (len(argv) == 0):
         parser.print_help()
@@ -59,36 +65,39 @@ def setD4JExamples():
         examples.append('math-' + str(i))
     return examples
 
-def extractNumOfRunAndFailedTests(log):
-    fr = open(log, 'r')
-    lines = fr.readlines()
-    fr.close()
+def parseLog(log):
+    ''' Read a log once, return [num_of_run_tests, num_of_failed_tests, exec_time]
+    (failed includes errors, exec_time is None if the build did not report its total time)
+    '''
     num_of_run_tests = 0
     num_of_failed_tests = 0
     num_of_error_tests = 0
-    for i in range(len(lines)):
-        if lines[i].startswith('Tests run: ') and 'Time elapsed:' not in lines[i]:
-            num_of_run_tests = int(lines[i].split(',')[0].split()[-1])
-            num_of_failed_tests = int(lines[i].split(',')[1].split()[-1])
-            num_of_error_tests = int(lines[i].split(',')[2].split()[-1])
-    return num_of_run_tests, num_of_failed_tests + num_of_error_tests
+    exec_time = None
+    with open(log, 'r') as fr:
+        for line in fr:
+            if line.startswith('Tests run: ') and 'Time elapsed:' not in line:
+                num_of_run_tests = int(line.split(',')[0].split()[-1])
+                num_of_failed_tests = int(line.split(',')[1].split()[-1])
+                num_of_error_tests = int(line.split(',')[2].split()[-1])
+            elif line.startswith('[INFO] Total time: '):
+                if line.strip().endswith('s'):
+                    exec_time = float(line.split()[-2])
+                elif line.strip().endswith('min'):
+                    exec_time = float(line.split()[-2].split(':')[0]) * 60 + \
+                                float(line.split()[-2].split(':')[1])
+    if exec_time is not None:
+        exec_time = round(exec_time, 2)
+    return [num_of_run_tests, num_of_failed_tests + num_of_error_tests, exec_time]
 
-def extractExecTime(log):
-    fr = open(log, 'r')
-    lines = fr.readlines()
-    fr.close()
-    for i in range(len(lines)):
-        if lines[i].startswith('[INFO] Total time: '):
-            if lines[i].strip().endswith('s'):
-                exec_time = float(lines[i].split()[-2])
-            elif lines[i].strip().endswith('min'):
-                exec_time = float(lines[i].split()[-2].split(':')[0]) * 60 + \
-                            float(lines[i].split()[-2].split(':')[1])
-    return round(exec_time, 2)
+def getLogRecord(log, cache=None):
+    if cache is None:
+        return parseLog(log)
+    return cache.get(log, parseLog)
 
 def genFixedThenBuggyNumbers(examples, projects=PROJECTS, tools=TOOLS, \
                              results_dir=_RESULTS_DIR, \
-                             numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS_TEX_FILE):
+                             numbers_tex_file=RUN_FIXED_THEN_BUGGY_NUMBERS_TEX_FILE, \
+                             cache=None):
     lines = ''
     defectcheck_total_time = 0
     acc_time_dict = {}
@@ -112,8 +121,7 @@ def genFixedThenBuggyNumbers(examples, projects=PROJECTS, tools=TOOLS, \
             if not os.path.isdir(buggy_dir):
                 continue
             log = buggy_dir + '/' + tool + '.log'
-            num_of_run_tests, num_of_failed_tests = extractNumOfRunAndFailedTests(log)
-            exec_time = extractExecTime(log)
+            num_of_run_tests, num_of_failed_tests, exec_time = getLogRecord(log, cache)
             acc_time_dict[project][tool] += exec_time
             lines += '\\DefMacro{' + example_id + tool + 'NumOfRunTestsExcludeFlaky}{' \
                      + str(num_of_run_tests) + '}\n'
@@ -124,7 +132,7 @@ def genFixedThenBuggyNumbers(examples, projects=PROJECTS, tools=TOOLS, \
             if not os.path.isdir(fixed_dir):
                 continue
             log = fixed_dir + '/' + tool + '.log'
-            num_of_run_tests, num_of_failed_tests = extractNumOfRunAndFailedTests(log)
+            num_of_run_tests, num_of_failed_tests, exec_time = getLogRecord(log, cache)
             lines += '\\DefMacro{' + example_id + tool + 'NumOfRunTestsFixedExcludeFlaky}{' \
                      + str(num_of_run_tests) + '}\n'
             lines += '\\DefMacro{' + example_id + tool + 'NumOfFailedTestsFixedExcludeFlaky}{' \
@@ -132,7 +140,6 @@ def genFixedThenBuggyNumbers(examples, projects=PROJECTS, tools=TOOLS, \
             # count DefectCheck num of tests
             if tool == 'notool':
                 defectcheck_total_number_of_tests += num_of_run_tests
-            exec_time = extractExecTime(log)
             acc_time_dict[project][tool] += exec_time
     for project in projects:
         if not os.path.isdir(results_dir + '/' + project):
@@ -184,7 +191,7 @@ def genFixedThenBuggyTable(examples, tools=TOOLS, results_dir=_RESULTS_DIR, \
 
 # (for R5: same version twice experiment)
 def genFixedTwiceNumbers(examples, tools=TOOLS, results_dir=_RESULTS_DIR, \
-                         numbers_tex_file=RUN_FIXED_TWICE_NUMBERS_TEX_FILE):
+                         numbers_tex_file=RUN_FIXED_TWICE_NUMBERS_TEX_FILE, cache=None):
     lines = ''
     for ex in examples:
         project = ex.split('-')[0]
@@ -199,7 +206,7 @@ def genFixedTwiceNumbers(examples, tools=TOOLS, results_dir=_RESULTS_DIR, \
                 continue
             for tool in tools:
                 log = version_dir + '/' + tool + '.log'
-                num_of_run_tests, num_of_failed_tests = extractNumOfRunAndFailedTests(log)
+                num_of_run_tests, num_of_failed_tests, exec_time = getLogRecord(log, cache)
                 lines += '\\DefMacro{' + example_id + tool + version.split('-')[1] \
                          + 'NumOfRunTests}{' + str(num_of_run_tests) + '}\n'
     fw = open(numbers_tex_file, 'w')
@@ -309,10 +316,13 @@ if __name__ == '__main__':
     if opts.all:
         examples = setD4JExamples()
         sub.run('mkdir -p ' + TABLES_DIR, shell=True)
-        genFixedThenBuggyNumbers(examples)
+        cache = None if opts.no_cache else ParseCache(PARSE_CACHE_FILE, 'defectsep-log')
+        genFixedThenBuggyNumbers(examples, cache=cache)
         genFixedThenBuggyTable(examples)
-        genFixedTwiceNumbers(examples)
+        genFixedTwiceNumbers(examples, cache=cache)
         genFixedTwiceTable(examples)
+        if cache is not None:
+            cache.close()
         exit(0)
     elif opts.plot:
         sub.run('mkdir -p ' + PLOTS_DIR, shell=True)
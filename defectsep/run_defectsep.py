@@ -10,6 +10,8 @@ import argparse
 import datetime
 import collections
 import distutils.core
+import fcntl
+from concurrent import futures
 
 ### Requires:
 ### 1. Java 1.7, Git >= 1.9, SVN >= 1.8, Perl >= 5.0.10
@@ -18,6 +20,7 @@ import distutils.core
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__)) # Dir of this script
 DEFECTS4J_BIN = SCRIPT_DIR + '/defects4j/framework/bin/defects4j'
 _DOWNLOADS_DIR = SCRIPT_DIR + '/_downloads'
+CHECKOUTS_CACHE_NAME = '_checkouts' # in the downloads dir, one defects4j checkout per project/bug
 _RESULTS_DIR = SCRIPT_DIR + '/_results'
 INTEGRATE_BASH_SCRIPT = SCRIPT_DIR + '/integrate.sh'
 
@@ -51,6 +54,8 @@ def parseArgs(argv):
                         required=False)
     parser.add_argument('--enable-math', help='Include commons-math examples in experiments', \
                         action='store_true', required=False)
+    parser.add_argument('--jobs', help='Number of (example, tool) jobs to run in parallel', \
+                        type=int, default=1, required=False)
 
     if (len(argv) == 0):
         parser.print_help()
@@ -80,70 +85,140 @@ def setD4JExamples(enable_math): # invalid examples are excluded
             examples.append('math-' + str(i))
     return examples
 
-def cloneProject(project, example_number, defects4j_bin=DEFECTS4J_BIN, \
-                 downloads_dir=_DOWNLOADS_DIR):
-    if not os.path.isdir(downloads_dir + '/' + project):
-        os.makedirs(downloads_dir + '/' + project)
-    # if exist, delete and re-clone it
-    if os.path.isdir(downloads_dir + '/' + project + '/' + project + '-' + example_number):
-        shutil.rmtree(downloads_dir + '/' + project + '/' + project + '-' + example_number)
-    os.chdir(downloads_dir + '/' + project)
-    sub.run(defects4j_bin + ' checkout -p %s -v %sb -w %s-%s' \
-            % (project.title(), example_number, project, example_number), shell=True, \
+def cacheProjectCheckout(project, example_number, defects4j_bin=DEFECTS4J_BIN, \
+                         downloads_dir=_DOWNLOADS_DIR):
+    ''' Run defects4j checkout once per project/bug and keep it in the cache of
+    @downloads_dir as a bare repository (repo.git) plus the files defects4j leaves untracked
+    (untracked/). Return the cache entry dir, None if the checkout failed.
+    '''
+    example = project + '-' + example_number
+    cache_entry = downloads_dir + '/' + CHECKOUTS_CACHE_NAME + '/' + project + '/' + example
+    if os.path.isdir(cache_entry):
+        return cache_entry
+    # build the entry aside and rename it, so a half-made entry is never used
+    tmp_entry = cache_entry + '.tmp-' + str(os.getpid())
+    if os.path.isdir(tmp_entry):
+        shutil.rmtree(tmp_entry)
+    os.makedirs(tmp_entry)
+    checkout_dir = tmp_entry + '/' + example
+    sub.run(defects4j_bin + ' checkout -p %s -v %sb -w %s' \
+            % (project.title(), example_number, checkout_dir), shell=True, \
+            stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
+    if not os.path.isdir(checkout_dir + '/.git'):
+        print ('[RTSCheck] Failed to checkout ' + example)
+        shutil.rmtree(tmp_entry)
+        return None
+    untracked_files = sub.run(['git', 'ls-files', '--others'], cwd=checkout_dir, \
+                              stdout=sub.PIPE, universal_newlines=True).stdout.splitlines()
+    for untracked_file in untracked_files:
+        os.makedirs(os.path.dirname(tmp_entry + '/untracked/' + untracked_file), exist_ok=True)
+        shutil.copy2(checkout_dir + '/' + untracked_file, tmp_entry + '/untracked/' + \
+                     untracked_file)
+    sub.run(['git', 'clone', '--bare', '-q', checkout_dir, tmp_entry + '/repo.git'], \
             stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
+    shutil.rmtree(checkout_dir)
+    try:
+        os.rename(tmp_entry, cache_entry)
+    except OSError: # cached meanwhile by another run
+        shutil.rmtree(tmp_entry)
+    return cache_entry
+
+def getProjectDir(project, example_number, tool, downloads_dir=_DOWNLOADS_DIR):
+    # every tool gets its own working tree, so (example, tool) jobs can run in parallel
+    return downloads_dir + '/' + project + '/' + project + '-' + example_number + '-' + tool
+
+def cloneProject(project, example_number, project_dir, defects4j_bin=DEFECTS4J_BIN, \
+                 downloads_dir=_DOWNLOADS_DIR):
+    ''' Create a fresh working copy of the buggy version as a worktree of the cached checkout.
+    Return False if there is none, the job cannot run.
+    '''
+    cache_entry = cacheProjectCheckout(project, example_number, defects4j_bin, downloads_dir)
+    if cache_entry is None:
+        return False
+    os.makedirs(os.path.dirname(project_dir), exist_ok=True)
+    # if exist, delete and re-create it
+    if os.path.isdir(project_dir):
+        shutil.rmtree(project_dir)
+    # jobs of the same example share the bare repository, one of them updates it at a time
+    with open(cache_entry + '/worktree.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sub.run(['git', 'worktree', 'prune'], cwd=cache_entry + '/repo.git')
+        sp = sub.run(['git', 'worktree', 'add', '--detach', project_dir, \
+                      'D4J_%s_%s_BUGGY_VERSION' % (project.title(), example_number)], \
+                     cwd=cache_entry + '/repo.git', stdout=sub.PIPE, stderr=sub.STDOUT, \
+                     universal_newlines=True)
+    if sp.returncode != 0:
+        print ('[RTSCheck] Failed to create the worktree of ' + project + '-' + \
+               example_number + ': ' + sp.stdout.strip())
+        return False
+    untracked_dir = cache_entry + '/untracked'
+    for dir_path, subpaths, files in os.walk(untracked_dir):
+        for f in files:
+            target_dir = project_dir + dir_path[len(untracked_dir):]
+            os.makedirs(target_dir, exist_ok=True)
+            shutil.copy2(dir_path + '/' + f, target_dir + '/' + f)
+    return True
+
+def removeProject(project, example_number, project_dir, downloads_dir=_DOWNLOADS_DIR):
+    ''' Remove the worktree made by cloneProject, and its entry in the cached checkout.
+    '''
+    cache_entry = downloads_dir + '/' + CHECKOUTS_CACHE_NAME + '/' + project + '/' + \
+                  project + '-' + example_number
+    with open(cache_entry + '/worktree.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sp = sub.run(['git', 'worktree', 'remove', '--force', project_dir], \
+                     cwd=cache_entry + '/repo.git', stdout=open(os.devnull, 'w'), \
+                     stderr=sub.STDOUT)
+        if sp.returncode != 0: # git < 2.17 has no worktree remove
+            if os.path.isdir(project_dir):
+                shutil.rmtree(project_dir)
+            sub.run(['git', 'worktree', 'prune'], cwd=cache_entry + '/repo.git')
 
 # checkout to fixed version
-def checkoutToFixedVer(project, example_number, downloads_dir=_DOWNLOADS_DIR):
-    os.chdir(downloads_dir + '/' + project + '/' + project + '-' + example_number)
+def checkoutToFixedVer(project, example_number, project_dir):
     sub.run('git checkout D4J_%s_%s_FIXED_VERSION' \
-            % (project.title(), example_number), shell=True, \
+            % (project.title(), example_number), shell=True, cwd=project_dir, \
             stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
 
 # checkout to buggy version
-def checkoutToBuggyVer(project, example_number, downloads_dir=_DOWNLOADS_DIR):
-    os.chdir(downloads_dir + '/' + project + '/' + project + '-' + example_number)
+def checkoutToBuggyVer(project, example_number, project_dir):
     sub.run('git checkout D4J_%s_%s_BUGGY_VERSION' \
-            % (project.title(), example_number), shell=True, \
+            % (project.title(), example_number), shell=True, cwd=project_dir, \
             stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
 
-def integrateToolInPomFile(tool, project, example_number, version, \
-                    integrate_bash_script=INTEGRATE_BASH_SCRIPT, downloads_dir=_DOWNLOADS_DIR):
-    project_dir = downloads_dir + '/' + project + '/' + project + '-' + example_number
-    sub.run('git checkout -- .', shell=True) # stash any previous changes on pom
+def integrateToolInPomFile(tool, project_dir, integrate_bash_script=INTEGRATE_BASH_SCRIPT):
+    # stash any previous changes on pom
+    sub.run('git checkout -- .', shell=True, cwd=project_dir)
     sub.run(integrate_bash_script + ' ' + project_dir + ' ' + tool, shell=True, \
             stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
 
-def runRTSTool(tool, project, example_number, version, results_dir=_RESULTS_DIR):
+def runRTSTool(tool, project, example_number, version, project_dir, results_dir=_RESULTS_DIR):
     example_logs_dir = results_dir + '/' + project + '/' + project + '-' + example_number + \
                        '/' + version
-    if not os.path.isdir(example_logs_dir):
-        os.makedirs(example_logs_dir)
+    os.makedirs(example_logs_dir, exist_ok=True) # shared by the jobs of all tools
     if tool == 'notool':
         notool_log = example_logs_dir + '/notool.log'
-        sub.run('mvn -Pnotoolp test -fn', shell=True, \
+        sub.run('mvn -Pnotoolp test -fn', shell=True, cwd=project_dir, \
                 stdout=open(notool_log, 'w'), stderr=sub.STDOUT)
     elif tool == 'ekstazi':
         ekstazi_log = example_logs_dir + '/ekstazi.log'
-        sub.run('mvn -Pekstazip test -fn', shell=True, \
+        sub.run('mvn -Pekstazip test -fn', shell=True, cwd=project_dir, \
                 stdout=open(ekstazi_log, 'w'), stderr=sub.STDOUT)
     elif tool == 'clover':
         clover_log = example_logs_dir + '/clover.log'
-        sub.run('mvn -Pcloverp test -fn', shell=True, \
+        sub.run('mvn -Pcloverp test -fn', shell=True, cwd=project_dir, \
                 stdout=open(clover_log, 'w'), stderr=sub.STDOUT)
     elif tool == 'starts':
         starts_log = example_logs_dir + '/starts.log'
-        sub.run('mvn -Pstartsp starts:starts -fn', shell=True, \
+        sub.run('mvn -Pstartsp starts:starts -fn', shell=True, cwd=project_dir, \
                 stdout=open(starts_log, 'w'), stderr=sub.STDOUT)
     elif tool == 'hyrts':
         hyrts_log = example_logs_dir + '/hyrts.log'
-        sub.run('mvn -Phyrtsp hyrts:HyRTS -fn', shell=True, \
+        sub.run('mvn -Phyrtsp hyrts:HyRTS -fn', shell=True, cwd=project_dir, \
                 stdout=open(hyrts_log, 'w'), stderr=sub.STDOUT)
 
 # exclude some flaky tests
-def excludeFlakyTestsFromTime_CommentSuite(example, flaky_tests, downloads_dir=_DOWNLOADS_DIR):
-    project = example.split('-')[0]
-    example_number = int(example.split('-')[1])
-    repo_dir = downloads_dir + '/' + project + '/' + example
+def excludeFlakyTestsFromTime_CommentSuite(example, flaky_tests, repo_dir):
     for ft in flaky_tests:
         if ft == 'TestDateTimeZone' or ft == 'TestPeriodType':
             suite_file = repo_dir + '/src/test/java/org/joda/time/TestAll.java'
@@ -162,10 +237,7 @@ def excludeFlakyTestsFromTime_CommentSuite(example, flaky_tests, downloads_dir=_
         fw.close()
 
 # exclude some flaky tests
-def excludeFlakyTestsFromLang_CommentSuite(example, flaky_tests, downloads_dir=_DOWNLOADS_DIR):
-    project = example.split('-')[0]
-    example_number = int(example.split('-')[1])
-    repo_dir = downloads_dir + '/' + project + '/' + example
+def excludeFlakyTestsFromLang_CommentSuite(example, flaky_tests, repo_dir):
     for ft in flaky_tests:
         if ft == 'ToStringBuilderTest':
             suite_file = repo_dir + \
@@ -183,81 +255,83 @@ def excludeFlakyTestsFromLang_CommentSuite(example, flaky_tests, downloads_dir=_
         fw.close()
 
 # exclude some flaky tests
-def excludeFlakyTests_DeleteFile(example, flaky_tests, downloads_dir=_DOWNLOADS_DIR):
-    project = example.split('-')[0]
-    example_number = int(example.split('-')[1])
-    repo_dir = downloads_dir + '/' + project + '/' + example
+def excludeFlakyTests_DeleteFile(example, flaky_tests, repo_dir):
     for ft in flaky_tests:
         ft_file = searchFile(repo_dir, ft + '.java')
         if ft_file:
             os.remove(ft_file)
 
 # exclude some flaky tests
-def excludeProjectSpecificFlakyTests(example, flaky_tests):
+def excludeProjectSpecificFlakyTests(example, flaky_tests, project_dir):
     # example is like: lang-20
     project = example.split('-')[0]
     example_number = int(example.split('-')[1])
     if project == 'time':
-        excludeFlakyTestsFromTime_CommentSuite(example, flaky_tests)
+        excludeFlakyTestsFromTime_CommentSuite(example, flaky_tests, project_dir)
     elif project == 'lang':
         if example_number in range(28, 42):
-            excludeFlakyTests_DeleteFile(example, flaky_tests)
+            excludeFlakyTests_DeleteFile(example, flaky_tests, project_dir)
         elif example_number in range(42, 54):
-            excludeFlakyTestsFromLang_CommentSuite(example, flaky_tests)
+            excludeFlakyTestsFromLang_CommentSuite(example, flaky_tests, project_dir)
     elif project == 'math':
-        excludeFlakyTests_DeleteFile(example, flaky_tests)
+        excludeFlakyTests_DeleteFile(example, flaky_tests, project_dir)
 
 # one tool, one example
 def runOneRTSToolOnOneExample(example, tool, flaky_tests, downloads_dir=_DOWNLOADS_DIR):
     # example is like: lang-20
     project = example.split('-')[0]
     example_number = example.split('-')[1]
+    project_dir = getProjectDir(project, example_number, tool, downloads_dir)
     # clone project
-    cloneProject(project, example_number)
-    os.chdir(downloads_dir + '/' + project + '/' + project + '-' + example_number)
+    if not cloneProject(project, example_number, project_dir, downloads_dir=downloads_dir):
+        print ('[RTSCheck] Skipped: ' + example + ' ' + tool)
+        return False
     # checkout to fixed version
-    checkoutToFixedVer(project, example_number)
+    checkoutToFixedVer(project, example_number, project_dir)
     # change pom file according to tool
-    integrateToolInPomFile(tool, project, example_number, 'fixed')
+    integrateToolInPomFile(tool, project_dir)
     # exclude flaky tests
-    excludeProjectSpecificFlakyTests(example, flaky_tests)
+    excludeProjectSpecificFlakyTests(example, flaky_tests, project_dir)
     # run rts tool, save logs
-    runRTSTool(tool, project, example_number, 'fixed')
+    runRTSTool(tool, project, example_number, 'fixed', project_dir)
     # restore the removed test files
-    sub.run('git checkout -- .', shell=True, stdout=open(os.devnull, 'w'), stderr=sub.STDOUT)
+    sub.run('git checkout -- .', shell=True, cwd=project_dir, stdout=open(os.devnull, 'w'), \
+            stderr=sub.STDOUT)
     # checkout to buggy version
-    checkoutToBuggyVer(project, example_number)
+    checkoutToBuggyVer(project, example_number, project_dir)
     # change pom file according to tool
-    integrateToolInPomFile(tool, project, example_number, 'buggy')
+    integrateToolInPomFile(tool, project_dir)
     # exclude flaky tests
-    excludeProjectSpecificFlakyTests(example, flaky_tests)
+    excludeProjectSpecificFlakyTests(example, flaky_tests, project_dir)
     # run rts tool, save logs
-    runRTSTool(tool, project, example_number, 'buggy')
+    runRTSTool(tool, project, example_number, 'buggy', project_dir)
+    removeProject(project, example_number, project_dir, downloads_dir)
+    return True
 
-# all tools, one example
-def runAllToolsOnOneExample(example, flaky_tests=[], tools=TOOLS, \
-                            lang_flaky_tests=LANG_FLAKY_TESTS, \
-                            math_flaky_tests=MATH_FLAKY_TESTS, \
-                            time_flaky_tests=TIME_FLAKY_TESTS, \
-                            results_dir=_RESULTS_DIR):
-    # example is like: lang-20
-    project = example.split('-')[0]
-    example_number = example.split('-')[1]
+def getFlakyTests(example, lang_flaky_tests=LANG_FLAKY_TESTS, \
+                  math_flaky_tests=MATH_FLAKY_TESTS, time_flaky_tests=TIME_FLAKY_TESTS):
     if example.startswith('lang-'):
-        flaky_tests = lang_flaky_tests
+        return lang_flaky_tests
     elif example.startswith('math-'):
-        flaky_tests = math_flaky_tests
+        return math_flaky_tests
     elif example.startswith('time-'):
-        flaky_tests = time_flaky_tests
+        return time_flaky_tests
+    return []
+
+# all tools, one example
+def runAllToolsOnOneExample(example, tools=TOOLS):
     # run all tools each one time
     for tool in tools:
         print ('[RTSCheck] Running ' + tool)
-        runOneRTSToolOnOneExample(example, tool, flaky_tests)
+        runOneRTSToolOnOneExample(example, tool, getFlakyTests(example))
 
 # all tools, all examples
-def runAllToolsOnAllExamples(examples):
-    for example in examples:
-        runAllToolsOnOneExample(example)
+def runAllToolsOnAllExamples(examples, jobs=1):
+    if jobs <= 1:
+        for example in examples:
+            runAllToolsOnOneExample(example)
+        return
+    runJobs(collectJobs(examples), runOneRTSToolOnOneExample, jobs)
 
 # (for R5: twice same version exp) one tool, one example
 def runOneRTSToolOnOneExampleSameVersionTwice(example, tool, flaky_tests=[], \
@@ -265,49 +339,87 @@ def runOneRTSToolOnOneExampleSameVersionTwice(example, tool, flaky_tests=[], \
     # example is like: lang-20
     project = example.split('-')[0]
     example_number = example.split('-')[1]
+    project_dir = getProjectDir(project, example_number, tool, downloads_dir)
     # clone project
-    cloneProject(project, example_number)
-    os.chdir(downloads_dir + '/' + project + '/' + project + '-' + example_number)
+    if not cloneProject(project, example_number, project_dir, downloads_dir=downloads_dir):
+        print ('[RTSCheck] Skipped: ' + example + ' ' + tool)
+        return False
     # checkout to buggy version
-    checkoutToFixedVer(project, example_number)
+    checkoutToFixedVer(project, example_number, project_dir)
     # change pom file according to tool
-    integrateToolInPomFile(tool, project, example_number, 'fixed')
+    integrateToolInPomFile(tool, project_dir)
     # exclude flaky tests
-    excludeProjectSpecificFlakyTests(example, flaky_tests)
+    excludeProjectSpecificFlakyTests(example, flaky_tests, project_dir)
     # run rts tool, save logs
-    runRTSTool(tool, project, example_number, 'fixed-once')
+    runRTSTool(tool, project, example_number, 'fixed-once', project_dir)
     # checkout to buggy version
-    checkoutToFixedVer(project, example_number)
+    checkoutToFixedVer(project, example_number, project_dir)
     # change pom file according to tool
-    integrateToolInPomFile(tool, project, example_number, 'fixed')
+    integrateToolInPomFile(tool, project_dir)
     # exclude flaky tests
-    excludeProjectSpecificFlakyTests(example, flaky_tests)
+    excludeProjectSpecificFlakyTests(example, flaky_tests, project_dir)
     # run rts tool, save logs
-    runRTSTool(tool, project, example_number, 'fixed-twice')
+    runRTSTool(tool, project, example_number, 'fixed-twice', project_dir)
+    removeProject(project, example_number, project_dir, downloads_dir)
+    return True
 
 # (for R5: twice same version exp) all tools, one example
-def runAllRTSToolsOnOneExampleSameVersionTwice(example, flaky_tests=[], tools=TOOLS, \
-                                               lang_flaky_tests=LANG_FLAKY_TESTS, \
-                                               math_flaky_tests=MATH_FLAKY_TESTS, \
-                                               time_flaky_tests=TIME_FLAKY_TESTS, \
-                                               results_dir=_RESULTS_DIR):
-    # example is like: lang-20
-    project = example.split('-')[0]
-    example_number = example.split('-')[1]
-    if example.startswith('lang-'):
-        flaky_tests = lang_flaky_tests
-    elif example.startswith('math-'):
-        flaky_tests = math_flaky_tests
-    elif example.startswith('time-'):
-        flaky_tests = time_flaky_tests
+def runAllRTSToolsOnOneExampleSameVersionTwice(example, tools=TOOLS):
     for tool in tools:
         print ('[RTSCheck] Running ' + tool)
-        runOneRTSToolOnOneExampleSameVersionTwice(example, tool, flaky_tests)
+        runOneRTSToolOnOneExampleSameVersionTwice(example, tool, getFlakyTests(example))
 
 # (for R5: twice same version exp) all tools, all examples
-def runAllRTSToolsOnAllExamplesSameVersionTwice(examples):
+def runAllRTSToolsOnAllExamplesSameVersionTwice(examples, jobs=1):
+    if jobs <= 1:
+        for example in examples:
+            runAllRTSToolsOnOneExampleSameVersionTwice(example)
+        return
+    runJobs(collectJobs(examples), runOneRTSToolOnOneExampleSameVersionTwice, jobs)
+
+def collectJobs(examples, tools=TOOLS):
+    job_list = []
     for example in examples:
-        runAllRTSToolsOnOneExampleSameVersionTwice(example)
+        for tool in tools:
+            job_list.append((example, tool))
+    return job_list
+
+def runJob(job, run_fn, downloads_dir=_DOWNLOADS_DIR):
+    ''' Entry point of one (example, tool) job in a worker process, False if it was skipped.
+    '''
+    example, tool = job
+    return run_fn(example, tool, getFlakyTests(example), downloads_dir)
+
+def runJobs(job_list, run_fn, jobs, downloads_dir=_DOWNLOADS_DIR):
+    ''' Run (example, tool) jobs with run_fn in a pool of @jobs processes. Every job works
+    in its own working tree; the checkouts of all examples are cached first, so that the jobs
+    of one example do not all run defects4j checkout.
+    '''
+    examples = []
+    for example, tool in job_list:
+        if example not in examples:
+            examples.append(example)
+    print ('[RTSCheck] Running ' + str(len(job_list)) + ' jobs with ' + str(jobs) + ' workers')
+    with futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = {}
+        for example in examples:
+            pending[executor.submit(cacheProjectCheckout, example.split('-')[0], \
+                                    example.split('-')[1], downloads_dir=downloads_dir)] = example
+        for future in futures.as_completed(pending):
+            try:
+                future.result()
+            except Exception as e: # its jobs skip it
+                print ('[RTSCheck] Failed to checkout ' + pending[future] + ': ' + str(e))
+        pending = {}
+        for job in job_list:
+            pending[executor.submit(runJob, job, run_fn, downloads_dir)] = job
+        for future in futures.as_completed(pending):
+            example, tool = pending[future]
+            try:
+                if future.result():
+                    print ('[RTSCheck] Finished: ' + example + ' ' + tool)
+            except Exception as e: # e.g. the checkout failed, do not stop the other jobs
+                print ('[RTSCheck] Failed: ' + example + ' ' + tool + ': ' + str(e))
 
 if __name__ == '__main__':
     opts = parseArgs(sys.argv[1:])
@@ -317,7 +429,7 @@ if __name__ == '__main__':
         enable_math = False
     if opts.run:
         examples = setD4JExamples(enable_math)
-        runAllToolsOnAllExamples(examples)
+        runAllToolsOnAllExamples(examples, opts.jobs)
         exit(0)
     elif opts.run_one:
         example = opts.run_one
@@ -326,7 +438,7 @@ if __name__ == '__main__':
     # for same version twice exp
     elif opts.same_version_twice:
         examples = setD4JExamples(enable_math)
-        runAllRTSToolsOnAllExamplesSameVersionTwice(examples)
+        runAllRTSToolsOnAllExamplesSameVersionTwice(examples, opts.jobs)
         exit(0)
     # for same version twice exp
     elif opts.same_version_twice_one:
@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import contextlib
+import subprocess as sub
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from run_defectsep import cacheProjectCheckout, cloneProject, removeProject, \
+                          getProjectDir, runJobs, CHECKOUTS_CACHE_NAME
+
+# Stands for "defects4j checkout -p <project> -v <n>b -w <dir>": a git repo with the tags of
+# the buggy and fixed versions and an untracked properties file; bug 2 does not exist
+FAKE_DEFECTS4J = '''#!/bin/bash
+set -e
+echo "$@" >> "$(dirname "$0")/checkouts.txt"
+[ "$5" = "1b" ] || exit 1
+mkdir -p "$7" && cd "$7"
+git init -q && git config user.email a@b && git config user.name a
+echo fixed > A.java && git add A.java && git commit -q -m fixed
+git tag D4J_Lang_1_FIXED_VERSION
+echo buggy > A.java && git commit -q -am buggy
+git tag D4J_Lang_1_BUGGY_VERSION
+echo d4j > defects4j.build.properties
+'''
+
+def runOneJob(example, tool, flaky_tests, downloads_dir):
+    ''' A job as runOneRTSToolOnOneExample, without running the tool.
+    '''
+    project, example_number = example.split('-')
+    project_dir = getProjectDir(project, example_number, tool, downloads_dir)
+    if not cloneProject(project, example_number, project_dir, downloads_dir=downloads_dir):
+        return False
+    if tool == 'clover':
+        raise RuntimeError('build failure')
+    removeProject(project, example_number, project_dir, downloads_dir)
+    return True
+
+class WorktreesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.downloads_dir = self.tmp_dir + '/_downloads'
+        self.defects4j_bin = self.tmp_dir + '/defects4j'
+        with open(self.defects4j_bin, 'w') as fw:
+            fw.write(FAKE_DEFECTS4J)
+        os.chmod(self.defects4j_bin, 0o755)
+        # the pool pickles the functions by name, so only their defaults are patched
+        self.patches = [mock.patch.object(cacheProjectCheckout, '__defaults__', \
+                                          (self.defects4j_bin, self.downloads_dir)), \
+                        mock.patch.object(cloneProject, '__defaults__', \
+                                          (self.defects4j_bin, self.downloads_dir))]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def getNumOfCheckouts(self):
+        with open(self.tmp_dir + '/checkouts.txt', 'r') as fr:
+            return len(fr.readlines())
+
+    def listWorktrees(self):
+        return sub.run(['git', 'worktree', 'list', '--porcelain'], \
+                       cwd=self.downloads_dir + '/' + CHECKOUTS_CACHE_NAME + '/lang/lang-1/' + \
+                       'repo.git', stdout=sub.PIPE, universal_newlines=True).stdout
+
+    def testCloneAndRemove(self):
+        project_dirs = [getProjectDir('lang', '1', tool, self.downloads_dir) \
+                        for tool in ['notool', 'ekstazi']]
+        for project_dir in project_dirs:
+            self.assertTrue(cloneProject('lang', '1', project_dir))
+            with open(project_dir + '/A.java', 'r') as fr:
+                self.assertEqual(fr.read(), 'buggy\n')
+            # left untracked by defects4j, copied from the cache
+            self.assertTrue(os.path.isfile(project_dir + '/defects4j.build.properties'))
+        # one checkout for all the tools
+        self.assertEqual(self.getNumOfCheckouts(), 1)
+        self.assertIn(project_dirs[1], self.listWorktrees())
+        # a fresh working copy again, after a job changed it
+        with open(project_dirs[0] + '/A.java', 'w') as fw:
+            fw.write('changed\n')
+        self.assertTrue(cloneProject('lang', '1', project_dirs[0]))
+        with open(project_dirs[0] + '/A.java', 'r') as fr:
+            self.assertEqual(fr.read(), 'buggy\n')
+        for project_dir in project_dirs:
+            removeProject('lang', '1', project_dir, self.downloads_dir)
+            self.assertFalse(os.path.exists(project_dir))
+            self.assertNotIn(project_dir, self.listWorktrees())
+
+    def testNoCheckout(self):
+        project_dir = getProjectDir('lang', '2', 'notool', self.downloads_dir)
+        self.assertFalse(cloneProject('lang', '2', project_dir))
+        self.assertFalse(os.path.exists(project_dir))
+        # no half-made cache entry
+        self.assertEqual(os.listdir(self.downloads_dir + '/' + CHECKOUTS_CACHE_NAME + \
+                                    '/lang'), [])
+
+    def testRunJobs(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            runJobs([('lang-1', 'notool'), ('lang-1', 'clover'), ('lang-2', 'notool')], \
+                    runOneJob, 2, self.downloads_dir)
+        lines = output.getvalue().splitlines()
+        self.assertIn('[RTSCheck] Finished: lang-1 notool', lines)
+        self.assertIn('[RTSCheck] Failed: lang-1 clover: build failure', lines)
+        # no checkout, skipped: neither finished nor failed
+        self.assertEqual([line for line in lines if 'lang-2' in line], [])
+        # lang-1 checked out once before its jobs; lang-2 before its job and by the job
+        self.assertEqual(self.getNumOfCheckouts(), 3)
+
+if __name__ == '__main__':
+    unittest.main()